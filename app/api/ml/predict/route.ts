@@ -1,62 +1,38 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { spawn } from 'child_process'
-import path from 'path'
+import { pythonScorer, ScoringRequestError } from '@/lib/ml/python-scorer'
 
 export async function POST(request: NextRequest) {
+    let body: unknown
     try {
-        const body = await request.json()
-
-        // Run Python prediction script
-        const pythonScriptPath = path.join(process.cwd(), 'scripts', 'predict.py')
-
-        const pythonProcess = spawn('python', [
-            pythonScriptPath,
-            JSON.stringify(body)
-        ])
-
-        let result = ''
-        let error = ''
-
-        pythonProcess.stdout.on('data', (data) => {
-            result += data.toString()
-        })
-
-        pythonProcess.stderr.on('data', (data) => {
-            error += data.toString()
-        })
-
-        return new Promise<NextResponse>((resolve) => {
-            pythonProcess.on('close', (code) => {
-                if (code !== 0) {
-                    console.error('Python script error:', error)
-                    resolve(NextResponse.json(
-                        { error: 'Prediction failed', details: error },
-                        { status: 500 }
-                    ))
-                } else {
-                    try {
-                        const prediction = JSON.parse(result)
-                        if (prediction.error) {
-                            resolve(NextResponse.json(
-                                { error: prediction.error },
-                                { status: 400 }
-                            ))
-                        } else {
-                            resolve(NextResponse.json(prediction))
-                        }
-                    } catch (e) {
-                        resolve(NextResponse.json(
-                            { error: 'Failed to parse prediction result', raw: result },
-                            { status: 500 }
-                        ))
-                    }
-                }
-            })
-        })
+        body = await request.json()
     } catch (error) {
         return NextResponse.json(
             { error: 'Invalid request' },
             { status: 400 }
         )
     }
+
+    try {
+        // Score through the resident Python process (models stay loaded between requests)
+        const prediction = await pythonScorer.score(body)
+        if (prediction.error) {
+            return NextResponse.json(
+                { error: prediction.error },
+                { status: 400 }
+            )
+        }
+        return NextResponse.json(prediction)
+    } catch (error) {
+        if (error instanceof ScoringRequestError) {
+            return NextResponse.json(
+                { error: error.message },
+                { status: 400 }
+            )
+        }
+        console.error('Python scorer error:', error)
+        return NextResponse.json(
+            { error: 'Prediction failed', details: error instanceof Error ? error.message : String(error) },
+            { status: 500 }
+        )
+    }
 }
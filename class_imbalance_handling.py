@@ -1,58 +1,129 @@
 # Class Imbalance Handling for Loan Default Prediction
 # Three approaches: Stratified CV, SMOTE, and Class Weights
 
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.neighbors import NearestNeighbors
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import roc_auc_score, roc_curve, confusion_matrix, classification_report
-from imblearn.over_sampling import SMOTE
-from imblearn.pipeline import Pipeline as ImbPipeline
 import xgboost as xgb
+from threadpoolctl import threadpool_limits
 
 # =============================================================================
 # APPROACH 1: STRATIFIED K-FOLD CROSS-VALIDATION
 # =============================================================================
 
-def stratified_cv_evaluation(X, y, model, cv_folds=5):
+def _fit_fold(fold, X_path, y_path, train_idx, val_idx, model, scale, threads):
+    """
+    Fit and score one fold in a worker process.
+    X and y are opened read-only from the shared memory-mapped files, so only
+    this fold's rows are materialized (once, and scaled in place).
+    """
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    X_train, X_val = X[train_idx], X[val_idx]
+    y_train, y_val = np.asarray(y[train_idx]), np.asarray(y[val_idx])
+    
+    with threadpool_limits(limits=threads):
+        if scale:
+            scaler = StandardScaler(copy=False)
+            X_train = scaler.fit_transform(X_train)
+            X_val = scaler.transform(X_val)
+        
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        y_pred_proba = model.predict_proba(X_val)[:, 1]
+        predict_seconds = time.perf_counter() - start
+    
+    return {
+        'fold': fold,
+        'auc': roc_auc_score(y_val, y_pred_proba),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'train_rows': len(train_idx),
+        'val_rows': len(val_idx),
+    }
+
+
+def parallel_cv(X, y, model, cv_folds=5, n_jobs=None, scale=True, random_state=42, cores=None):
+    """
+    Stratified K-fold CV engine: splits are computed once, X and y are written
+    once to a memory-mapped buffer shared by the worker processes, and every
+    fold fits its own clone of model in parallel (n_jobs processes, default
+    one per fold up to the core budget; spare cores become model threads).
+    cores is the budget (default: every core of the machine).
+    Returns one dict per fold: auc, fit_seconds, predict_seconds, row counts.
+    """
+    X_values = np.ascontiguousarray(X, dtype=np.float64)
+    y_values = np.asarray(y)
+    splits = list(StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state)
+                  .split(X_values, y_values))
+    
+    cores = cores or os.cpu_count() or 1
+    if n_jobs is None:
+        n_jobs = min(cv_folds, cores)
+    threads = max(1, cores // n_jobs)
+    
+    folder = tempfile.mkdtemp(prefix='cv_memmap_')
+    try:
+        X_path = os.path.join(folder, 'X.npy')
+        y_path = os.path.join(folder, 'y.npy')
+        np.save(X_path, X_values)
+        np.save(y_path, y_values)
+        del X_values
+        
+        fold_results = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(fold, X_path, y_path, train_idx, val_idx, clone(model), scale, threads)
+            for fold, (train_idx, val_idx) in enumerate(splits, start=1)
+        )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    
+    return fold_results
+
+
+def stratified_cv_evaluation(X, y, model, cv_folds=5, n_jobs=None, cores=None):
     """
     Evaluate model using stratified K-fold cross-validation.
     Maintains class distribution in each fold (critical for imbalanced data).
+    Folds run in parallel on clones of model (see parallel_cv); model itself
+    is left unfitted.
     """
     print("=" * 80)
     print("APPROACH 1: STRATIFIED K-FOLD CROSS-VALIDATION")
     print("=" * 80)
     
-    # Create stratified folds
-    skf = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    start = time.perf_counter()
+    fold_results = parallel_cv(X, y, model, cv_folds=cv_folds, n_jobs=n_jobs, cores=cores)
+    wall_seconds = time.perf_counter() - start
     
-    # Evaluate on multiple metrics
-    auc_scores = []
-    fold_num = 1
-    
-    for train_idx, val_idx in skf.split(X, y):
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_val_scaled = scaler.transform(X_val)
-        
-        # Train model
-        model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred_proba = model.predict_proba(X_val_scaled)[:, 1]
-        auc = roc_auc_score(y_val, y_pred_proba)
-        auc_scores.append(auc)
-        
-        print(f"Fold {fold_num}: AUC = {auc:.4f}")
-        fold_num += 1
+    for result in fold_results:
+        print(f"Fold {result['fold']}: AUC = {result['auc']:.4f}  "
+              f"(fit {result['fit_seconds']:.2f}s, predict {result['predict_seconds']:.2f}s)")
     
+    auc_scores = [result['auc'] for result in fold_results]
+    fit_seconds = sum(result['fit_seconds'] for result in fold_results)
     print(f"\nMean AUC: {np.mean(auc_scores):.4f} (+/- {np.std(auc_scores):.4f})")
+    print(f"Wall time: {wall_seconds:.2f}s for {fit_seconds:.2f}s of fold fitting")
     print("✓ Stratified CV ensures each fold has same class ratio as original data\n")
     
     return auc_scores
@@ -62,10 +133,69 @@ def stratified_cv_evaluation(X, y, model, cv_folds=5):
 # APPROACH 2: SMOTE (SYNTHETIC MINORITY OVER-SAMPLING TECHNIQUE)
 # =============================================================================
 
-def smote_resampling(X_train, y_train, X_test, y_test, model):
+def iter_smote_chunks(X, y, k_neighbors=5, random_state=42, chunk_size=50000, n_jobs=None,
+                      dtype=np.float32):
+    """
+    SMOTE as a generator of synthetic minority chunks (X_chunk, y_chunk).
+    Same sampling as imblearn's SMOTE: a random minority row, one of its
+    k nearest minority neighbours, a uniform step along the line between
+    them; as many samples as it takes to balance the classes. The neighbour
+    index holds the minority rows only, neighbour queries run on n_jobs
+    threads, and at most chunk_size samples exist at a time.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    classes, counts = np.unique(y, return_counts=True)
+    minority_class = classes[np.argmin(counts)]
+    n_samples = counts.max() - counts.min()
+    X_min = np.ascontiguousarray(X[y == minority_class], dtype=dtype)
+    
+    nn = NearestNeighbors(n_neighbors=k_neighbors + 1, n_jobs=n_jobs).fit(X_min)
+    # First neighbour of every minority row is the row itself
+    neighbours = np.vstack([
+        nn.kneighbors(X_min[start:start + chunk_size], return_distance=False)[:, 1:]
+        for start in range(0, len(X_min), chunk_size)
+    ])
+    
+    rng = np.random.default_rng(random_state)
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        rows = rng.integers(len(X_min), size=size)
+        cols = rng.integers(k_neighbors, size=size)
+        steps = rng.uniform(size=(size, 1)).astype(dtype)
+        base = X_min[rows]
+        X_chunk = base + steps * (X_min[neighbours[rows, cols]] - base)
+        yield X_chunk, np.full(size, minority_class, dtype=y.dtype)
+
+
+def chunked_smote(X, y, k_neighbors=5, random_state=42, chunk_size=50000, n_jobs=None, dtype=np.float32):
+    """
+    Balanced training set (original rows followed by synthetic minority rows)
+    in one preallocated dtype array, filled chunk by chunk.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    counts = np.unique(y, return_counts=True)[1]
+    n_total = len(y) + counts.max() - counts.min()
+    
+    X_res = np.empty((n_total, X.shape[1]), dtype=dtype)
+    y_res = np.empty(n_total, dtype=y.dtype)
+    X_res[:len(y)] = X
+    y_res[:len(y)] = y
+    offset = len(y)
+    for X_chunk, y_chunk in iter_smote_chunks(X, y, k_neighbors, random_state, chunk_size, n_jobs, dtype):
+        X_res[offset:offset + len(y_chunk)] = X_chunk
+        y_res[offset:offset + len(y_chunk)] = y_chunk
+        offset += len(y_chunk)
+    return X_res, y_res
+
+
+def smote_resampling(X_train, y_train, X_test, y_test, model, sampler='chunked', n_jobs=None):
     """
     Apply SMOTE to balance training data by creating synthetic minority samples.
     ONLY apply to training set, evaluate on original test set.
+    sampler='chunked' uses chunked_smote (float32, minority-only neighbour
+    index); sampler='imblearn' uses imblearn's SMOTE on the full float64 set.
     """
     print("=" * 80)
     print("APPROACH 2: SMOTE (SYNTHETIC MINORITY OVER-SAMPLING)")
@@ -76,18 +206,24 @@ def smote_resampling(X_train, y_train, X_test, y_test, model):
     print(f"  Ratio: 1:{pd.Series(y_train).value_counts()[0] / pd.Series(y_train).value_counts()[1]:.2f}")
     
     # Apply SMOTE
-    smote = SMOTE(random_state=42, k_neighbors=5)
-    X_train_smote, y_train_smote = smote.fit_resample(X_train, y_train)  # type: ignore
-    X_train_smote = pd.DataFrame(X_train_smote, columns=X_train.columns)
-    
-    print(f"\nAfter SMOTE:")
-    print(f"  Class distribution: {pd.DataFrame(y_train_smote)[0].value_counts().sort_index().to_dict()}")
+    start = time.perf_counter()
+    if sampler == 'imblearn':
+        from imblearn.over_sampling import SMOTE
+        smote = SMOTE(random_state=42, k_neighbors=5)
+        X_train_smote, y_train_smote = smote.fit_resample(X_train, y_train)  # type: ignore
+    else:
+        X_train_smote, y_train_smote = chunked_smote(X_train, y_train, k_neighbors=5, random_state=42,
+                                                     n_jobs=n_jobs)
+    smote_seconds = time.perf_counter() - start
+    
+    print(f"\nAfter SMOTE ({sampler}, {smote_seconds:.2f}s):")
+    print(f"  Class distribution: {pd.Series(np.asarray(y_train_smote)).value_counts().sort_index().to_dict()}")
     print(f"  Ratio: 1:1 (perfectly balanced)")
     
     # Scale features
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train_smote)
-    X_test_scaled = scaler.transform(X_test)
+    X_test_scaled = scaler.transform(np.asarray(X_test, dtype=X_train_scaled.dtype))
     
     # Train model on balanced data
     model.fit(X_train_scaled, y_train_smote)
@@ -107,10 +243,11 @@ def smote_resampling(X_train, y_train, X_test, y_test, model):
 # APPROACH 3: CLASS WEIGHTS
 # =============================================================================
 
-def class_weight_adjustment(X_train, y_train, X_test, y_test):
+def class_weight_adjustment(X_train, y_train, X_test, y_test, lr_params=None, xgb_params=None, scaled=None):
     """
     Use class_weight parameter to penalize misclassification of minority class.
     Automatically adjusts to inverse frequency: w_i = n_samples / (n_classes * n_i)
+    scaled: optional (X_train_scaled, X_test_scaled) already standardized on X_train.
     """
     print("=" * 80)
     print("APPROACH 3: CLASS WEIGHTS")
@@ -131,13 +268,16 @@ def class_weight_adjustment(X_train, y_train, X_test, y_test):
     print(f"  Default weight: {weights[1]:.4f} (penalizes minority more)")
     
     # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    if scaled is not None:
+        X_train_scaled, X_test_scaled = scaled
+    else:
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
     
     # Logistic Regression with class weights
     print(f"\n--- Logistic Regression with Class Weights ---")
-    lr = LogisticRegression(class_weight='balanced', max_iter=1000, random_state=42)
+    lr = LogisticRegression(class_weight='balanced', **(lr_params or {'max_iter': 1000, 'random_state': 42}))
     lr.fit(X_train_scaled, y_train)
     y_pred_proba_lr = lr.predict_proba(X_test_scaled)[:, 1]
     auc_lr = roc_auc_score(y_test, y_pred_proba_lr)
@@ -150,11 +290,8 @@ def class_weight_adjustment(X_train, y_train, X_test, y_test):
     
     xgb_model = xgb.XGBClassifier(
         scale_pos_weight=scale_pos_weight,
-        max_depth=5,
-        learning_rate=0.1,
-        n_estimators=100,
-        random_state=42,
-        verbosity=0
+        **(xgb_params or {'max_depth': 5, 'learning_rate': 0.1, 'n_estimators': 100,
+                          'random_state': 42, 'verbosity': 0})
     )
     xgb_model.fit(X_train_scaled, y_train)
     y_pred_proba_xgb = xgb_model.predict_proba(X_test_scaled)[:, 1]
@@ -171,47 +308,225 @@ def class_weight_adjustment(X_train, y_train, X_test, y_test):
 # COMPREHENSIVE COMPARISON
 # =============================================================================
 
-def compare_all_approaches(df, target_col='Default', random_state=42):
+# Bump when the cached split or result format changes (approach code is keyed by approach_source_hash)
+EXPERIMENT_CACHE_VERSION = 1
+EXPERIMENT_CACHE_DIR = os.path.join('.cache', 'experiments')
+
+MODEL_FACTORIES = {
+    'logistic_regression': LogisticRegression,
+    'gradient_boosting': GradientBoostingClassifier,
+    'xgboost': xgb.XGBClassifier,
+}
+MODEL_LABELS = {
+    'logistic_regression': 'Logistic Regression',
+    'gradient_boosting': 'Gradient Boosting',
+    'xgboost': 'XGBoost',
+}
+
+# Approach -> config; changing a config reruns only that approach
+APPROACHES = {
+    'stratified_cv': {
+        'model': 'logistic_regression',
+        'params': {'max_iter': 1000, 'random_state': 42},
+        'cv_folds': 5,
+    },
+    'smote': {
+        'model': 'logistic_regression',
+        'params': {'max_iter': 1000, 'random_state': 42},
+        'sampler': 'chunked',
+    },
+    'class_weights': {
+        'lr_params': {'max_iter': 1000, 'random_state': 42},
+        'xgb_params': {'max_depth': 5, 'learning_rate': 0.1, 'n_estimators': 100,
+                       'random_state': 42, 'verbosity': 0},
+    },
+}
+
+SPLIT_ARRAYS = ['X_train', 'X_test', 'y_train', 'y_test', 'X_train_scaled', 'X_test_scaled']
+
+
+def data_hash(df):
+    """Content hash of a DataFrame (values, index and column names)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _cache_key(*parts):
+    payload = json.dumps([EXPERIMENT_CACHE_VERSION] + list(parts), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def prepare_split(df, target_col, random_state, cache_dir, test_size=0.2):
     """
-    Compare all three approaches on the same data split.
+    Directory holding the stratified train/test split and its standardized
+    copy as .npy files, created once per (data hash, seed, test size).
     """
     from sklearn.model_selection import train_test_split
     
-    print("\n" + "=" * 80)
-    print("COMPREHENSIVE COMPARISON: ALL THREE APPROACHES")
-    print("=" * 80)
+    key = _cache_key('split', data_hash(df), target_col, random_state, test_size)
+    split_dir = os.path.join(cache_dir, 'splits', key)
+    if os.path.exists(os.path.join(split_dir, 'meta.json')):
+        return split_dir, True
     
-    # Prepare data
     X = df.drop(columns=[target_col])
     y = df[target_col]
-    
-    # Train-test split (stratified to preserve class balance)
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, stratify=y, random_state=random_state
+        X, y, test_size=test_size, stratify=y, random_state=random_state
     )
+    scaler = StandardScaler()
+    arrays = {
+        'X_train': X_train.to_numpy(dtype=np.float64),
+        'X_test': X_test.to_numpy(dtype=np.float64),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+        'X_train_scaled': scaler.fit_transform(X_train),
+        'X_test_scaled': scaler.transform(X_test),
+    }
+    
+    # Written to a temporary directory and renamed, so a split directory is always complete
+    os.makedirs(os.path.dirname(split_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='tmp_', dir=os.path.dirname(split_dir))
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({'columns': [str(c) for c in X.columns], 'random_state': random_state,
+                   'test_size': test_size, 'rows': len(df)}, f)
+    try:
+        os.rename(tmp_dir, split_dir)
+    except OSError:
+        # Another run created it first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return split_dir, False
+
+
+def _load_split(split_dir):
+    return {name: np.load(os.path.join(split_dir, f'{name}.npy'), mmap_mode='r') for name in SPLIT_ARRAYS}
+
+
+def run_approach(name, config, split_dir, cores=None):
+    """
+    Run one approach on a cached split; returns ({result label: AUC}, printed
+    output, seconds). Output is captured so concurrent approaches don't interleave.
+    cores caps the processes and threads the approach uses (default: all cores).
+    """
+    split = _load_split(split_dir)
+    X_train, X_test = np.asarray(split['X_train']), np.asarray(split['X_test'])
+    y_train, y_test = np.asarray(split['y_train']), np.asarray(split['y_test'])
+    
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log), threadpool_limits(limits=cores):
+        if name == 'stratified_cv':
+            model = MODEL_FACTORIES[config['model']](**config['params'])
+            cv_scores = stratified_cv_evaluation(X_train, y_train, model, cv_folds=config['cv_folds'],
+                                                 cores=cores)
+            results = {f"Stratified CV ({MODEL_LABELS[config['model']]})": float(np.mean(cv_scores))}
+        elif name == 'smote':
+            model = MODEL_FACTORIES[config['model']](**config['params'])
+            auc_smote, _ = smote_resampling(X_train, y_train, X_test, y_test, model, sampler=config['sampler'])
+            results = {f"SMOTE + {MODEL_LABELS[config['model']]}": float(auc_smote)}
+        elif name == 'class_weights':
+            scaled = (np.asarray(split['X_train_scaled']), np.asarray(split['X_test_scaled']))
+            auc_lr_cw, auc_xgb_cw = class_weight_adjustment(
+                X_train, y_train, X_test, y_test,
+                lr_params=config['lr_params'], xgb_params=config['xgb_params'], scaled=scaled)
+            results = {
+                'Class Weights (Logistic Regression)': float(auc_lr_cw),
+                'Class Weights (XGBoost)': float(auc_xgb_cw),
+            }
+        else:
+            raise ValueError(f'Unknown approach {name!r}')
+    return results, log.getvalue(), time.perf_counter() - start
+
+
+# Approach -> the functions it runs besides run_approach
+APPROACH_FUNCTIONS = {
+    'stratified_cv': [stratified_cv_evaluation, parallel_cv, _fit_fold],
+    'smote': [smote_resampling, chunked_smote, iter_smote_chunks],
+    'class_weights': [class_weight_adjustment],
+}
+
+
+def approach_source_hash(name):
+    """Hash of the source code an approach runs; editing it invalidates the approach's cached result"""
+    functions = [run_approach] + APPROACH_FUNCTIONS.get(name, [])
+    source = '\n'.join(inspect.getsource(function) for function in functions)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+def run_experiments(df, target_col='Default', random_state=42, approaches=None, cache_dir=EXPERIMENT_CACHE_DIR,
+                    max_workers=None, refresh=False):
+    """
+    Memoized experiment runner. Results are cached per (data hash, split seed,
+    approach, approach config, approach source code); only approaches without a cached result run,
+    concurrently in separate processes. Returns (split directory, {approach: cache record}).
+    """
+    approaches = APPROACHES if approaches is None else approaches
+    split_dir, split_cached = prepare_split(df, target_col, random_state, cache_dir)
+    split_key = os.path.basename(split_dir)
+    
+    records, pending = {}, {}
+    results_dir = os.path.join(cache_dir, 'results')
+    os.makedirs(results_dir, exist_ok=True)
+    for name, config in approaches.items():
+        path = os.path.join(results_dir, f"{_cache_key('result', split_key, name, config, approach_source_hash(name))}.json")
+        if not refresh and os.path.exists(path):
+            with open(path) as f:
+                records[name] = dict(json.load(f), cached=True)
+        else:
+            pending[name] = (config, path)
+    
+    print(f"\nSplit {'from cache' if split_cached else 'prepared'}: {split_dir}")
+    print(f"Approaches cached: {len(records)}, to run: {len(pending)}")
+    
+    if pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        # Concurrent approaches split the cores (the CV approach starts its own fold processes)
+        cores = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(run_approach, name, config, split_dir, cores)
+                       for name, (config, _) in pending.items()}
+            for name, future in futures.items():
+                results, log, seconds = future.result()
+                config, path = pending[name]
+                record = {'approach': name, 'config': config, 'results': results, 'log': log,
+                          'seconds': seconds}
+                with open(path + '.tmp', 'w') as f:
+                    json.dump(record, f, indent=2)
+                os.replace(path + '.tmp', path)
+                records[name] = dict(record, cached=False)
+    
+    return split_dir, {name: records[name] for name in approaches}
+
+
+def compare_all_approaches(df, target_col='Default', random_state=42, approaches=None,
+                           cache_dir=EXPERIMENT_CACHE_DIR, max_workers=None, refresh=False, verbose=True):
+    """
+    Compare all three approaches on the same data split.
+    Runs through run_experiments(): unchanged approaches come from the cache.
+    """
+    print("\n" + "=" * 80)
+    print("COMPREHENSIVE COMPARISON: ALL THREE APPROACHES")
+    print("=" * 80)
+    
+    split_dir, records = run_experiments(df, target_col, random_state, approaches, cache_dir, max_workers,
+                                         refresh)
     
+    split = _load_split(split_dir)
+    y_train, y_test = np.asarray(split['y_train']), np.asarray(split['y_test'])
     print(f"\nData Split:")
-    print(f"  Training set: {len(X_train)} samples")
-    print(f"  Test set: {len(X_test)} samples")
+    print(f"  Training set: {len(y_train)} samples")
+    print(f"  Test set: {len(y_test)} samples")
     print(f"  Train default rate: {y_train.mean()*100:.2f}%")
     print(f"  Test default rate: {y_test.mean()*100:.2f}%")
     
     results = {}
-    
-    # Approach 1: Stratified CV
-    cv_scores = stratified_cv_evaluation(X_train, y_train, 
-                                         LogisticRegression(max_iter=1000, random_state=42))
-    results['Stratified CV (Logistic Regression)'] = np.mean(cv_scores)
-    
-    # Approach 2: SMOTE
-    auc_smote, _ = smote_resampling(X_train, y_train, X_test, y_test,
-                                     LogisticRegression(max_iter=1000, random_state=42))
-    results['SMOTE + Logistic Regression'] = auc_smote
-    
-    # Approach 3: Class Weights
-    auc_lr_cw, auc_xgb_cw = class_weight_adjustment(X_train, y_train, X_test, y_test)
-    results['Class Weights (Logistic Regression)'] = auc_lr_cw
-    results['Class Weights (XGBoost)'] = auc_xgb_cw
+    for name, record in records.items():
+        if verbose and not record['cached']:
+            print(record['log'], end='')
+        results.update(record['results'])
     
     # Print comparison
     print("\n" + "=" * 80)
@@ -219,12 +534,17 @@ def compare_all_approaches(df, target_col='Default', random_state=42):
     print("=" * 80)
     for approach, auc in sorted(results.items(), key=lambda x: x[1], reverse=True):
         print(f"  {approach:.<50} {auc:.4f}")
+    for name, record in records.items():
+        source = 'cached' if record['cached'] else f"ran in {record['seconds']:.1f}s"
+        print(f"  [{name}: {source}]")
     
     print("\n RECOMMENDATION:")
     print("  ✓ Stratified CV: Use for cross-validation (maintains class ratio per fold)")
     print("  ✓ SMOTE: Use when you need to balance training data explicitly")
     print("  ✓ Class Weights: Use for efficiency (no resampling, built into model)")
     print("  → Best practice: Use STRATIFIED CV + CLASS WEIGHTS together")
+    
+    return results
 
 
 # =============================================================================
@@ -0,0 +1,152 @@
+/**
+ * Python Scorer
+ * Keeps one resident `scripts/predict.py --serve` process and pipelines
+ * JSON-lines scoring requests over its stdin/stdout
+ */
+
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process"
+import path from "path"
+
+/**
+ * The scorer rejected the request itself (not an object, invalid JSON):
+ * a client error rather than a scoring failure
+ */
+export class ScoringRequestError extends Error {
+    constructor(message: string) {
+        super(message)
+        this.name = "ScoringRequestError"
+    }
+}
+
+interface PendingRequest {
+    resolve: (value: any) => void
+    reject: (reason: Error) => void
+    timer: NodeJS.Timeout
+}
+
+class PythonScorer {
+    private process: ChildProcessWithoutNullStreams | null = null
+    private pending: Map<number, PendingRequest> = new Map()
+    private buffer: string = ""
+    private nextId: number = 1
+    private timeoutMs: number = 30 * 1000 // 30 seconds
+
+    /**
+     * Start the resident scoring process if it is not already running
+     */
+    private ensureProcess(): ChildProcessWithoutNullStreams {
+        if (this.process) {
+            return this.process
+        }
+
+        const scriptPath = path.join(process.cwd(), "scripts", "predict.py")
+        const child = spawn("python", [scriptPath, "--serve"])
+
+        child.stdout.on("data", (data) => this.onData(data.toString()))
+        child.stderr.on("data", (data) => {
+            console.error("Python scorer:", data.toString().trim())
+        })
+        child.on("close", (code) => {
+            console.error(`Python scorer exited with code ${code}`)
+            this.onExit(child, new Error(`Scoring process exited with code ${code}`))
+        })
+        // Spawn failures (python or predict.py missing) emit "error", not necessarily "close"
+        child.on("error", (error) => {
+            console.error("Python scorer failed:", error.message)
+            this.onExit(child, new Error(`Scoring process failed: ${error.message}`))
+        })
+        child.stdin.on("error", (error) => {
+            console.error("Python scorer stdin error:", error.message)
+        })
+
+        this.process = child
+        return child
+    }
+
+    /**
+     * Route complete response lines back to their pending requests
+     */
+    private onData(chunk: string): void {
+        this.buffer += chunk
+        let newline = this.buffer.indexOf("\n")
+
+        while (newline !== -1) {
+            const line = this.buffer.slice(0, newline).trim()
+            this.buffer = this.buffer.slice(newline + 1)
+            newline = this.buffer.indexOf("\n")
+
+            if (!line) {
+                continue
+            }
+
+            let response: any
+            try {
+                response = JSON.parse(line)
+            } catch (e) {
+                console.error("Failed to parse scorer response:", line)
+                continue
+            }
+
+            const request = this.pending.get(response.id)
+            if (!request) {
+                continue
+            }
+
+            this.pending.delete(response.id)
+            clearTimeout(request.timer)
+
+            if (response.error) {
+                request.reject(response.invalid_request
+                    ? new ScoringRequestError(response.error)
+                    : new Error(response.error))
+            } else {
+                request.resolve(response.result)
+            }
+        }
+    }
+
+    /**
+     * Forget a dead or hung process (the next request starts a new one) and fail its requests
+     */
+    private onExit(child: ChildProcessWithoutNullStreams, error: Error): void {
+        if (this.process !== child) {
+            return
+        }
+        this.process = null
+        this.buffer = ""
+        this.failAll(error)
+    }
+
+    private failAll(error: Error): void {
+        for (const request of this.pending.values()) {
+            clearTimeout(request.timer)
+            request.reject(error)
+        }
+        this.pending.clear()
+    }
+
+    /**
+     * Score one application through the resident process
+     */
+    score(data: unknown): Promise<any> {
+        const child = this.ensureProcess()
+        const id = this.nextId++
+
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id)
+                reject(new Error("Scoring request timed out"))
+                // Requests are answered in order, so the ones behind it are stuck too:
+                // replace the process instead of writing more requests to it
+                this.onExit(child, new Error("Scoring process restarted after a timed out request"))
+                child.kill()
+            }, this.timeoutMs)
+
+            this.pending.set(id, { resolve, reject, timer })
+            child.stdin.write(JSON.stringify({ id, data }) + "\n")
+        })
+    }
+}
+
+// Export singleton instance
+export const pythonScorer = new PythonScorer()
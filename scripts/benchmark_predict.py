@@ -0,0 +1,192 @@
+"""
+Scoring latency and throughput benchmark for scripts/predict.py.
+
+For every model in models/ it measures:
+  - cold start: a fresh interpreter importing predict.py and loading the artifacts
+  - warm single-row latency of predict() (p50/p95/p99)
+  - predict_batch() throughput in rows/s at several batch sizes
+
+Usage:
+    python scripts/benchmark_predict.py [--models-dir models] [--output models/predict_benchmark.json]
+    python scripts/benchmark_predict.py --compare old.json --output new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import predict
+from model_bundle import available_models
+from synthetic_applications import generate_applications
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Relative change that --compare reports as a regression
+REGRESSION_THRESHOLD = 0.10
+
+_COLD_START_CODE = '''
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {scripts_dir!r})
+import predict
+t1 = time.perf_counter()
+predict.load_artifacts({models_dir!r}, {model_name!r})
+t2 = time.perf_counter()
+print(json.dumps({{'import_s': t1 - t0, 'load_s': t2 - t1}}))
+'''
+
+
+def measure_cold_start(models_dir, model_name, runs):
+    """Median wall time of a fresh process importing predict.py and loading one model"""
+    code = _COLD_START_CODE.format(scripts_dir=SCRIPTS_DIR, models_dir=models_dir, model_name=model_name)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                             capture_output=True, text=True, check=True)
+        sample = json.loads(out.stdout.strip().splitlines()[-1])
+        sample['process_s'] = time.perf_counter() - start
+        samples.append(sample)
+    return {key: float(np.median([s[key] for s in samples])) for key in samples[0]}
+
+
+def measure_single_row(artifacts, applications, warmup):
+    """predict() latency percentiles in milliseconds"""
+    for data in applications[:warmup]:
+        predict.predict(data, artifacts)
+
+    latencies = np.empty(len(applications))
+    for i, data in enumerate(applications):
+        start = time.perf_counter()
+        predict.predict(data, artifacts)
+        latencies[i] = time.perf_counter() - start
+
+    latencies *= 1000
+    return {
+        'requests': len(applications),
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def measure_batch(artifacts, applications, batch_sizes, repeats):
+    """predict_batch() throughput per batch size (best of `repeats`)"""
+    results = {}
+    for size in batch_sizes:
+        batch = applications[:size]
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predict.predict_batch(batch, artifacts)
+            best = min(best, time.perf_counter() - start)
+        results[str(size)] = {'seconds': best, 'rows_per_s': size / best}
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=SCRIPTS_DIR)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(models_dir, model_names, requests, batch_sizes, cold_runs, repeats, seed):
+    applications = generate_applications(max([requests] + batch_sizes), seed=seed)
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'models_dir': os.path.abspath(models_dir),
+        'config': {
+            'requests': requests, 'batch_sizes': batch_sizes,
+            'cold_runs': cold_runs, 'repeats': repeats, 'seed': seed,
+        },
+        'models': {},
+    }
+
+    for name in model_names:
+        print(f'Benchmarking {name}...', file=sys.stderr)
+        artifacts = predict.load_artifacts(models_dir, name)
+        report['models'][name] = {
+            'source': artifacts['source'],
+            'model_type': type(artifacts['model']).__name__,
+            'cold_start': measure_cold_start(models_dir, name, cold_runs),
+            'single_row': measure_single_row(artifacts, applications[:requests], warmup=min(50, requests)),
+            'batch': measure_batch(artifacts, applications, batch_sizes, repeats),
+        }
+    return report
+
+
+def compare_reports(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """List human-readable regressions of current against baseline"""
+    regressions = []
+    for name, cur in current['models'].items():
+        base = baseline.get('models', {}).get(name)
+        if base is None:
+            continue
+        checks = [
+            ('cold_start.process_s', base['cold_start']['process_s'], cur['cold_start']['process_s'], True),
+            ('single_row.p50_ms', base['single_row']['p50_ms'], cur['single_row']['p50_ms'], True),
+            ('single_row.p99_ms', base['single_row']['p99_ms'], cur['single_row']['p99_ms'], True),
+        ]
+        for size, stats in cur['batch'].items():
+            if size in base['batch']:
+                checks.append((f'batch[{size}].rows_per_s', base['batch'][size]['rows_per_s'],
+                               stats['rows_per_s'], False))
+        for metric, old, new, lower_is_better in checks:
+            change = (new - old) / old if old else 0.0
+            if (change if lower_is_better else -change) > threshold:
+                regressions.append(f'{name} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scoring latency and throughput')
+    parser.add_argument('--models-dir', default=os.path.join(predict.project_root, 'models'))
+    parser.add_argument('--models', nargs='+', help='Model names (default: every model in models dir)')
+    parser.add_argument('--requests', type=int, default=1000, help='Single-row requests per model')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--cold-runs', type=int, default=3)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join('models', 'predict_benchmark.json'))
+    parser.add_argument('--compare', help='Earlier benchmark JSON to check for regressions')
+    args = parser.parse_args()
+
+    model_names = args.models or available_models(args.models_dir)
+    report = run_benchmark(args.models_dir, model_names, args.requests, args.batch_sizes,
+                           args.cold_runs, args.repeats, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Benchmark results saved: {args.output}')
+
+    for name, stats in report['models'].items():
+        single = stats['single_row']
+        largest = stats['batch'][str(max(args.batch_sizes))]
+        print(f"  {name:<20} cold {stats['cold_start']['process_s']:.2f}s  "
+              f"p50 {single['p50_ms']:.2f}ms  p99 {single['p99_ms']:.2f}ms  "
+              f"batch {largest['rows_per_s']:,.0f} rows/s")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report)
+        for line in regressions:
+            print(f'  REGRESSION {line}')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
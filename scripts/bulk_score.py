@@ -0,0 +1,262 @@
+"""
+Streaming bulk scoring for large application files.
+
+Reads a CSV or Parquet file in fixed-size chunks, scores every chunk with
+predict.predict_batch in a process pool and writes one part file per chunk
+into an output directory:
+
+    <output>/part-00000.parquet      (or .csv) scored rows of chunk 0
+    <output>/part-00001.parquet
+    ...
+    <output>/_job.json               input, chunk size and model of the run
+    <output>/_SUCCESS                written once every chunk is done
+
+Input columns are either the request fields of /api/ml/predict (camelCase)
+or the training columns of Datasets/Loan_default.csv. Part files are
+renamed into place only when complete, so after a crash the same command
+skips the chunks that already have a part file and scores the rest. The job
+records the model version (models/manifest.json); a resume after the model
+set changed is refused, so every part file comes from the same model. Memory
+stays bounded: at most two chunks per worker are in flight.
+
+Parquet input/output needs pyarrow.
+
+Usage:
+    python scripts/bulk_score.py Datasets/Loan_default.csv scored/ --chunk-size 100000 --workers 8
+    python scripts/bulk_score.py applications.parquet scored/ --format parquet --id-column LoanID
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import predict
+from model_bundle import read_manifest
+
+JOB_FILENAME = '_job.json'
+SUCCESS_FILENAME = '_SUCCESS'
+RESULT_COLUMNS = [
+    'riskScore', 'affordabilityIndex', 'defaultProbability', 'fraudProbability',
+    'decision', 'confidence', 'reasons', 'error',
+]
+
+# Set in each pool worker by _init_worker()
+_worker_artifacts = None
+
+
+def _require_pyarrow(what):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        sys.exit(f'{what} needs pyarrow (pip install pyarrow)')
+
+
+def read_chunks(path, chunk_size, skip_chunks=0):
+    """Yield (chunk_index, DataFrame) for path, starting at chunk skip_chunks"""
+    if path.endswith('.parquet'):
+        _require_pyarrow('Parquet input')
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+        for index, batch in enumerate(batches):
+            if index >= skip_chunks:
+                yield index, batch.to_pandas()
+        return
+
+    if skip_chunks:
+        # An integer skiprows skips the header and finished lines without
+        # parsing them (a range would be checked line by line)
+        columns = pd.read_csv(path, nrows=0).columns
+        reader = pd.read_csv(path, chunksize=chunk_size, skiprows=skip_chunks * chunk_size + 1,
+                             header=None, names=columns)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    for index, chunk in enumerate(reader, start=skip_chunks):
+        yield index, chunk
+
+
+def count_chunks(path, chunk_size):
+    """Number of chunks when cheaply known (Parquet metadata), else None"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return -(-pq.ParquetFile(path).metadata.num_rows // chunk_size)
+    return None
+
+
+def to_applications(chunk):
+    """Request-shaped columns from either request-field or training-column input"""
+    if all(field in chunk.columns for field in predict.FIELD_COLUMNS):
+        return chunk[list(predict.FIELD_COLUMNS)]
+    return predict.applications_from_dataset(chunk)
+
+
+def part_path(output_dir, index, fmt):
+    return os.path.join(output_dir, f'part-{index:05d}.{fmt}')
+
+
+def model_version(models_dir):
+    """Version of the model set in models_dir (None without a manifest)"""
+    manifest = read_manifest(models_dir)
+    return manifest['model_version'] if manifest else None
+
+
+def _init_worker(models_dir, model_name, cascade_margin, expected_version):
+    global _worker_artifacts
+    _worker_artifacts = predict.load_artifacts(models_dir, model_name, cascade_margin)
+    # The model set may have been replaced since the job started
+    if model_version(models_dir) != expected_version:
+        raise RuntimeError(f'{models_dir} changed to model version {model_version(models_dir)} '
+                           f'during the job (started with {expected_version})')
+
+
+def score_chunk(index, chunk, first_row, output_dir, fmt, id_column):
+    """Score one chunk and write its part file; returns (index, rows, errors)"""
+    results = predict.predict_batch(to_applications(chunk), _worker_artifacts)
+
+    scored = pd.DataFrame({'row': np.arange(first_row, first_row + len(chunk))})
+    if id_column:
+        scored[id_column] = chunk[id_column].to_numpy()
+    for column in RESULT_COLUMNS:
+        values = [r.get(column) for r in results]
+        if column == 'reasons':
+            values = [json.dumps(v) if v is not None else None for v in values]
+        scored[column] = values
+
+    path = part_path(output_dir, index, fmt)
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        scored.to_parquet(tmp_path, index=False)
+    else:
+        scored.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return index, len(chunk), int(scored['error'].notna().sum())
+
+
+def _job_description(args, models_dir):
+    stat = os.stat(args.input)
+    return {
+        'input': os.path.abspath(args.input),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'chunk_size': args.chunk_size,
+        'format': args.format,
+        'id_column': args.id_column,
+        'models_dir': os.path.abspath(models_dir),
+        'model_version': model_version(models_dir),
+        'model': args.model,
+        'cascade_margin': args.cascade_margin if args.cascade else None,
+    }
+
+
+def _prepare_output(args, job):
+    """Create or validate the output directory; returns the indices of finished chunks"""
+    os.makedirs(args.output, exist_ok=True)
+    job_path = os.path.join(args.output, JOB_FILENAME)
+    if os.path.exists(job_path):
+        with open(job_path) as f:
+            previous = json.load(f)
+        if previous != job:
+            changed = sorted(key for key in job if previous.get(key) != job[key])
+            sys.exit(f'{args.output} holds a different bulk job (changed: {", ".join(changed)}); '
+                     'use a new output directory')
+    else:
+        with open(job_path, 'w') as f:
+            json.dump(job, f, indent=2)
+
+    done = set()
+    suffix = f'.{args.format}'
+    for name in os.listdir(args.output):
+        if name.startswith('part-') and name.endswith(suffix):
+            done.add(int(name[len('part-'):-len(suffix)]))
+    return done
+
+
+def _report(rows, errors, chunks, finished_before, total_chunks, started):
+    elapsed = time.time() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    line = f'{chunks} chunks, {rows:,} rows ({errors:,} errors), {rate:,.0f} rows/s'
+    if total_chunks:
+        finished = finished_before + chunks
+        line += f', {finished}/{total_chunks} chunks done'
+        if chunks:
+            line += f', ETA {elapsed / chunks * (total_chunks - finished):.0f}s'
+    print(line, file=sys.stderr, flush=True)
+
+
+def run(args):
+    models_dir = args.models_dir or os.path.join(predict.project_root, 'models')
+    if args.format == 'parquet':
+        _require_pyarrow('Parquet output')
+
+    job = _job_description(args, models_dir)
+    done = _prepare_output(args, job)
+    if os.path.exists(os.path.join(args.output, SUCCESS_FILENAME)):
+        print(f'{args.output} is already complete', file=sys.stderr)
+        return
+
+    # Chunks before the first missing part are skipped without being parsed
+    skip = 0
+    while skip in done:
+        skip += 1
+    if done:
+        print(f'Resuming: {len(done)} chunk(s) already scored', file=sys.stderr, flush=True)
+
+    total_chunks = count_chunks(args.input, args.chunk_size)
+    cascade_margin = args.cascade_margin if args.cascade else None
+    started = time.time()
+    rows = errors = chunks = 0
+    pending = set()
+    max_pending = 2 * args.workers
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(models_dir, args.model, cascade_margin, job['model_version'])) as pool:
+        def collect(block):
+            nonlocal pending, rows, errors, chunks
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED if block else ALL_COMPLETED)
+            for future in finished:
+                _, n_rows, n_errors = future.result()
+                rows += n_rows
+                errors += n_errors
+                chunks += 1
+                _report(rows, errors, chunks, len(done), total_chunks, started)
+
+        for index, chunk in read_chunks(args.input, args.chunk_size, skip):
+            if index in done:
+                continue
+            pending.add(pool.submit(score_chunk, index, chunk, index * args.chunk_size,
+                                    args.output, args.format, args.id_column))
+            if len(pending) >= max_pending:
+                collect(block=True)
+        collect(block=False)
+
+    summary = {'chunks': len(done) + chunks, 'rows_this_run': rows, 'errors_this_run': errors,
+               'seconds_this_run': round(time.time() - started, 3)}
+    with open(os.path.join(args.output, SUCCESS_FILENAME), 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f'Bulk scoring complete: {args.output} ({summary["chunks"]} part files)', file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Score a large CSV/Parquet file of applications')
+    parser.add_argument('input', help='CSV or .parquet file')
+    parser.add_argument('output', help='Output directory for part files')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--id-column', help='Input column copied to the output next to each score')
+    parser.add_argument('--models-dir', default=None)
+    parser.add_argument('--model', default=None, help='Model name (default: bundle default model)')
+    parser.add_argument('--cascade', action='store_true',
+                        help='Screen with logistic regression, escalate rows near a threshold to the main model')
+    parser.add_argument('--cascade-margin', type=float, default=predict.DEFAULT_CASCADE_MARGIN)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
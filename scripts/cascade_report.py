@@ -0,0 +1,152 @@
+"""
+Offline evaluation of cascade scoring (predict.py --cascade).
+
+Scores the held-out split of Datasets/Loan_default.csv (the same split
+train_models.py evaluates on) with the main model alone and with the
+logistic-regression cascade at several margins, and reports per margin:
+  - escalation rate (share of applications the main model still scores)
+  - decision agreement with main-model-only scoring
+  - ROC-AUC of the returned default probability
+  - model compute saved (predict_proba stage time) and end-to-end speedup
+
+Usage:
+    python scripts/cascade_report.py [--models-dir models] [--output models/cascade_report.json]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+import predict
+from dataset import read_loan_csv
+from scoring_metrics import StageTimer
+
+DEFAULT_MARGINS = [0.02, 0.05, 0.1, 0.15, 0.2, 0.3]
+# Smallest margin reaching this decision agreement is recommended
+TARGET_AGREEMENT = 0.995
+
+
+def holdout_split(df):
+    """The test rows of train_models.py's train/test split"""
+    _, test = train_test_split(df, test_size=0.3, random_state=42, stratify=df['Default'])
+    return test
+
+
+def _score(applications, artifacts, repeats):
+    """Results of the fastest of `repeats` runs, with that run's stage timings"""
+    best = None
+    for _ in range(repeats):
+        timer = StageTimer()
+        start = time.perf_counter()
+        results = predict.predict_batch(applications, artifacts, timer)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (results, elapsed, timer.seconds['predict_proba'])
+    return best
+
+
+def _columns(results):
+    probability = np.array([r.get('defaultProbability', np.nan) for r in results])
+    decision = np.array([r.get('decision') for r in results])
+    return probability, decision
+
+
+def run_report(models_dir, data_path, margins, repeats):
+    df = holdout_split(read_loan_csv(data_path))
+    applications = predict.applications_from_dataset(df)
+    y = df['Default'].to_numpy()
+
+    full = predict.load_artifacts(models_dir)
+    cascaded = predict.load_artifacts(models_dir, full['model_name'], cascade_margin=margins[0])
+    if cascaded['cascade'] is None:
+        raise SystemExit(f"Main model is {full['model_name']}; there is nothing to cascade to")
+
+    results, full_seconds, full_model_seconds = _score(applications, full, repeats)
+    full_probability, full_decision = _columns(results)
+    scored = ~np.isnan(full_probability)
+
+    # Screening probabilities and risk scores decide which rows escalate
+    screen = dict(full, model=cascaded['cascade']['model'], model_name=cascaded['cascade']['model_name'],
+                  input=cascaded['cascade']['input'], scaler=cascaded['cascade']['scaler'],
+                  scaler_key=cascaded['cascade']['scaler_key'], explainer=cascaded['cascade']['explainer'])
+    screen_results, screen_seconds, screen_model_seconds = _score(applications, screen, repeats)
+    screen_probability, screen_decision = _columns(screen_results)
+    risk_score = np.array([r.get('riskScore', np.nan) for r in screen_results])
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'models_dir': os.path.abspath(models_dir),
+        'holdout_rows': int(scored.sum()),
+        'main_model': full['model_name'],
+        'screen_model': cascaded['cascade']['model_name'],
+        'thresholds': full['thresholds'],
+        'main_only': {
+            'roc_auc': float(roc_auc_score(y[scored], full_probability[scored])),
+            'seconds': full_seconds,
+            'model_seconds': full_model_seconds,
+        },
+        'screen_only': {
+            'decision_agreement': float(np.mean(screen_decision[scored] == full_decision[scored])),
+            'roc_auc': float(roc_auc_score(y[scored], screen_probability[scored])),
+            'seconds': screen_seconds,
+            'model_seconds': screen_model_seconds,
+        },
+        'margins': {},
+    }
+
+    for margin in margins:
+        artifacts = dict(cascaded, cascade=dict(cascaded['cascade'], margin=margin))
+        results, seconds, model_seconds = _score(applications, artifacts, repeats)
+        probability, decision = _columns(results)
+        escalated = predict.cascade_escalations(screen_probability[scored], risk_score[scored],
+                                                full['thresholds'], margin)
+        report['margins'][str(margin)] = {
+            'escalation_rate': float(escalated.mean()),
+            'decision_agreement': float(np.mean(decision[scored] == full_decision[scored])),
+            'roc_auc': float(roc_auc_score(y[scored], probability[scored])),
+            'seconds': seconds,
+            'model_seconds': model_seconds,
+            'model_compute_saved': 1 - model_seconds / full_model_seconds,
+            'speedup': full_seconds / seconds,
+        }
+
+    agreeing = [m for m in margins if report['margins'][str(m)]['decision_agreement'] >= TARGET_AGREEMENT]
+    report['recommended_margin'] = min(agreeing) if agreeing else None
+    report['target_agreement'] = TARGET_AGREEMENT
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate cascade scoring on the held-out split')
+    parser.add_argument('--models-dir', default=os.path.join(predict.project_root, 'models'))
+    parser.add_argument('--data', default=os.path.join(predict.project_root, 'Datasets', 'Loan_default.csv'))
+    parser.add_argument('--margins', type=float, nargs='+', default=DEFAULT_MARGINS)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join('models', 'cascade_report.json'))
+    args = parser.parse_args()
+
+    report = run_report(args.models_dir, args.data, sorted(args.margins), args.repeats)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Cascade report saved: {args.output}')
+
+    main_only = report['main_only']
+    print(f"  {report['main_model']:<20} AUC {main_only['roc_auc']:.4f}  "
+          f"model {main_only['model_seconds'] * 1000:.1f}ms  total {main_only['seconds'] * 1000:.1f}ms")
+    print(f"  {report['screen_model']:<20} AUC {report['screen_only']['roc_auc']:.4f}  "
+          f"agreement {report['screen_only']['decision_agreement']:.2%}")
+    for margin, stats in report['margins'].items():
+        print(f"  margin {margin:<13} escalated {stats['escalation_rate']:6.1%}  "
+              f"agreement {stats['decision_agreement']:.2%}  AUC {stats['roc_auc']:.4f}  "
+              f"model compute saved {stats['model_compute_saved']:.0%}  speedup {stats['speedup']:.2f}x")
+    print(f"  Recommended margin (agreement >= {TARGET_AGREEMENT:.1%}): {report['recommended_margin']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Typed ingestion of Datasets/Loan_default.csv and a Parquet feature store.
+
+read_loan_csv() parses the CSV with explicit compact dtypes (categoricals,
+small integers) instead of letting pandas guess; the two fractional columns
+stay float64 so engineered features match the scoring path bit for bit.
+Integer columns are narrowed only when every value is integral (exported
+outcome files hold Prisma Float columns such as income), else stay float64. load_feature_table()
+returns the engineered model matrix and target, computed once per source
+file and feature-code version and cached under .cache/features/:
+
+    .cache/features/<sha256 prefix>-v<FEATURE_VERSION>/features.parquet
+    .cache/features/<sha256 prefix>-v<FEATURE_VERSION>/meta.json
+
+A changed CSV (different content hash) or a FEATURE_VERSION bump selects a
+new cache entry. The cache needs pyarrow (in requirements.txt); without it
+the features are recomputed on every run.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, FEATURE_VERSION, build_features, fit_categories
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'features')
+TARGET_COLUMN = 'Default'
+
+# Loan_default.csv column -> compact dtype
+DATASET_DTYPES = {
+    'LoanID': 'str',
+    'Age': 'int16',
+    'Income': 'int32',
+    'LoanAmount': 'int32',
+    'CreditScore': 'int16',
+    'MonthsEmployed': 'int16',
+    'NumCreditLines': 'int16',
+    'InterestRate': 'float64',
+    'LoanTerm': 'int16',
+    'DTIRatio': 'float64',
+    'Education': 'category',
+    'EmploymentType': 'category',
+    'MaritalStatus': 'category',
+    'HasMortgage': 'category',
+    'HasDependents': 'category',
+    'LoanPurpose': 'category',
+    'HasCoSigner': 'category',
+    'Default': 'int8',
+}
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_loan_csv(path):
+    """Loan_default.csv with explicit compact dtypes"""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {column: dtype for column, dtype in DATASET_DTYPES.items() if column in header}
+    integers = {column: dtype for column, dtype in dtypes.items() if dtype.startswith('int')}
+    df = pd.read_csv(path, dtype=dict(dtypes, **{column: 'float64' for column in integers}))
+    for column, dtype in integers.items():
+        values = df[column].to_numpy()
+        limits = np.iinfo(dtype)
+        if values.size == 0 or (np.isfinite(values).all() and (values == np.round(values)).all()
+                                and values.min() >= limits.min and values.max() <= limits.max):
+            df[column] = values.astype(dtype)
+    return df
+
+
+def _have_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _engineer(df):
+    """(X, y, categories) from the typed dataset, dropping non-computable rows"""
+    categories = {column: fit_categories(df[column]) for column in CATEGORICAL_COLUMNS}
+    features, computable = build_features(df, categories)
+    if not computable.all():
+        print(f'Dropping {int((~computable).sum())} rows with non-finite features', file=sys.stderr)
+    # float64 like the scoring path, so a cached matrix matches what predict.py computes
+    X = pd.DataFrame(features[computable], columns=FEATURE_COLUMNS)
+    y = pd.Series(df[TARGET_COLUMN].to_numpy()[computable], name=TARGET_COLUMN)
+    return X, y, categories
+
+
+def load_feature_table(path, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    """
+    Engineered features for the dataset at path: (X, y, categories, meta).
+    X holds FEATURE_COLUMNS as float64, categories maps each categorical
+    column to its sorted class list (what the label encoders learn).
+    """
+    start = time.perf_counter()
+    source_hash = file_sha256(path)
+    entry = os.path.join(cache_dir, f'{source_hash[:16]}-v{FEATURE_VERSION}')
+    table_path = os.path.join(entry, 'features.parquet')
+    meta_path = os.path.join(entry, 'meta.json')
+    use_cache = _have_pyarrow()
+    if not use_cache:
+        print('pyarrow not installed: feature cache disabled', file=sys.stderr)
+
+    if use_cache and not refresh and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['source_sha256'] == source_hash and meta['feature_version'] == FEATURE_VERSION:
+            table = pd.read_parquet(table_path)
+            X = table[FEATURE_COLUMNS]
+            y = table[TARGET_COLUMN]
+            print(f'Feature cache hit: {entry} ({len(X)} rows, {time.perf_counter() - start:.2f}s)',
+                  file=sys.stderr)
+            return X, y, meta['categories'], dict(meta, cache='hit')
+
+    df = read_loan_csv(path)
+    X, y, categories = _engineer(df)
+    meta = {
+        'source': os.path.abspath(path),
+        'source_sha256': source_hash,
+        'feature_version': FEATURE_VERSION,
+        'rows': len(X),
+        'dropped_rows': len(df) - len(X),
+        'categories': categories,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+    if use_cache:
+        os.makedirs(entry, exist_ok=True)
+        table = X.copy()
+        table[TARGET_COLUMN] = y.to_numpy()
+        tmp_path = table_path + '.tmp'
+        table.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, table_path)
+        # meta.json marks the entry complete, so it is written last
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+        print(f'Feature cache written: {entry}', file=sys.stderr)
+    return X, y, categories, dict(meta, cache='miss')
+
+
+if __name__ == '__main__':
+    # Warm (or refresh) the cache: python scripts/dataset.py [csv] [--refresh]
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    csv_path = args[0] if args else os.path.join('Datasets', 'Loan_default.csv')
+    X, y, categories, meta = load_feature_table(csv_path, refresh='--refresh' in sys.argv)
+    print(f"{meta['rows']} rows x {X.shape[1]} features, "
+          f"{X.memory_usage(deep=True).sum() / 2**20:.1f} MB, cache {meta['cache']}")
@@ -0,0 +1,130 @@
+"""
+Feature engineering shared by training and every scoring path.
+
+train_models.py, predict.py (and through it the servers, bulk scoring and
+reports) build the model input with build_features(), so the model sees the
+same features at training and at scoring time. Everything works on whole
+columns keyed by the training column names of Datasets/Loan_default.csv;
+there is no per-row Python on the common paths.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever a formula, flag mapping or encoding changes: cached feature
+# matrices and trained models are only valid for the version they were built with
+FEATURE_VERSION = 1
+
+NUMERIC_COLUMNS = [
+    'Age', 'Income', 'LoanAmount', 'LoanTerm', 'InterestRate',
+    'CreditScore', 'DTIRatio', 'NumCreditLines', 'MonthsEmployed',
+]
+BINARY_COLUMNS = ['HasMortgage', 'HasDependents', 'HasCoSigner']
+CATEGORICAL_COLUMNS = ['Education', 'EmploymentType', 'MaritalStatus', 'LoanPurpose']
+
+# Model input order (the scaler and every model are fitted on it)
+FEATURE_COLUMNS = (
+    NUMERIC_COLUMNS + BINARY_COLUMNS +
+    [f'{column}_Encoded' for column in CATEGORICAL_COLUMNS] +
+    ['RiskScore', 'AffordabilityIndex']
+)
+
+# Yes/No in the dataset; booleans, 0/1 or true/false strings in API requests
+_FLAG_STRINGS = {'yes': 1.0, 'no': 0.0, 'true': 1.0, 'false': 0.0, '1': 1.0, '0': 0.0, '': 0.0}
+
+
+def to_float(values):
+    """Numeric column as float64; values that are not numbers become NaN"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def flag_value(value):
+    """0.0/1.0 for one Yes/No, boolean or 0/1 value (other values by truthiness)"""
+    if isinstance(value, str):
+        return _FLAG_STRINGS.get(value.strip().lower(), 1.0)
+    return 1.0 if value else 0.0
+
+
+def binary_flags(values):
+    """Column of Yes/No strings, booleans or 0/1 numbers as 0.0/1.0"""
+    values = np.asarray(values)
+    if values.dtype == object:
+        # Uniform Python lists (all bools, all strings...) get a native dtype
+        values = np.array(values.tolist())
+    if values.dtype.kind in 'biuf':
+        return (np.nan_to_num(values.astype(np.float64)) != 0).astype(np.float64)
+    if values.dtype.kind == 'U':
+        lowered = np.char.lower(np.char.strip(values))
+        flags = np.ones(len(lowered))
+        for text, flag in _FLAG_STRINGS.items():
+            if flag == 0.0:
+                flags[lowered == text] = 0.0
+        return flags
+    return np.array([flag_value(v) for v in values], dtype=np.float64)
+
+
+def fit_categories(values):
+    """Sorted category list for a column (the classes_ LabelEncoder would learn)"""
+    return [str(c) for c in np.unique(np.asarray(values).astype(str))]
+
+
+def encode_categories(classes, values):
+    """LabelEncoder.transform for sorted classes; unknown or missing categories map to 0"""
+    classes = np.asarray(classes, dtype=str)
+    values = np.char.strip(np.asarray(values).astype(str))
+    index = np.minimum(np.searchsorted(classes, values), len(classes) - 1)
+    return np.where(classes[index] == values, index, 0).astype(np.float64)
+
+
+def risk_score(dti_ratio, loan_amount, income, credit_score, interest_rate, months_employed):
+    """RiskScore before clipping to [0, 1000] (non-finite for zero income)"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return (
+            (dti_ratio * 300) +
+            (loan_amount / income * 250) +
+            ((850 - credit_score) / 850 * 200) +
+            (interest_rate * 10 * 150) +
+            (1 / (months_employed + 1) * 100)
+        )
+
+
+def monthly_payment(loan_amount, interest_rate, loan_term):
+    """Annuity payment at interest_rate / 12 per month; a zero rate repays loan_amount / loan_term"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        monthly_rate = interest_rate / 12
+        annuity = loan_amount * monthly_rate / (1 - (1 + monthly_rate) ** (-loan_term))
+        return np.where(monthly_rate == 0, loan_amount / loan_term, annuity)
+
+
+def affordability_index(income, dti_ratio, loan_amount, interest_rate, loan_term):
+    """AffordabilityIndex before clipping to [0, 10] (non-finite for a zero loan term)"""
+    payment = monthly_payment(loan_amount, interest_rate, loan_term)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return (income * (1 - dti_ratio)) / (payment * loan_term) * 10
+
+
+def build_features(columns, categories):
+    """
+    Model input matrix in FEATURE_COLUMNS order from raw columns.
+    columns maps every NUMERIC/BINARY/CATEGORICAL column name to its raw
+    values (a DataFrame works); categories maps each categorical column to
+    its class list. Returns (X, computable) where computable is False for
+    rows whose values or engineered features are not finite.
+    """
+    num = {column: to_float(columns[column]) for column in NUMERIC_COLUMNS}
+    risk = risk_score(num['DTIRatio'], num['LoanAmount'], num['Income'], num['CreditScore'],
+                      num['InterestRate'], num['MonthsEmployed'])
+    affordability = affordability_index(num['Income'], num['DTIRatio'], num['LoanAmount'],
+                                        num['InterestRate'], num['LoanTerm'])
+
+    X = np.column_stack(
+        [num[column] for column in NUMERIC_COLUMNS] +
+        [binary_flags(columns[column]) for column in BINARY_COLUMNS] +
+        [encode_categories(categories[column], columns[column]) for column in CATEGORICAL_COLUMNS] +
+        [np.clip(risk, 0, 1000), np.clip(affordability, 0, 10)]
+    )
+    computable = np.isfinite(X).all(axis=1) & np.isfinite(risk) & np.isfinite(affordability)
+    return X, computable
@@ -0,0 +1,309 @@
+"""
+Budgeted hyperparameter search for the train_models.py model families.
+
+Successive halving: every family starts with --configs random configurations
+from its search space, evaluated on a small stratified row subsample of the
+training split. After each rung only the best 1/--eta of each family's
+configurations (by validation ROC-AUC) go on, with --eta times more rows,
+until the survivors are fitted on all training rows. The trials of a rung
+run in parallel, one core each.
+
+The test split of train_models.py is never used: trials are scored on a
+validation split carved out of its training rows. Completed trials are
+cached under .cache/search/ (keyed by dataset hash, feature version, family,
+parameters, rows and seed), so an interrupted search resumes where it
+stopped and a repeated one is free.
+
+The winning configuration per family, its cost (fit seconds, inference
+throughput) and the cost/quality trade-off of the full-budget trials are
+written to models/hyperparameter_search.json, which train_models.py
+applies with --search-results.
+
+Usage (from the project root):
+    python scripts/hyperparameter_search.py [--configs 12] [--eta 3] [--min-rows 2000] [--workers 8]
+    python scripts/train_models.py --search-results models/hyperparameter_search.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from dataset import DEFAULT_CACHE_DIR, load_feature_table
+from features import FEATURE_VERSION
+from train_models import build_models
+
+RESULTS_FILENAME = 'hyperparameter_search.json'
+TRIAL_CACHE_DIR = os.path.join('.cache', 'search')
+
+# Candidate values per parameter; unlisted parameters keep their build_models() value
+SEARCH_SPACES = {
+    'logistic_regression': {
+        'C': [0.001, 0.01, 0.1, 0.3, 1.0, 3.0, 10.0, 100.0],
+    },
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [6, 10, 15, 20, None],
+        'min_samples_leaf': [1, 5, 20, 50],
+        'max_features': ['sqrt', 0.5],
+    },
+    'gradient_boosting': {
+        'n_estimators': [50, 100, 200, 300],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 4, 5],
+        'subsample': [0.7, 0.85, 1.0],
+    },
+    'xgboost': {
+        'n_estimators': [100, 200, 400],
+        'learning_rate': [0.02, 0.05, 0.1, 0.2],
+        'max_depth': [3, 4, 6, 8, 10],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 5, 10],
+    },
+}
+
+# Set in each pool worker by _init_worker()
+_worker_data = None
+
+
+def sample_configs(space, count, rng):
+    """Up to `count` distinct random configurations from a search space"""
+    size = math.prod(len(values) for values in space.values())
+    configs, seen = [], set()
+    while len(configs) < min(count, size):
+        config = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def rung_budgets(min_rows, eta, total_rows):
+    """Row budgets of the successive-halving rungs, the last one being all rows"""
+    budgets = []
+    rows = min_rows
+    while rows < total_rows:
+        budgets.append(rows)
+        rows *= eta
+    return budgets + [total_rows]
+
+
+def trial_key(data_key, family, params, rows, seed):
+    payload = json.dumps([data_key, family, params, rows, seed], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def run_trial(family, params, rows, seed):
+    """Fit one configuration on the first `rows` rows of the (shuffled) search split"""
+    X_train, y_train, X_val, y_val = _worker_data
+    model = clone(build_models()[family]).set_params(**params)
+    if 'random_state' in model.get_params():
+        model.set_params(random_state=seed)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+
+    with threadpool_limits(limits=1):
+        start = time.perf_counter()
+        model.fit(X_train[:rows], y_train[:rows])
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        proba = model.predict_proba(X_val)[:, 1]
+        predict_seconds = time.perf_counter() - start
+
+    return {
+        'family': family,
+        'params': params,
+        'rows': rows,
+        'roc_auc': roc_auc_score(y_val, proba),
+        'fit_seconds': fit_seconds,
+        'predict_rows_per_s': len(X_val) / predict_seconds,
+    }
+
+
+def _load_trial(cache_dir, key):
+    path = os.path.join(cache_dir, f'{key}.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def _save_trial(cache_dir, key, trial):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f'{key}.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(trial, f)
+    os.replace(path + '.tmp', path)
+
+
+def search_split(X, y, seed):
+    """
+    Training rows of train_models.py's split, divided into search-train and
+    validation rows. Search-train rows are shuffled stratum by stratum so that
+    every prefix is a stratified subsample.
+    """
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=seed,
+                                                  stratify=y_train)
+    # Interleave the classes in proportion: row i of each class gets rank i / class size
+    rng = np.random.default_rng(seed)
+    y_fit = np.asarray(y_fit)
+    rank = np.empty(len(y_fit))
+    for label in np.unique(y_fit):
+        members = np.flatnonzero(y_fit == label)
+        rank[rng.permutation(members)] = np.arange(len(members)) / len(members)
+    order = np.argsort(rank, kind='stable')
+
+    scaler = StandardScaler().fit(X_fit)
+    return (scaler.transform(X_fit)[order], y_fit[order], scaler.transform(X_val), np.asarray(y_val))
+
+
+def successive_halving(data, data_key, families, configs, eta, min_rows, workers, seed, cache_dir):
+    """Run the search; returns every trial record (cached ones included)"""
+    rng = np.random.default_rng(seed)
+    alive = {family: sample_configs(SEARCH_SPACES[family], configs, rng) for family in families}
+    budgets = rung_budgets(min_rows, eta, len(data[0]))
+    trials = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        for rung, rows in enumerate(budgets):
+            pending, slots = {}, []
+            for family, family_configs in alive.items():
+                for params in family_configs:
+                    key = trial_key(data_key, family, params, rows, seed)
+                    cached = _load_trial(cache_dir, key)
+                    if cached is not None:
+                        slots.append(dict(cached, cached=True))
+                    else:
+                        pending[pool.submit(run_trial, family, params, rows, seed)] = (len(slots), key)
+                        slots.append(None)
+            # Every finished trial is saved at once, so a failure or an interrupt loses none of them
+            failed = None
+            for future in as_completed(pending):
+                slot, key = pending[future]
+                try:
+                    trial = future.result()
+                except Exception as e:
+                    failed = failed or e
+                    continue
+                _save_trial(cache_dir, key, trial)
+                slots[slot] = dict(trial, cached=False)
+            if failed is not None:
+                raise failed
+            # Submission order, whatever order the trials finished in
+            results = slots
+
+            fitted = sum(1 for trial in results if not trial['cached'])
+            print(f'Rung {rung}: {rows} rows, {len(results)} trials ({len(results) - fitted} cached)')
+            for trial in results:
+                trial['rung'] = rung
+            trials.extend(results)
+
+            # Best 1/eta of each family survive to the next rung
+            for family in alive:
+                ranked = sorted((t for t in results if t['family'] == family), key=lambda t: -t['roc_auc'])
+                keep = max(1, math.ceil(len(ranked) / eta))
+                alive[family] = [t['params'] for t in ranked[:keep]]
+                best = ranked[0]
+                print(f"  {family:<20} best AUC {best['roc_auc']:.4f}  {best['params']}")
+    return trials
+
+
+def pareto_front(trials):
+    """Trials not beaten by a faster-fitting trial with higher ROC-AUC"""
+    front, best_auc = [], -np.inf
+    for trial in sorted(trials, key=lambda t: t['fit_seconds']):
+        if trial['roc_auc'] > best_auc:
+            front.append(trial)
+            best_auc = trial['roc_auc']
+    return front
+
+
+def summarize(trials, families, data_key, args):
+    final_rung = max(t['rung'] for t in trials)
+    final = [t for t in trials if t['rung'] == final_rung]
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'data_key': data_key,
+        'method': 'successive_halving',
+        'eta': args.eta,
+        'min_rows': args.min_rows,
+        'configs_per_family': args.configs,
+        'seed': args.seed,
+        'trials': len(trials),
+        'trials_fitted': sum(1 for t in trials if not t['cached']),
+        'compute_seconds': sum(t['fit_seconds'] for t in trials),
+        'best': {},
+        'pareto_front': [
+            {key: t[key] for key in ('family', 'params', 'roc_auc', 'fit_seconds', 'predict_rows_per_s')}
+            for t in pareto_front(final)
+        ],
+        'history': [{key: t[key] for key in ('rung', 'family', 'params', 'rows', 'roc_auc', 'fit_seconds')}
+                    for t in trials],
+    }
+    for family in families:
+        winner = max((t for t in final if t['family'] == family), key=lambda t: t['roc_auc'])
+        report['best'][family] = {
+            'params': winner['params'],
+            'roc_auc': winner['roc_auc'],
+            'fit_seconds': winner['fit_seconds'],
+            'predict_rows_per_s': winner['predict_rows_per_s'],
+            'search_seconds': sum(t['fit_seconds'] for t in trials if t['family'] == family),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Successive-halving hyperparameter search')
+    parser.add_argument('--data', default='Datasets/Loan_default.csv')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--models', nargs='+', default=list(SEARCH_SPACES), choices=list(SEARCH_SPACES))
+    parser.add_argument('--configs', type=int, default=12, help='Random configurations per family')
+    parser.add_argument('--eta', type=int, default=3, help='Keep 1/eta of the trials per rung, eta times the rows')
+    parser.add_argument('--min-rows', type=int, default=2000, help='Rows of the first rung')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--feature-cache', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--trial-cache', default=TRIAL_CACHE_DIR)
+    args = parser.parse_args()
+
+    X, y, _, meta = load_feature_table(args.data, args.feature_cache)
+    data_key = f"{meta['source_sha256'][:16]}-v{FEATURE_VERSION}"
+    data = search_split(X.to_numpy(), y.to_numpy(), args.seed)
+    print(f'Search split: {len(data[0])} training rows, {len(data[2])} validation rows')
+
+    trials = successive_halving(data, data_key, args.models, args.configs, args.eta, args.min_rows,
+                                args.workers, args.seed, args.trial_cache)
+    report = summarize(trials, args.models, data_key, args)
+
+    os.makedirs(args.models_dir, exist_ok=True)
+    path = os.path.join(args.models_dir, RESULTS_FILENAME)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nSearch results saved: {path} ({report["trials_fitted"]} trials fitted, '
+          f'{report["trials"] - report["trials_fitted"]} from cache)')
+    for family, best in report['best'].items():
+        print(f"  {family:<20} AUC {best['roc_auc']:.4f}  fit {best['fit_seconds']:.2f}s  {best['params']}")
+
+
+if __name__ == '__main__':
+    main()
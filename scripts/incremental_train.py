@@ -0,0 +1,268 @@
+"""
+Incremental retraining from newly labelled loans.
+
+Updates the trained model set in models/ with a file of new outcomes (same
+columns as Datasets/Loan_default.csv) instead of refitting on the full
+dataset:
+  - the shared scaler statistics are updated with the new rows (StandardScaler.partial_fit)
+  - logistic regression is re-expressed for the updated scaler (its
+    coefficients absorb the change exactly), then warm-started from them on
+    the new rows only
+  - tree models keep the scaler they were fitted with (saved as
+    <model>_scaler.pkl and in the bundle, see model_bundle.py): split
+    thresholds are not rewritten, so they score exactly as before
+  - XGBoost keeps boosting from its existing trees on the new rows only
+
+A re-expressed logistic regression whose holdout probabilities move by more
+than RESCALE_TOLERANCE keeps its previous scaler too. Each updated model is
+compared with the previous one on a fixed holdout (by default the held-out
+split of Datasets/Loan_default.csv that train_models.py evaluates on) and
+only promoted if its ROC-AUC does not drop by more than --tolerance.
+Otherwise the previous model is kept. The outcome is written to
+models/incremental_report.json. If nothing is promoted, models/ is left
+untouched.
+
+Usage (from the project root):
+    python scripts/incremental_train.py new_outcomes.csv [--xgb-rounds 20] [--lr-max-iter 20]
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+import warnings
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from dataset import TARGET_COLUMN, read_loan_csv
+from features import FEATURE_COLUMNS, build_features
+from model_bundle import (ENCODER_FILES, MODEL_PREFERENCE, atomic_dump, atomic_dump_json, build_bundle,
+                          load_model_scalers, model_input, scaler_filename, write_manifest)
+from predict import DECISION_THRESHOLDS
+
+REPORT_FILENAME = 'incremental_report.json'
+# Models that learn from the new rows; the others are kept as they are
+INCREMENTAL_MODELS = ['xgboost', 'logistic_regression']
+# Largest holdout probability change a re-expressed logistic regression may show
+RESCALE_TOLERANCE = 1e-6
+
+
+def load_model_set(models_dir):
+    """
+    (scaler, encoders, models, model scalers) as written by train_models.py
+    and earlier incremental runs; model scalers maps every scaled model to
+    the scaler it scores with.
+    """
+    scaler = joblib.load(os.path.join(models_dir, 'scaler.pkl'))
+    encoders = {column: joblib.load(os.path.join(models_dir, filename))
+                for column, filename in ENCODER_FILES.items()}
+    models = {name: joblib.load(os.path.join(models_dir, f'{name}.pkl'))
+              for name in MODEL_PREFERENCE if os.path.exists(os.path.join(models_dir, f'{name}.pkl'))}
+    own = load_model_scalers(models_dir, models)
+    scalers = {name: own.get(name, scaler) for name in models if model_input(name) == 'scaled'}
+    return scaler, encoders, models, scalers
+
+
+def labelled_features(df, categories):
+    """(X, y) for the computable rows of a labelled dataset, encoded with the saved categories"""
+    features, computable = build_features(df, categories)
+    return features[computable], df[TARGET_COLUMN].to_numpy()[computable]
+
+
+def fixed_holdout(data_path, categories):
+    """The test split of train_models.py (same rows, same order)"""
+    X, y = labelled_features(read_loan_csv(data_path), categories)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    return X_test, y_test
+
+
+def rescale_linear(model, old, new):
+    """
+    Copy of a linear model computing the same outputs on features scaled
+    with `new`: old z = (x - m0) / s0 and new z' = (x - m1) / s1 give
+    z = z' * s1 / s0 + (m1 - m0) / s0, which the coefficients absorb.
+    """
+    model = copy.deepcopy(model)
+    ratio = new.scale_ / old.scale_
+    shift = (new.mean_ - old.mean_) / old.scale_
+    model.intercept_ = model.intercept_ + model.coef_ @ shift
+    model.coef_ = model.coef_ * ratio
+    return model
+
+
+def continue_xgboost(model, X, y, rounds):
+    """Add `rounds` boosting rounds fitted on (X, y) to the existing trees"""
+    updated = XGBClassifier(**dict(model.get_params(), n_estimators=rounds))
+    updated.fit(X, y, xgb_model=model.get_booster())
+    return updated
+
+
+def warm_start_logistic(model, X, y, max_iter):
+    """At most max_iter solver iterations on (X, y), starting from the current coefficients"""
+    updated = copy.deepcopy(model).set_params(warm_start=True, max_iter=max_iter)
+    # The capped iteration count is what keeps the update close to the previous model
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        updated.fit(X, y)
+    return updated.set_params(warm_start=False, max_iter=model.max_iter)
+
+
+def holdout_metrics(model, X, y):
+    proba = model.predict_proba(X)[:, 1]
+    pred = (proba >= 0.5).astype(int)
+    return {
+        'accuracy': accuracy_score(y, pred),
+        'precision': precision_score(y, pred, zero_division=0),
+        'recall': recall_score(y, pred),
+        'f1_score': f1_score(y, pred),
+        'roc_auc': roc_auc_score(y, proba),
+    }
+
+
+def update_model_set(models_dir, new_path, data_path, holdout_path, xgb_rounds, lr_max_iter, tolerance):
+    scaler, encoders, models, scalers = load_model_set(models_dir)
+    categories = {column: [str(c) for c in le.classes_] for column, le in encoders.items()}
+
+    X_new, y_new = labelled_features(read_loan_csv(new_path), categories)
+    if holdout_path:
+        X_hold, y_hold = labelled_features(read_loan_csv(holdout_path), categories)
+    else:
+        X_hold, y_hold = fixed_holdout(data_path, categories)
+    print(f'New labelled rows: {len(X_new)} (default rate {y_new.mean():.2%}), holdout rows: {len(X_hold)}')
+
+    # Streaming update of the shared scaler
+    new_scaler = copy.deepcopy(scaler).partial_fit(X_new)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'new_rows': int(len(X_new)),
+        'holdout_rows': int(len(X_hold)),
+        'scaler_samples_seen': int(new_scaler.n_samples_seen_),
+        'tolerance': tolerance,
+        'models': {},
+    }
+    candidates, new_scalers = {}, {}
+    for name, model in models.items():
+        if model_input(name) == 'raw':
+            # Histogram engines read unscaled features
+            X_hold_raw = X_hold.astype(np.float32)
+            previous = holdout_metrics(model, X_hold_raw, y_hold)
+            candidates[name] = model
+            report['models'][name] = {'previous': previous, 'promoted': False}
+            print(f"{name:<20} AUC {previous['roc_auc']:.4f}  (unchanged)")
+            continue
+
+        old_scaler = scalers[name]
+        X_hold_old = old_scaler.transform(X_hold)
+        previous = holdout_metrics(model, X_hold_old, y_hold)
+        entry = {'previous': previous}
+        # Tree models stay on their scaler; a linear model moves to the new one if that is exact
+        model_scaler, current = old_scaler, model
+        if hasattr(model, 'coef_'):
+            rescaled = rescale_linear(model, old_scaler, new_scaler)
+            entry['rescale_max_diff'] = float(np.max(np.abs(
+                rescaled.predict_proba(new_scaler.transform(X_hold))[:, 1]
+                - model.predict_proba(X_hold_old)[:, 1])))
+            if entry['rescale_max_diff'] <= RESCALE_TOLERANCE:
+                model_scaler, current = new_scaler, rescaled
+        entry['scaler'] = 'shared' if model_scaler is new_scaler else 'own'
+        X_hold_scaled = model_scaler.transform(X_hold)
+
+        if name in INCREMENTAL_MODELS:
+            X_new_scaled = model_scaler.transform(X_new)
+            start = time.perf_counter()
+            if name == 'xgboost':
+                updated = continue_xgboost(current, X_new_scaled, y_new, xgb_rounds)
+            else:
+                updated = warm_start_logistic(current, X_new_scaled, y_new, lr_max_iter)
+            entry['fit_seconds'] = time.perf_counter() - start
+            entry['updated'] = holdout_metrics(updated, X_hold_scaled, y_hold)
+            entry['promoted'] = entry['updated']['roc_auc'] >= previous['roc_auc'] - tolerance
+        else:
+            entry['promoted'] = False
+
+        candidates[name] = updated if entry['promoted'] else current
+        new_scalers[name] = model_scaler
+        report['models'][name] = entry
+        status = 'promoted' if entry['promoted'] else ('kept previous' if name in INCREMENTAL_MODELS else 'unchanged')
+        updated_auc = entry.get('updated', {}).get('roc_auc')
+        print(f"{name:<20} AUC {previous['roc_auc']:.4f}"
+              + (f' -> {updated_auc:.4f}' if updated_auc is not None else '')
+              + f"  ({status}, {entry['scaler']} scaler)")
+
+    report['promoted'] = [name for name, entry in report['models'].items() if entry['promoted']]
+    if report['promoted']:
+        check_rows = {name: model_scaler.transform(X_hold) for name, model_scaler in new_scalers.items()}
+        check_rows['raw'] = X_hold.astype(np.float32)
+        _write_model_set(models_dir, new_scaler, encoders, candidates, new_scalers, report, check_rows)
+    else:
+        print('No updated model beat the previous one on the holdout; models/ unchanged')
+
+    with open(os.path.join(models_dir, REPORT_FILENAME), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def _write_model_set(models_dir, scaler, encoders, models, scalers, report, check_rows):
+    """
+    Replace the model set: the shared scaler, and every scaled model with the
+    scaler it scores with (its own pickle when that is not the shared one)
+    """
+    atomic_dump(scaler, os.path.join(models_dir, 'scaler.pkl'))
+    own_scalers = {}
+    for name, model in models.items():
+        atomic_dump(model, os.path.join(models_dir, f'{name}.pkl'))
+        scaler_path = os.path.join(models_dir, scaler_filename(name))
+        if name in scalers and scalers[name] is not scaler:
+            own_scalers[name] = scalers[name]
+            atomic_dump(scalers[name], scaler_path)
+        elif os.path.exists(scaler_path):
+            os.remove(scaler_path)
+
+    metrics_path = os.path.join(models_dir, 'model_metrics.json')
+    metrics = {}
+    if os.path.exists(metrics_path):
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+    for name in report['promoted']:
+        entry = report['models'][name]
+        metrics[name] = dict(metrics.get(name, {}), **entry['updated'], fit_seconds=entry['fit_seconds'],
+                             incremental_rows=report['new_rows'], updated_at=report['generated_at'])
+    atomic_dump_json(metrics, metrics_path)
+
+    bundle_path = build_bundle(models_dir, scaler, encoders, models, FEATURE_COLUMNS, DECISION_THRESHOLDS,
+                               check_rows=check_rows, scalers=own_scalers)
+    print(f'Scoring bundle saved: {bundle_path}')
+
+    # Written last: scorers hot-reload the new model set once the manifest changes
+    manifest = write_manifest(models_dir)
+    print(f"Model manifest saved: {models_dir}/manifest.json (version {manifest['model_version']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the trained models with newly labelled loans')
+    parser.add_argument('new_data', help='CSV of new loans with outcomes (Loan_default.csv columns)')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--data', default='Datasets/Loan_default.csv',
+                        help='Training dataset whose held-out split is the fixed holdout')
+    parser.add_argument('--holdout', default=None, help='Labelled CSV to use as the holdout instead')
+    parser.add_argument('--xgb-rounds', type=int, default=20, help='Boosting rounds added to XGBoost')
+    parser.add_argument('--lr-max-iter', type=int, default=20,
+                        help='Solver iterations for the warm-started logistic regression')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Largest holdout ROC-AUC drop a promoted model may have')
+    args = parser.parse_args()
+
+    update_model_set(args.models_dir, args.new_data, args.data, args.holdout,
+                     args.xgb_rounds, args.lr_max_iter, args.tolerance)
+
+
+if __name__ == '__main__':
+    main()
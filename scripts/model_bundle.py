@@ -0,0 +1,368 @@
+"""
+Single-file, memory-mappable scoring bundle.
+
+Layout of models/scoring_bundle.bin:
+    8 bytes   magic b'LGBUNDLE'
+    4 bytes   format version (little-endian uint32)
+    4 bytes   reserved
+    8 bytes   header length (little-endian uint64)
+    header    UTF-8 JSON: feature order, category tables, decision thresholds,
+              model descriptions and the dtype/shape/offset of every array
+    arrays    raw little-endian array data, each aligned to 64 bytes
+
+The file is opened with one read-only np.memmap, so loading only parses the
+JSON header and every worker process maps the same physical pages. Tree
+ensembles are stored as flat node arrays (see tree_ensemble.py) and scored
+straight from the map; other model types fall back to their pickle.
+
+Models share the scaler of scaler.pkl unless they were fitted on another
+one (incremental_train.py keeps tree models on the scaler they were fitted
+with): those have their own mean/scale arrays in the bundle and a
+<model>_scaler.pkl next to their pickle.
+"""
+
+import json
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+from features import FEATURE_VERSION
+from tree_ensemble import FlatTreeEnsemble, check_parity, export_tree_ensemble, parity_rows
+
+BUNDLE_FILENAME = 'scoring_bundle.bin'
+# Written last by training: its model_version changing means a complete new model set
+MANIFEST_FILENAME = 'manifest.json'
+BUNDLE_MAGIC = b'LGBUNDLE'
+BUNDLE_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sIIQ')
+_ALIGNMENT = 64
+
+# Categorical training column -> label encoder pickle
+ENCODER_FILES = {
+    'Education': 'le_education.pkl',
+    'EmploymentType': 'le_employment.pkl',
+    'MaritalStatus': 'le_marital.pkl',
+    'LoanPurpose': 'le_purpose.pkl',
+}
+
+# Preferred scoring model first (same preference predict.py has always used)
+MODEL_PREFERENCE = [
+    'gradient_boosting', 'xgboost', 'random_forest', 'logistic_regression',
+    'hist_gradient_boosting', 'xgboost_hist',
+]
+
+# Model input: 'scaled' features (StandardScaler) or 'raw' unscaled float32 features.
+# Histogram engines bin their inputs and split natively on the encoded categoricals.
+RAW_INPUT_MODELS = ['hist_gradient_boosting', 'xgboost_hist']
+
+
+def model_input(model_name):
+    return 'raw' if model_name in RAW_INPUT_MODELS else 'scaled'
+
+
+def scaler_filename(model_name):
+    """Pickle of the scaler a model was fitted with, when it is not scaler.pkl"""
+    return f'{model_name}_scaler.pkl'
+
+
+def load_model_scalers(models_dir, model_names):
+    """model name -> own scaler, for the models that have one"""
+    scalers = {}
+    for name in model_names:
+        path = os.path.join(models_dir, scaler_filename(name))
+        if os.path.exists(path):
+            scalers[name] = joblib.load(path)
+    return scalers
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_bundle(path, header, arrays):
+    """Write header + arrays to path atomically (readers never see a partial file)"""
+    header = dict(header)
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {
+            'dtype': array.dtype.newbyteorder('<').str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset = _align(offset + array.nbytes)
+    header['arrays'] = layout
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array, dtype=layout[name]['dtype']).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_dump(obj, path):
+    """joblib.dump to path atomically (write a temp file, fsync, rename over path)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        joblib.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_dump_json(obj, path):
+    """json.dump to path atomically, like atomic_dump"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_manifest(models_dir, model_version=None):
+    """
+    Record the current model set in models_dir/manifest.json (atomically).
+    Call it after every other artifact is in place; scorers watching the
+    manifest only reload once it changes.
+    """
+    if model_version is None:
+        bundle_path = os.path.join(models_dir, BUNDLE_FILENAME)
+        if os.path.exists(bundle_path):
+            model_version = read_bundle(bundle_path)[0]['model_version']
+        else:
+            model_version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+
+    files = {}
+    for name in sorted(os.listdir(models_dir)):
+        file_path = os.path.join(models_dir, name)
+        if name != MANIFEST_FILENAME and not name.endswith('.tmp') and os.path.isfile(file_path):
+            files[name] = {'size': os.path.getsize(file_path)}
+    manifest = {
+        'model_version': model_version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'files': files,
+    }
+
+    atomic_dump_json(manifest, os.path.join(models_dir, MANIFEST_FILENAME))
+    return manifest
+
+
+def read_manifest(models_dir):
+    """The model-set manifest, or None for a models/ directory written before manifests existed"""
+    path = os.path.join(models_dir, MANIFEST_FILENAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_bundle(path):
+    """Return (header, arrays) with every array a read-only view into one memory map"""
+    with open(path, 'rb') as f:
+        magic, version, _, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f'{path} is not a scoring bundle')
+        if version != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported bundle format version {version} in {path}')
+        header = json.loads(f.read(header_len).decode('utf-8'))
+
+    data_start = _align(_PREAMBLE.size + header_len)
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = data_start + spec['offset']
+        arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header, arrays
+
+
+class BundleScaler:
+    """StandardScaler.transform from the bundled mean/scale arrays"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class LinearModel:
+    """Logistic regression scored from the bundled coefficient arrays"""
+
+    def __init__(self, coef, intercept):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def decision_function(self, X):
+        return X @ self.coef_ + self.intercept_
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1 - p, p])
+
+    def contributions(self, X):
+        """(bias, coef * x) in log-odds; features are standardized, so 0 is the training mean"""
+        return float(self.intercept_), np.asarray(X, dtype=np.float64) * self.coef_
+
+    def explain(self, X):
+        bias, contributions = self.contributions(X)
+        p = 1.0 / (1.0 + np.exp(-(bias + contributions.sum(axis=1))))
+        return p, contributions
+
+
+def build_bundle(models_dir, scaler, encoders, models, feature_order, thresholds, default_model=None,
+                 check_rows=None, scalers=None):
+    """
+    Write the scoring bundle for a trained model set.
+    encoders maps categorical column -> fitted LabelEncoder, models maps name -> fitted estimator,
+    scalers maps name -> own scaler for the models not fitted on scaler.
+    Tree ensembles are flattened and must match the library on check_rows: scaled
+    features, or a dict of model name or input kind ('scaled'/'raw') -> rows.
+    """
+    scalers = scalers or {}
+    if default_model is None:
+        default_model = next(name for name in MODEL_PREFERENCE if name in models)
+
+    arrays = {
+        'scaler/mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler/scale': np.asarray(scaler.scale_, dtype=np.float64),
+    }
+    model_specs = {}
+    for name, model in models.items():
+        # Array prefix of the model's scaler
+        scaler_key = 'scaler'
+        if name in scalers:
+            scaler_key = f'{name}/scaler'
+            arrays[f'{scaler_key}/mean'] = np.asarray(scalers[name].mean_, dtype=np.float64)
+            arrays[f'{scaler_key}/scale'] = np.asarray(scalers[name].scale_, dtype=np.float64)
+
+        if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+            arrays[f'{name}/coef'] = np.asarray(model.coef_, dtype=np.float64).ravel()
+            arrays[f'{name}/intercept'] = np.asarray(model.intercept_, dtype=np.float64).ravel()
+            model_specs[name] = {'type': 'linear', 'input': model_input(name), 'scaler': scaler_key}
+            continue
+
+        try:
+            ensemble = export_tree_ensemble(model)
+        except ValueError:
+            # e.g. categorical splits: no flat form, the library scores it
+            ensemble = None
+        if ensemble is None:
+            model_specs[name] = {'type': 'pickle', 'path': f'{name}.pkl', 'input': model_input(name),
+                                 'scaler': scaler_key}
+            continue
+
+        if isinstance(check_rows, dict):
+            rows = check_rows.get(name, check_rows.get(model_input(name)))
+        else:
+            rows = check_rows
+        if rows is None:
+            rows = parity_rows(len(feature_order))
+        max_diff = check_parity(model, ensemble, rows)
+        spec, tree_arrays = ensemble.to_arrays()
+        for array_name, array in tree_arrays.items():
+            arrays[f'{name}/tree/{array_name}'] = array
+        model_specs[name] = dict(spec, type='tree_ensemble', path=f'{name}.pkl', input=model_input(name),
+                                 scaler=scaler_key, parity_max_diff=max_diff)
+
+    created_at = datetime.now(timezone.utc)
+    header = {
+        'bundle_version': BUNDLE_FORMAT_VERSION,
+        'model_version': created_at.strftime('%Y%m%dT%H%M%S%fZ'),
+        'created_at': created_at.isoformat(),
+        'feature_order': list(feature_order),
+        'feature_version': FEATURE_VERSION,
+        'categories': {column: [str(c) for c in le.classes_] for column, le in encoders.items()},
+        'thresholds': dict(thresholds),
+        'default_model': default_model,
+        'models': model_specs,
+    }
+
+    path = os.path.join(models_dir, BUNDLE_FILENAME)
+    write_bundle(path, header, arrays)
+    return path
+
+
+def available_models(models_dir):
+    """Names of the scoring models in models_dir (bundle entries, else model pickles)"""
+    path = os.path.join(models_dir, BUNDLE_FILENAME)
+    if os.path.exists(path):
+        header, _ = read_bundle(path)
+        return list(header['models'])
+    return [name for name in MODEL_PREFERENCE if os.path.exists(os.path.join(models_dir, f'{name}.pkl'))]
+
+
+def load_bundle(models_dir, model_name=None):
+    """Load scoring artifacts from the bundle (None if the bundle does not exist)"""
+    path = os.path.join(models_dir, BUNDLE_FILENAME)
+    if not os.path.exists(path):
+        return None
+
+    header, arrays = read_bundle(path)
+    model_name = model_name or header['default_model']
+    if model_name not in header['models']:
+        raise ValueError(f'Model {model_name!r} is not in the scoring bundle')
+
+    spec = header['models'][model_name]
+    if spec['type'] == 'linear':
+        model = LinearModel(arrays[f'{model_name}/coef'], arrays[f'{model_name}/intercept'][0])
+    elif spec['type'] == 'tree_ensemble':
+        prefix = f'{model_name}/tree/'
+        tree_arrays = {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+        model = FlatTreeEnsemble.from_arrays(spec, tree_arrays)
+    else:
+        model = joblib.load(os.path.join(models_dir, spec['path']))
+
+    scaler_key = spec.get('scaler', 'scaler')
+    return {
+        'source': 'bundle',
+        'model_version': header['model_version'],
+        'model_name': model_name,
+        'model': model,
+        'input': spec.get('input', 'scaled'),
+        'scaler': BundleScaler(arrays[f'{scaler_key}/mean'], arrays[f'{scaler_key}/scale']),
+        'scaler_key': scaler_key,
+        'categories': header['categories'],
+        'thresholds': header['thresholds'],
+        'feature_order': header['feature_order'],
+        'feature_version': header.get('feature_version'),
+    }
+
+
+if __name__ == '__main__':
+    # Build a bundle from an existing models/ directory without retraining
+    from predict import FEATURE_COLUMNS, DECISION_THRESHOLDS
+
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else 'models'
+    scaler = joblib.load(os.path.join(models_dir, 'scaler.pkl'))
+    encoders = {
+        column: joblib.load(os.path.join(models_dir, filename))
+        for column, filename in ENCODER_FILES.items()
+    }
+    models = {}
+    for name in MODEL_PREFERENCE:
+        model_path = os.path.join(models_dir, f'{name}.pkl')
+        if os.path.exists(model_path):
+            models[name] = joblib.load(model_path)
+
+    path = build_bundle(models_dir, scaler, encoders, models, FEATURE_COLUMNS, DECISION_THRESHOLDS,
+                        scalers=load_model_scalers(models_dir, models))
+    write_manifest(models_dir)
+    print(f'Scoring bundle written: {path} (models: {", ".join(models)})')
@@ -0,0 +1,114 @@
+"""
+Hot reload of retrained model sets.
+
+train_models.py writes every artifact atomically and then models/manifest.json;
+a new manifest model_version therefore marks a complete model set. The
+reloader polls for that, loads the new set off the request path, runs it on a
+canary batch and only then hands it to `swap`. Requests already running keep
+the artifacts dict they started with, so they finish on the old model.
+
+For a models/ directory without a manifest the reloader falls back to the
+fingerprint of prediction_cache.models_fingerprint (the bundle, else every
+file) and waits until it is stable for one poll interval.
+"""
+
+import sys
+import threading
+import time
+
+from model_bundle import read_manifest
+from prediction_cache import models_fingerprint
+
+
+def model_set_token(models_dir):
+    """Identity of the model set on disk: manifest version, else file fingerprint"""
+    manifest = read_manifest(models_dir)
+    if manifest is not None:
+        return ('manifest', manifest['model_version'])
+    return ('files', models_fingerprint(models_dir))
+
+
+class ModelReloader:
+    """
+    Polls models_dir and swaps in new model sets.
+    load() returns fresh artifacts, validate(artifacts) raises if they must not
+    be served, swap(artifacts) installs them.
+    """
+
+    def __init__(self, models_dir, load, validate, swap, interval=5.0):
+        self.models_dir = models_dir
+        self.load = load
+        self.validate = validate
+        self.swap = swap
+        self.interval = interval
+        self.token = model_set_token(models_dir)
+        self.reloads = 0
+        self.failures = 0
+        self._pending = None  # fingerprint seen once, waiting to settle
+        self._rejected = None  # token that failed to load or validate
+        self._next_poll = time.monotonic() + interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    def poll(self):
+        """check() at most once per interval (for callers with their own loop)"""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return False
+        self._next_poll = now + self.interval
+        return self.check()
+
+    def check(self):
+        """Look for a new model set; returns True when one was validated and swapped in"""
+        try:
+            token = model_set_token(self.models_dir)
+        except OSError as e:
+            print(f'Model reload: cannot read {self.models_dir}: {e}', file=sys.stderr, flush=True)
+            return False
+        if token == self.token or token == self._rejected:
+            self._pending = None
+            return False
+        if token[0] == 'files' and token != self._pending:
+            # No manifest: wait for the directory to stop changing
+            self._pending = token
+            return False
+        self._pending = None
+
+        start = time.perf_counter()
+        try:
+            artifacts = self.load()
+            self.validate(artifacts)
+        except Exception as e:
+            self._rejected = token
+            self.failures += 1
+            print(f'Model reload rejected, still serving the previous models: {e}',
+                  file=sys.stderr, flush=True)
+            return False
+
+        self.swap(artifacts)
+        self.token = token
+        self.reloads += 1
+        print(f"Model reload: now serving {artifacts['model_name']} "
+              f"(version {artifacts['model_version']}, loaded in {time.perf_counter() - start:.2f}s)",
+              file=sys.stderr, flush=True)
+        return True
+
+    def start(self):
+        """Poll from a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='model-reloader', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        return {
+            'intervalSeconds': self.interval,
+            'reloads': self.reloads,
+            'failures': self.failures,
+        }
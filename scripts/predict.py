@@ -1,118 +1,727 @@
+import time
+
+# Measured so per-stage instrumentation can report import cost
+_import_started = time.perf_counter()
+
 import sys
 import json
+import argparse
 import joblib
 import numpy as np
 import pandas as pd
 import os
 
+from features import FEATURE_COLUMNS, FEATURE_VERSION, build_features, flag_value
+from model_bundle import ENCODER_FILES, LinearModel, load_bundle, model_input, scaler_filename
+from model_reload import ModelReloader
+from prediction_cache import PredictionCache, normalize_number
+from scoring_metrics import NULL_TIMER, StageHistograms, StageTimer
+from synthetic_applications import generate_applications
+from tree_ensemble import FlatTreeEnsemble, export_tree_ensemble
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
 # Set working directory to project root (where scripts/ is located)
 # This assumes the script is run from project root, but let's be safe
 project_root = os.getcwd()
 
-def predict(data):
-    try:
-        # Load models
-        # Use absolute paths or relative from execution context
+# Request field -> training column, in the order the model expects its inputs
+FIELD_COLUMNS = {
+    'age': 'Age',
+    'income': 'Income',
+    'loanAmount': 'LoanAmount',
+    'loanTerm': 'LoanTerm',
+    'interestRate': 'InterestRate',
+    'creditScore': 'CreditScore',
+    'dtiRatio': 'DTIRatio',
+    'numCreditLines': 'NumCreditLines',
+    'monthsEmployed': 'MonthsEmployed',
+    'hasMortgage': 'HasMortgage',
+    'hasDependents': 'HasDependents',
+    'hasCoSigner': 'HasCoSigner',
+    'education': 'Education',
+    'employmentType': 'EmploymentType',
+    'maritalStatus': 'MaritalStatus',
+    'loanPurpose': 'LoanPurpose',
+}
+
+NUMERIC_FIELDS = [
+    'age', 'income', 'loanAmount', 'loanTerm', 'interestRate',
+    'creditScore', 'dtiRatio', 'numCreditLines', 'monthsEmployed',
+]
+BINARY_FIELDS = ['hasMortgage', 'hasDependents', 'hasCoSigner']
+CATEGORICAL_FIELDS = ['education', 'employmentType', 'maritalStatus', 'loanPurpose']
+
+# Model input columns that results and reasons read back
+_DTI, _CREDIT, _RISK, _AFFORDABILITY = (
+    FEATURE_COLUMNS.index(column) for column in ['DTIRatio', 'CreditScore', 'RiskScore', 'AffordabilityIndex']
+)
+
+# Reason labels for the model features, and how many reasons predict() returns
+FEATURE_LABELS = {
+    'Age': 'Age',
+    'Income': 'Income',
+    'LoanAmount': 'Loan Amount',
+    'LoanTerm': 'Loan Term',
+    'InterestRate': 'Interest Rate',
+    'CreditScore': 'Credit Score',
+    'DTIRatio': 'DTI Ratio',
+    'NumCreditLines': 'Credit Lines',
+    'MonthsEmployed': 'Months Employed',
+    'HasMortgage': 'Has Mortgage',
+    'HasDependents': 'Has Dependents',
+    'HasCoSigner': 'Has Co-Signer',
+    'Education_Encoded': 'Education',
+    'EmploymentType_Encoded': 'Employment Type',
+    'MaritalStatus_Encoded': 'Marital Status',
+    'LoanPurpose_Encoded': 'Loan Purpose',
+    'RiskScore': 'Risk Score',
+    'AffordabilityIndex': 'Affordability Index',
+}
+REASON_COUNT = 3
+
+# REJECT above the reject thresholds, REVIEW above the review thresholds, else APPROVE
+DECISION_THRESHOLDS = {
+    'reject_risk_score': 700,
+    'reject_probability': 0.7,
+    'review_risk_score': 500,
+    'review_probability': 0.4,
+}
+
+
+# Artifacts loaded once per process and reused by every call to predict()
+_artifacts = None
+# Optional result cache in front of predict(), see enable_cache()
+_cache = None
+# Per-stage timing histograms, see enable_timings()
+_histograms = None
+# Background model reloader, see enable_hot_reload()
+_reloader = None
+
+# Applications every new model set must score cleanly before it is swapped in
+CANARY_SIZE = 64
+
+# Cascade mode: this model screens every application; only rows whose screening
+# probability is within the margin of a decision threshold reach the main model
+CASCADE_SCREEN_MODEL = 'logistic_regression'
+DEFAULT_CASCADE_MARGIN = 0.1
+
+
+def load_artifacts(models_dir=None, model_name=None, cascade_margin=None):
+    """
+    Load the scaler, category tables and scoring model from models/.
+    Reads the memory-mapped scoring bundle when training produced one,
+    otherwise the individual pickles. With cascade_margin set, the screening
+    model is loaded too (see cascade_escalations()).
+    """
+    # Use absolute paths or relative from execution context
+    if models_dir is None:
         models_dir = os.path.join(project_root, 'models')
-        
-        scaler = joblib.load(os.path.join(models_dir, 'scaler.pkl'))
+
+    artifacts = _load_model_set(models_dir, model_name)
+    artifacts['explainer'] = _explainer(artifacts['model'])
+    artifacts['cascade'] = None
+    if cascade_margin is not None and artifacts['model_name'] != CASCADE_SCREEN_MODEL:
+        screen = _load_model_set(models_dir, CASCADE_SCREEN_MODEL)
+        artifacts['cascade'] = {
+            'model_name': CASCADE_SCREEN_MODEL,
+            'model': screen['model'],
+            'input': screen['input'],
+            'scaler': screen['scaler'],
+            'scaler_key': screen['scaler_key'],
+            'explainer': _explainer(screen['model']),
+            'margin': float(cascade_margin),
+        }
+    return artifacts
+
+
+def _explainer(model):
+    """
+    Object providing contributions() for model: the model itself for bundle
+    models, a flat export for pickled ones, None if it cannot be explained.
+    """
+    if isinstance(model, FlatTreeEnsemble):
+        return model if model.expected is not None else None
+    if isinstance(model, LinearModel):
+        return model
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        return LinearModel(np.ravel(model.coef_), float(np.ravel(model.intercept_)[0]))
+    try:
+        return export_tree_ensemble(model)
+    except ValueError:
+        return None
+
+
+def _load_model_set(models_dir, model_name):
+    artifacts = load_bundle(models_dir, model_name)
+    if artifacts is not None:
+        return artifacts
+
+    if model_name is None:
         # Try loading gradient_boosting, fallback to others if needed
-        model_path = os.path.join(models_dir, 'gradient_boosting.pkl')
-        if not os.path.exists(model_path):
-             model_path = os.path.join(models_dir, 'xgboost.pkl')
-             
-        model = joblib.load(model_path)
-        
-        le_education = joblib.load(os.path.join(models_dir, 'le_education.pkl'))
-        le_employment = joblib.load(os.path.join(models_dir, 'le_employment.pkl'))
-        le_marital = joblib.load(os.path.join(models_dir, 'le_marital.pkl'))
-        le_purpose = joblib.load(os.path.join(models_dir, 'le_purpose.pkl'))
-        
-        # Calculate RiskScore
-        risk_score = (
-            (data['dtiRatio'] * 300) +
-            (data['loanAmount'] / data['income'] * 250) +
-            ((850 - data['creditScore']) / 850 * 200) +
-            (data['interestRate'] * 10 * 150) +
-            (1 / (data['monthsEmployed'] + 1) * 100)
+        model_name = 'gradient_boosting'
+        if not os.path.exists(os.path.join(models_dir, 'gradient_boosting.pkl')):
+            print('gradient_boosting.pkl not found, scoring with xgboost', file=sys.stderr)
+            model_name = 'xgboost'
+
+    categories = {}
+    for column, filename in ENCODER_FILES.items():
+        le = joblib.load(os.path.join(models_dir, filename))
+        categories[column] = [str(c) for c in le.classes_]
+
+    # A model fitted on another scaler than the shared one has its own (see model_bundle.py)
+    scaler_key = 'scaler'
+    scaler_path = os.path.join(models_dir, 'scaler.pkl')
+    if os.path.exists(os.path.join(models_dir, scaler_filename(model_name))):
+        scaler_key = f'{model_name}/scaler'
+        scaler_path = os.path.join(models_dir, scaler_filename(model_name))
+
+    return {
+        'source': 'pickles',
+        'model_version': None,
+        'model_name': model_name,
+        'model': joblib.load(os.path.join(models_dir, f'{model_name}.pkl')),
+        'input': model_input(model_name),
+        'scaler': joblib.load(scaler_path),
+        'scaler_key': scaler_key,
+        'categories': categories,
+        'thresholds': dict(DECISION_THRESHOLDS),
+        'feature_order': list(FEATURE_COLUMNS),
+        'feature_version': None,
+    }
+
+
+def get_artifacts(cascade_margin=None):
+    """
+    Return the process-wide artifacts, loading them on first use (with the
+    cascade screening model when cascade_margin is set)
+    """
+    global _artifacts
+    if _artifacts is None:
+        start = time.perf_counter()
+        _artifacts = load_artifacts(cascade_margin=cascade_margin)
+        if _histograms is not None:
+            _histograms.observe('load', 'startup', time.perf_counter() - start)
+    return _artifacts
+
+
+def validate_artifacts(artifacts, applications=None):
+    """
+    Score a canary batch with freshly loaded artifacts; raise ValueError if
+    they are not fit to serve (wrong feature layout, errors, bad probabilities).
+    """
+    if list(artifacts['feature_order']) != FEATURE_COLUMNS:
+        raise ValueError('Model feature order does not match predict.py')
+    if artifacts.get('feature_version') not in (None, FEATURE_VERSION):
+        raise ValueError(f"Models were trained on feature version {artifacts['feature_version']}, "
+                         f'this code computes version {FEATURE_VERSION}')
+    if applications is None:
+        applications = generate_applications(CANARY_SIZE, seed=0)
+
+    results = predict_batch(applications, artifacts)
+    errors = [r['error'] for r in results if 'error' in r]
+    if errors:
+        raise ValueError(f'{len(errors)} canary application(s) failed: {errors[0]}')
+    probability = np.array([r['defaultProbability'] for r in results])
+    if not (np.isfinite(probability).all() and (probability >= 0).all() and (probability <= 1).all()):
+        raise ValueError('Canary default probabilities outside [0, 1]')
+
+
+def swap_artifacts(artifacts):
+    """Make artifacts the process-wide model set (requests already running keep the old one)"""
+    global _artifacts
+    _artifacts = artifacts
+
+
+def enable_hot_reload(models_dir=None, model_name=None, interval=5.0, cascade_margin=None):
+    """
+    Start a background thread that loads, canary-checks and swaps in
+    retrained models when models/manifest.json changes.
+    """
+    global _reloader
+    if models_dir is None:
+        models_dir = os.path.join(project_root, 'models')
+    if _reloader is None:
+        _reloader = ModelReloader(
+            models_dir,
+            load=lambda: load_artifacts(models_dir, model_name, cascade_margin),
+            validate=validate_artifacts,
+            swap=swap_artifacts,
+            interval=interval,
+        ).start()
+    return _reloader
+
+
+def enable_timings():
+    """
+    Turn on per-stage instrumentation for this process: predict() results get
+    a 'debug' entry with stage timings, and every call feeds the histograms
+    returned by export_metrics().
+    """
+    global _histograms
+    if _histograms is None:
+        _histograms = StageHistograms()
+        _histograms.observe('import', 'startup', IMPORT_SECONDS)
+    return _histograms
+
+
+def export_metrics():
+    """Cumulative stage histograms in Prometheus text format ('' if timings are off)"""
+    return _histograms.export_prometheus() if _histograms is not None else ''
+
+
+def applications_from_dataset(df):
+    """
+    Loan_default.csv-style rows (training column names, Yes/No flags) as
+    request-shaped columns that predict_batch accepts.
+    """
+    missing = [column for column in FIELD_COLUMNS.values() if column not in df.columns]
+    if missing:
+        raise ValueError('Missing column(s): ' + ', '.join(missing))
+    return pd.DataFrame({field: df[column].to_numpy() for field, column in FIELD_COLUMNS.items()})
+
+
+def _collect_columns(records):
+    """Turn a list of application dicts (or a DataFrame) into one array per field"""
+    if isinstance(records, pd.DataFrame):
+        missing = [field for field in FIELD_COLUMNS if field not in records.columns]
+        if missing:
+            raise ValueError('Missing column(s): ' + ', '.join(missing))
+        columns = {field: records[field].to_numpy() for field in FIELD_COLUMNS}
+        errors = [None] * len(records)
+        return columns, errors
+
+    records = list(records)
+    columns = {}
+    for field in FIELD_COLUMNS:
+        values = np.empty(len(records), dtype=object)
+        values[:] = [r.get(field) if isinstance(r, dict) else None for r in records]
+        columns[field] = values
+
+    errors = []
+    for r in records:
+        if not isinstance(r, dict):
+            errors.append('Application must be a JSON object')
+            continue
+        missing = [field for field in FIELD_COLUMNS if field not in r]
+        errors.append('Missing field(s): ' + ', '.join(missing) if missing else None)
+    return columns, errors
+
+
+def predict_batch(records, artifacts=None, timer=None):
+    """
+    Score many applications at once.
+    Accepts a list of application dicts or a DataFrame with the same field names
+    and returns one predict()-shaped result per row, in input order.
+    timer (a scoring_metrics.StageTimer) collects per-stage wall time; when
+    timings are enabled and no timer is passed, the batch feeds the histograms.
+    """
+    if timer is None:
+        if _histograms is None:
+            return _predict_batch(records, artifacts, NULL_TIMER)
+        timer = StageTimer()
+        results = _predict_batch(records, artifacts, timer)
+        _histograms.observe_timer(timer, 'batch')
+        return results
+    return _predict_batch(records, artifacts, timer)
+
+
+def _predict_batch(records, artifacts, timer):
+    if artifacts is None:
+        with timer.stage('load'):
+            artifacts = get_artifacts()
+
+    with timer.stage('features'):
+        columns, errors = _collect_columns(records)
+        n_rows = len(errors)
+        if n_rows == 0:
+            return []
+        # Same feature code as training (features.py), on training column names
+        features, computable = build_features(
+            {FIELD_COLUMNS[field]: values for field, values in columns.items()},
+            artifacts['categories'],
         )
-        risk_score = min(max(risk_score, 0), 1000)
-        
-        # Calculate AffordabilityIndex
-        monthly_payment = data['loanAmount'] * (data['interestRate']/12) / (1 - (1 + data['interestRate']/12)**(-data['loanTerm']))
-        affordability = (data['income'] * (1 - data['dtiRatio'])) / (monthly_payment * data['loanTerm']) * 10
-        affordability = min(max(affordability, 0), 10)
-        
-        # Encode categoricals using safe handling for unknown categories
-        def safe_transform(le, value):
-            try:
-                return le.transform([value])[0]
-            except:
-                # Fallback to most frequent or 0 if unknown
-                return 0
-
-        education_enc = safe_transform(le_education, data['education'])
-        employment_enc = safe_transform(le_employment, data['employmentType'])
-        marital_enc = safe_transform(le_marital, data['maritalStatus'])
-        purpose_enc = safe_transform(le_purpose, data['loanPurpose'])
-        
-        # Prepare features in the exact order as training
-        features = np.array([[
-            data['age'],
-            data['income'],
-            data['loanAmount'],
-            data['loanTerm'],
-            data['interestRate'],
-            data['creditScore'],
-            data['dtiRatio'],
-            data['numCreditLines'],
-            data['monthsEmployed'],
-            1 if data['hasMortgage'] else 0,
-            1 if data['hasDependents'] else 0,
-            1 if data['hasCoSigner'] else 0,
-            education_enc,
-            employment_enc,
-            marital_enc,
-            purpose_enc,
-            risk_score,
-            affordability
-        ]])
-        
-        # Scale
-        features_scaled = scaler.transform(features)
-        
-        # Predict
-        prediction = model.predict(features_scaled)[0]
-        probability = model.predict_proba(features_scaled)[0][1]
-        
-        # Decision logic
-        if risk_score > 700 or probability > 0.7:
-            decision = 'REJECT'
-        elif risk_score > 500 or probability > 0.4:
-            decision = 'REVIEW'
+        risk_score = features[:, _RISK]
+
+    with timer.stage('scale'):
+        # Rows that cannot be scored (missing fields, non-numeric values, zero income...)
+        for i in np.flatnonzero(~computable):
+            if errors[i] is None:
+                errors[i] = 'Invalid numeric input (check income, interestRate and loanTerm)'
+        ok = np.array([e is None for e in errors])
+        inputs = _model_inputs(artifacts, features[ok]) if ok.any() else None
+
+    with timer.stage('predict_proba'):
+        # Contributions come out of the same tree walk for bundle models
+        probability = np.zeros(n_rows)
+        contributions = np.full((n_rows, len(FEATURE_COLUMNS)), np.nan)
+        if inputs is not None:
+            probability[ok], contributions[ok] = _score(artifacts, inputs, risk_score[ok])
+
+    with timer.stage('explain'):
+        reasons = _top_reasons(contributions, ok, features)
+
+    with timer.stage('decision'):
+        results = _assemble_results(artifacts, risk_score, features[:, _AFFORDABILITY], probability,
+                                    reasons, errors)
+    return results
+
+
+def cascade_escalations(probability, risk_score, thresholds, margin):
+    """
+    Rows whose decision could change if their default probability moved by up
+    to margin: probability near a threshold that the risk score does not
+    already decide on its own.
+    """
+    near_reject = (np.abs(probability - thresholds['reject_probability']) < margin) & \
+        (risk_score <= thresholds['reject_risk_score'])
+    near_review = (np.abs(probability - thresholds['review_probability']) < margin) & \
+        (risk_score <= thresholds['review_risk_score'])
+    return near_reject | near_review
+
+
+def _model_scores(model, explainer, X):
+    """Default probabilities and per-feature contributions (NaN where the model cannot be explained)"""
+    if explainer is None:
+        return model.predict_proba(X)[:, 1], np.full(X.shape, np.nan)
+    if explainer is model:
+        return model.explain(X)
+    return model.predict_proba(X)[:, 1], explainer.contributions(X)[1]
+
+
+def _input_key(spec):
+    """'raw' (unscaled float32, for the histogram engines) or the key of the model's scaler"""
+    return 'raw' if spec.get('input', 'scaled') == 'raw' else spec.get('scaler_key', 'scaler')
+
+
+def _model_inputs(artifacts, features):
+    """Input rows per input key (see _input_key) the loaded models need"""
+    specs = [artifacts]
+    if artifacts.get('cascade') is not None:
+        specs.append(artifacts['cascade'])
+    inputs = {}
+    for spec in specs:
+        key = _input_key(spec)
+        if key in inputs:
+            continue
+        if key == 'raw':
+            inputs[key] = np.asarray(features, dtype=np.float32)
         else:
-            decision = 'APPROVE'
-        
-        return {
-            'riskScore': float(risk_score),
-            'affordabilityIndex': float(affordability),
-            'defaultProbability': float(probability),
-            'fraudProbability': float(probability * 0.8),  # Simplified
-            'decision': decision,
-            'confidence': float(max(probability, 1 - probability)),
-            'reasons': [
-                {'factor': 'DTI Ratio', 'weight': 0.30, 'impact': 'negative' if data['dtiRatio'] > 0.4 else 'positive'},
-                {'factor': 'Credit Score', 'weight': 0.25, 'impact': 'negative' if data['creditScore'] < 650 else 'positive'},
-                {'factor': 'Risk Score', 'weight': 0.20, 'impact': 'negative' if risk_score > 600 else 'positive'},
-            ]
-        }
-    except Exception as e:
-        return {'error': str(e)}
+            inputs[key] = spec['scaler'].transform(features)
+    return inputs
 
-if __name__ == '__main__':
+
+def _score(artifacts, inputs, risk_score):
+    """Probabilities and contributions; in cascade mode uncertain rows are re-scored by the main model"""
+    X = inputs[_input_key(artifacts)]
+    cascade = artifacts.get('cascade')
+    if cascade is None:
+        return _model_scores(artifacts['model'], artifacts.get('explainer'), X)
+
+    X_screen = inputs[_input_key(cascade)]
+    probability, contributions = _model_scores(cascade['model'], cascade['explainer'], X_screen)
+    escalate = cascade_escalations(probability, risk_score, artifacts['thresholds'], cascade['margin'])
+    if escalate.any():
+        probability[escalate], contributions[escalate] = _model_scores(
+            artifacts['model'], artifacts.get('explainer'), X[escalate])
+    return probability, contributions
+
+
+def _top_reasons(contributions, ok, features, k=REASON_COUNT):
+    """
+    The k largest feature contributions of every row as reasons entries.
+    weight is the feature's share of the row's total |contribution|; impact
+    is 'negative' when the feature pushes the default probability up.
+    """
+    magnitude = np.abs(contributions)
+    total = magnitude.sum(axis=1, keepdims=True)
+    share = np.divide(magnitude, total, out=np.zeros_like(magnitude), where=total > 0)
+    top = np.argsort(-magnitude, axis=1, kind='stable')[:, :k]
+
+    # Gather the top-k columns once and convert to Python values in bulk
+    labels = np.array([FEATURE_LABELS[column] for column in FEATURE_COLUMNS], dtype=object)[top].tolist()
+    weights = np.round(np.take_along_axis(share, top, axis=1), 4).tolist()
+    values = np.take_along_axis(contributions, top, axis=1)
+    impacts = np.where(values > 0, 'negative', 'positive').tolist()
+    values = values.tolist()
+    explained = ~np.isnan(total[:, 0])
+
+    reasons = []
+    for i in range(len(contributions)):
+        if not ok[i]:
+            reasons.append(None)
+        elif not explained[i]:
+            reasons.append(_rule_reasons(features[i, _DTI], features[i, _CREDIT], features[i, _RISK]))
+        else:
+            reasons.append([
+                {'factor': factor, 'weight': weight, 'impact': impact, 'contribution': value}
+                for factor, weight, impact, value in zip(labels[i], weights[i], impacts[i], values[i])
+            ])
+    return reasons
+
+
+def _rule_reasons(dti_ratio, credit_score, risk_score):
+    """Fixed reasons for models without contribution support (e.g. bundles from before explanations)"""
+    return [
+        {'factor': 'DTI Ratio', 'weight': 0.30, 'impact': 'negative' if dti_ratio > 0.4 else 'positive'},
+        {'factor': 'Credit Score', 'weight': 0.25, 'impact': 'negative' if credit_score < 650 else 'positive'},
+        {'factor': 'Risk Score', 'weight': 0.20, 'impact': 'negative' if risk_score > 600 else 'positive'},
+    ]
+
+
+def _assemble_results(artifacts, risk_score, affordability, probability, reasons, errors):
+    # Decision logic
+    thresholds = artifacts['thresholds']
+    decision = np.select(
+        [
+            (risk_score > thresholds['reject_risk_score']) | (probability > thresholds['reject_probability']),
+            (risk_score > thresholds['review_risk_score']) | (probability > thresholds['review_probability']),
+        ],
+        ['REJECT', 'REVIEW'],
+        default='APPROVE'
+    )
+    confidence = np.maximum(probability, 1 - probability)
+
+    results = []
+    for i in range(len(errors)):
+        if errors[i] is not None:
+            results.append({'error': errors[i]})
+            continue
+        results.append({
+            'riskScore': float(risk_score[i]),
+            'affordabilityIndex': float(affordability[i]),
+            'defaultProbability': float(probability[i]),
+            'fraudProbability': float(probability[i] * 0.8),  # Simplified
+            'decision': str(decision[i]),
+            'confidence': float(confidence[i]),
+            'reasons': reasons[i],
+        })
+    return results
+
+
+def cache_key(data):
+    """
+    Canonical, hashable form of an application: fields in FIELD_COLUMNS order,
+    numbers normalized, flags as features.py reads them, categories stripped.
+    None if the application cannot be cached (missing or malformed fields).
+    """
+    if not isinstance(data, dict):
+        return None
     try:
-        input_data = json.loads(sys.argv[1])
-        result = predict(input_data)
-        print(json.dumps(result))
+        return (
+            tuple(normalize_number(data[field]) for field in NUMERIC_FIELDS) +
+            tuple(flag_value(data[field]) for field in BINARY_FIELDS) +
+            tuple(str(data[field]).strip() for field in CATEGORICAL_FIELDS)
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def enable_cache(maxsize=10000, ttl=3600.0, models_dir=None):
+    """Put an LRU/TTL result cache in front of predict() for this process"""
+    global _cache
+    if models_dir is None:
+        models_dir = os.path.join(project_root, 'models')
+    _cache = PredictionCache(models_dir, maxsize=maxsize, ttl=ttl)
+    return _cache
+
+
+def predict(data, artifacts=None):
+    """
+    Score a single application (a one-row predict_batch call).
+    With timings enabled the result carries {'debug': {'timingsMs': {...}}}.
+    """
+    timer = StageTimer() if _histograms is not None else NULL_TIMER
+    start = time.perf_counter()
+    try:
+        if artifacts is None:
+            with timer.stage('load'):
+                artifacts = get_artifacts()
+
+        key = None
+        if _cache is not None:
+            with timer.stage('cache'):
+                key = cache_key(data)
+                cached = _cache.get(key, artifacts) if key is not None else None
+            if cached is not None:
+                return _with_timings(cached, timer, start)
+
+        result = predict_batch([data], artifacts, timer)[0]
+        if key is not None and 'error' not in result:
+            _cache.put(key, artifacts, result)
+        return _with_timings(result, timer, start)
     except Exception as e:
-        print(json.dumps({'error': 'Invalid input or execution error: ' + str(e)}))
+        return _with_timings({'error': str(e)}, timer, start)
+
+
+def _with_timings(result, timer, start):
+    if timer is NULL_TIMER:
+        return result
+    timer.add('total', time.perf_counter() - start)
+    _histograms.observe_timer(timer, 'single')
+    result['debug'] = {'timingsMs': timer.as_ms()}
+    return result
+
+
+# =============================================================================
+# RESIDENT SCORING MODE
+# =============================================================================
+# Requests are newline-delimited JSON objects of the form
+#   {"id": <any>, "data": {<application fields>}}
+# and each one produces exactly one response line
+#   {"id": <same id>, "result": {<predict() output>}}
+# so a caller can pipeline many requests over one process. Control requests
+#   {"id": <any>, "op": "health" | "cache" | "metrics" | "reload"}
+# are answered with {"id": <same id>, "result": {...}} as well; "metrics"
+# returns the stage histograms as {"prometheus": "<text format>"} and
+# "reload" the hot-reload counters.
+#
+# Each request scores with the model set current when it arrives, so a hot
+# reload never switches models under a running request.
+
+def health(artifacts):
+    """Health-check payload for the loaded model set"""
+    return {
+        'status': 'ok',
+        'model': artifacts['model_name'],
+        'modelVersion': artifacts['model_version'],
+        'cascade': _cascade_health(artifacts.get('cascade')),
+        'pid': os.getpid(),
+    }
+
+
+def _cascade_health(cascade):
+    if cascade is None:
+        return None
+    return {'screenModel': cascade['model_name'], 'margin': cascade['margin']}
+
+
+def handle_request(line, artifacts=None, ops=None):
+    """
+    Score one JSON-lines request and return the JSON response line.
+    artifacts defaults to the process-wide (hot-reloadable) model set.
+    ops maps extra control-request names to callables taking the request dict.
+    """
+    if artifacts is None:
+        artifacts = get_artifacts()
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return json.dumps({'id': None, 'error': 'Invalid JSON request: ' + str(e), 'invalid_request': True})
+
+    request_id = request.get('id') if isinstance(request, dict) else None
+
+    if isinstance(request, dict) and 'op' in request:
+        if ops and request['op'] in ops:
+            return json.dumps({'id': request_id, 'result': ops[request['op']](request)})
+        if request['op'] == 'health':
+            return json.dumps({'id': request_id, 'result': health(artifacts)})
+        if request['op'] == 'cache':
+            stats = _cache.stats() if _cache is not None else {'enabled': False}
+            return json.dumps({'id': request_id, 'result': stats})
+        if request['op'] == 'metrics':
+            return json.dumps({'id': request_id, 'result': {'prometheus': export_metrics()}})
+        if request['op'] == 'reload':
+            stats = _reloader.stats() if _reloader is not None else {'enabled': False}
+            return json.dumps({'id': request_id, 'result': stats})
+        return json.dumps({'id': request_id, 'error': f"Unknown op {request['op']!r}"})
+
+    if not isinstance(request, dict) or not isinstance(request.get('data'), dict):
+        return json.dumps({'id': request_id, 'error': 'Request must be an object with a "data" object',
+                           'invalid_request': True})
+
+    result = predict(request['data'], artifacts)
+    return json.dumps({'id': request_id, 'result': result})
+
+
+def serve_stream(infile, outfile, artifacts=None):
+    """Answer JSON-lines requests from infile until EOF"""
+    for line in infile:
+        if not line.strip():
+            continue
+        outfile.write(handle_request(line, artifacts) + '\n')
+        outfile.flush()
+
+
+def serve_socket(socket_path, artifacts=None):
+    """Answer JSON-lines requests on a Unix domain socket (one thread per connection)"""
+    import socketserver
+
+    class ScoringHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode('utf-8')
+                if not line.strip():
+                    continue
+                self.wfile.write((handle_request(line, artifacts) + '\n').encode('utf-8'))
+                self.wfile.flush()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, ScoringHandler)
+    server.daemon_threads = True
+    print(f'Scoring server listening on {socket_path}', file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve(socket_path=None, cache_size=0, cache_ttl=3600.0, timings=False, reload_interval=5.0,
+          cascade_margin=None):
+    """Load the models once, then score requests until stdin closes or the server stops"""
+    if timings:
+        enable_timings()
+    get_artifacts(cascade_margin)
+    if cache_size > 0:
+        enable_cache(cache_size, cache_ttl)
+    if reload_interval > 0:
+        enable_hot_reload(interval=reload_interval, cascade_margin=cascade_margin)
+    print('Scoring models loaded', file=sys.stderr, flush=True)
+    if socket_path:
+        serve_socket(socket_path)
+    else:
+        serve_stream(sys.stdin, sys.stdout)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Score loan applications')
+    parser.add_argument('payload', nargs='?', help='Single application as a JSON object')
+    parser.add_argument('--serve', action='store_true',
+                        help='Stay resident and score JSON-lines requests from stdin')
+    parser.add_argument('--socket', help='With --serve, listen on this Unix socket instead of stdin')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='With --serve, cache up to this many results (0 disables the cache)')
+    parser.add_argument('--cache-ttl', type=float, default=3600.0,
+                        help='Seconds a cached result stays valid')
+    parser.add_argument('--timings', action='store_true',
+                        help='Report per-stage timings under "debug" and keep stage histograms')
+    parser.add_argument('--reload-interval', type=float, default=5.0,
+                        help='With --serve, seconds between checks for retrained models (0 disables hot reload)')
+    parser.add_argument('--cascade', action='store_true',
+                        help='Screen with logistic regression and escalate only applications near a '
+                             'decision threshold to the main model')
+    parser.add_argument('--cascade-margin', type=float, default=DEFAULT_CASCADE_MARGIN,
+                        help='Probability distance from a threshold that escalates an application')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    cascade_margin = args.cascade_margin if args.cascade else None
+    if args.timings or os.environ.get('LENDGUARD_SCORING_TIMINGS') == '1':
+        enable_timings()
+    if args.serve:
+        serve(args.socket, args.cache_size, args.cache_ttl, args.timings, args.reload_interval,
+              cascade_margin)
+    else:
+        try:
+            input_data = json.loads(args.payload)
+            get_artifacts(cascade_margin)
+            result = predict(input_data)
+            print(json.dumps(result))
+        except Exception as e:
+            print(json.dumps({'error': 'Invalid input or execution error: ' + str(e)}))
@@ -0,0 +1,130 @@
+"""
+LRU + TTL cache of scoring results.
+
+Keys are canonicalized applications (see predict.cache_key). The cache
+empties itself when models/manifest.json changes (checked at most once per
+`check_interval` seconds) or when it is used with a different loaded model
+set, so a retrain never serves stale decisions. Like the model reloader it
+only watches the file written last, so reports and search results saved
+into models/ do not flush it.
+"""
+
+import copy
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from model_bundle import BUNDLE_FILENAME, MANIFEST_FILENAME
+
+
+def normalize_number(value):
+    """Canonical float for a numeric field: 35, 35.0 and "35" map to the same key"""
+    if isinstance(value, bool):
+        value = int(value)
+    number = float(value)
+    if math.isnan(number):
+        return 'nan'
+    return float(f'{number:.12g}')
+
+
+def models_fingerprint(models_dir):
+    """
+    (name, size, mtime) of the manifest, else of the scoring bundle; a model
+    set with neither (pickles only) falls back to every file in models_dir
+    """
+    for name in (MANIFEST_FILENAME, BUNDLE_FILENAME):
+        try:
+            stat = os.stat(os.path.join(models_dir, name))
+        except FileNotFoundError:
+            continue
+        return ((name, stat.st_size, stat.st_mtime_ns),)
+    entries = []
+    with os.scandir(models_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+class PredictionCache:
+    """Bounded LRU cache of predict() results with TTL and hit/miss counters"""
+
+    def __init__(self, models_dir, maxsize=10000, ttl=3600.0, check_interval=1.0):
+        self.models_dir = models_dir
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = models_fingerprint(models_dir)
+        self._next_check = time.monotonic() + check_interval
+        self._artifacts_id = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _clear(self):
+        self._entries.clear()
+        self.invalidations += 1
+
+    def _check_models(self, artifacts, now):
+        # Called with the lock held
+        if self._artifacts_id != id(artifacts):
+            if self._artifacts_id is not None:
+                self._clear()
+            self._artifacts_id = id(artifacts)
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            fingerprint = models_fingerprint(self.models_dir)
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                self._clear()
+
+    def get(self, key, artifacts):
+        """Cached result for key (a copy), or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_models(artifacts, now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, result = entry
+            if now >= expires:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, artifacts, result):
+        now = time.monotonic()
+        with self._lock:
+            self._check_models(artifacts, now)
+            self._entries[key] = (now + self.ttl, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,94 @@
+"""
+Per-stage wall-time instrumentation for the scoring path.
+
+StageTimer records how long each stage of one call took; StageHistograms
+accumulates those timings across calls in one process and renders them in
+the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+METRIC_NAME = 'lendguard_scoring_stage_seconds'
+
+# Upper bounds in seconds (Prometheus client defaults, with finer low end)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class StageTimer:
+    """Wall time per stage for one scoring call"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def as_ms(self):
+        return {name: round(seconds * 1000, 4) for name, seconds in self.seconds.items()}
+
+
+class NullTimer:
+    """Drop-in StageTimer that records nothing (instrumentation disabled)"""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def add(self, name, seconds):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageHistograms:
+    """Cumulative per-stage latency histograms, labelled by stage and call mode"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}  # (stage, mode) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, stage, mode, seconds):
+        with self._lock:
+            series = self._series.get((stage, mode))
+            if series is None:
+                series = self._series[(stage, mode)] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def observe_timer(self, timer, mode):
+        for stage, seconds in timer.seconds.items():
+            self.observe(stage, mode, seconds)
+
+    def export_prometheus(self):
+        """Histograms in Prometheus text format (version 0.0.4)"""
+        lines = [
+            f'# HELP {METRIC_NAME} Wall time spent in each scoring stage.',
+            f'# TYPE {METRIC_NAME} histogram',
+        ]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for (stage, mode), values in series:
+            labels = f'stage="{stage}",mode="{mode}"'
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {values[-2]:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {values[-1]}')
+        return '\n'.join(lines) + '\n'
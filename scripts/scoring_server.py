@@ -0,0 +1,336 @@
+"""
+Prefork scoring server.
+
+The parent process loads the scoring artifacts once, opens the listening
+socket and forks N workers. Workers inherit the loaded models: the scoring
+bundle is a read-only shared memory map and pickled models are shared
+copy-on-write (gc.freeze() keeps the garbage collector from dirtying their
+pages). Every worker accept()s on the same socket, so the kernel spreads
+connections across them. A worker that dies is re-forked from the parent
+without reloading anything.
+
+Protocol: the JSON-lines protocol of `predict.py --serve`. {"op": "health"}
+reports the answering worker's pid, uptime, requests served and in-flight
+requests; {"op": "cache"} reports that worker's result-cache counters and
+{"op": "metrics"} its stage-latency histograms (with --timings).
+
+Signals to the parent: SIGTERM/SIGINT stop gracefully (workers stop accepting
+and let their open connections finish), SIGHUP restarts the workers one at a time.
+
+Hot reload: the parent watches models/manifest.json. A retrained model set is
+loaded and canary-checked in the parent while the workers keep serving the
+old one, then the workers are restarted one at a time onto it; each old
+worker lets its open connections finish first.
+
+POSIX only (os.fork). Usage:
+    python scripts/scoring_server.py --workers 16 --port 8765
+    python scripts/scoring_server.py --workers 16 --socket /tmp/lendguard-scoring.sock
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+import predict
+from model_reload import ModelReloader
+from synthetic_applications import generate_applications
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger(__name__)
+
+# Seconds a stopping worker waits for its open connections to finish
+SHUTDOWN_GRACE_SECONDS = 10
+# A worker exiting sooner than this after start counts as a crash loop
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+MAX_RESPAWN_BACKOFF_SECONDS = 30.0
+# How often the parent checks for exited workers and due model reloads
+SUPERVISE_INTERVAL_SECONDS = 0.2
+
+
+class WorkerState:
+    """Per-worker counters (created in the child after fork)"""
+
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self.started = time.time()
+        self.requests = 0
+        self.inflight = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def health(self, request):
+        with self.lock:
+            requests, inflight = self.requests, self.inflight
+        return dict(
+            predict.health(self.artifacts),
+            uptimeSeconds=round(time.time() - self.started, 3),
+            requestsServed=requests,
+            inflight=inflight,
+        )
+
+
+_worker = None
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """One client connection inside a worker; requests are answered in order"""
+
+    def setup(self):
+        super().setup()
+        with _worker.lock:
+            _worker.connections += 1
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            with _worker.lock:
+                _worker.connections -= 1
+
+    def handle(self):
+        ops = {'health': _worker.health}
+        for raw in self.rfile:
+            line = raw.decode('utf-8')
+            if not line.strip():
+                continue
+            with _worker.lock:
+                _worker.inflight += 1
+            try:
+                response = predict.handle_request(line, _worker.artifacts, ops)
+            finally:
+                with _worker.lock:
+                    _worker.inflight -= 1
+                    _worker.requests += 1
+            self.wfile.write((response + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _run_worker(server, artifacts):
+    """
+    Worker main loop: serve until SIGTERM, then stop accepting, close this
+    worker's copy of the listener and let open connections finish
+    """
+    global _worker
+    _worker = WorkerState(artifacts)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    while not stop.wait(1.0):
+        if not thread.is_alive():
+            raise RuntimeError('accept loop stopped unexpectedly')
+
+    server.shutdown()
+    # New connections go to the other workers (the parent keeps the socket open)
+    server.socket.close()
+    deadline = time.time() + SHUTDOWN_GRACE_SECONDS
+    while time.time() < deadline:
+        with _worker.lock:
+            if _worker.connections == 0:
+                break
+        time.sleep(0.05)
+
+
+class PreforkServer:
+    """Parent process: owns the models and the listening socket, supervises workers"""
+
+    def __init__(self, server, artifacts, n_workers, reloader=None):
+        self.server = server
+        self.artifacts = artifacts
+        self.n_workers = n_workers
+        self.reloader = reloader
+        self.workers = {}  # pid -> start time
+        self.to_restart = []
+        self.stopping = False
+        self.backoff = 0.0
+        # Crashed workers waiting for their respawn deadline
+        self.respawns = 0
+        self.respawn_at = 0.0
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.server, self.artifacts)
+            except BaseException:
+                logger.exception(f'Worker {os.getpid()} failed')
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.time()
+        logger.info(f'Worker {pid} started')
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        logger.info('Shutting down workers...')
+        self.stopping = True
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+
+    def _rolling_restart(self, signum, frame):
+        logger.info('Restarting workers one at a time...')
+        self.to_restart = list(self.workers)
+        self._restart_next()
+
+    def _restart_next(self):
+        while self.to_restart:
+            pid = self.to_restart.pop(0)
+            if pid in self.workers:
+                self._signal(pid, signal.SIGTERM)
+                return
+
+    def swap_artifacts(self, artifacts):
+        """Serve a reloaded model set: later forks inherit it, current workers are rolled over"""
+        self.artifacts = artifacts
+        gc.collect()
+        gc.freeze()
+        self._rolling_restart(None, None)
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._rolling_restart)
+
+        for _ in range(self.n_workers):
+            self.spawn()
+
+        while self.workers or (self.respawns and not self.stopping):
+            if self.reloader is not None and not self.stopping:
+                self.reloader.poll()
+            if self.respawns and not self.stopping and time.time() >= self.respawn_at:
+                for _ in range(self.respawns):
+                    self.spawn()
+                self.respawns = 0
+                self._restart_next()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG) if self.workers else (0, 0)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(SUPERVISE_INTERVAL_SECONDS)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                logger.info(f'Worker {pid} stopped')
+                continue
+
+            if code != 0:
+                logger.warning(f'Worker {pid} exited with code {code}, restarting')
+            if time.time() - started < MIN_WORKER_LIFETIME_SECONDS:
+                self.backoff = min(max(self.backoff * 2, 0.5), MAX_RESPAWN_BACKOFF_SECONDS)
+                logger.warning(f'Worker crash loop, respawning in {self.backoff:.1f}s')
+            else:
+                self.backoff = 0.0
+            # Respawned from the loop above, which keeps reaping and reloading meanwhile
+            self.respawns += 1
+            self.respawn_at = max(self.respawn_at, time.time() + self.backoff)
+
+        self.server.server_close()
+        logger.info('Scoring server stopped')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prefork loan scoring server')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--models-dir', default=None)
+    parser.add_argument('--model', default=None, help='Model name (default: bundle default model)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='Per-worker result cache entries (0 disables the cache)')
+    parser.add_argument('--cache-ttl', type=float, default=3600.0)
+    parser.add_argument('--timings', action='store_true',
+                        help='Report per-stage timings under "debug" and keep stage histograms')
+    parser.add_argument('--reload-interval', type=float, default=5.0,
+                        help='Seconds between checks for retrained models (0 disables hot reload)')
+    parser.add_argument('--cascade', action='store_true',
+                        help='Screen with logistic regression and escalate only applications near a '
+                             'decision threshold to the main model')
+    parser.add_argument('--cascade-margin', type=float, default=predict.DEFAULT_CASCADE_MARGIN,
+                        help='Probability distance from a threshold that escalates an application')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        sys.exit('scoring_server.py needs os.fork (POSIX); use predict.py --serve instead')
+
+    if args.timings:
+        predict.enable_timings()
+    cascade_margin = args.cascade_margin if args.cascade else None
+    artifacts = predict.load_artifacts(args.models_dir, args.model, cascade_margin)
+    # Run one batch so lazy initialisation happens before fork, then freeze the
+    # loaded objects out of the GC so workers don't copy their pages
+    predict.predict_batch(generate_applications(64), artifacts)
+    if args.cache_size > 0:
+        predict.enable_cache(args.cache_size, args.cache_ttl, args.models_dir)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Loaded {artifacts['model_name']} from {artifacts['source']}")
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = ThreadingUnixServer(args.socket, WorkerHandler)
+        address = args.socket
+    else:
+        server = ThreadingTCPServer((args.host, args.port), WorkerHandler)
+        address = f'{args.host}:{server.server_address[1]}'
+    logger.info(f'Listening on {address} with {args.workers} workers')
+
+    prefork = PreforkServer(server, artifacts, args.workers)
+    if args.reload_interval > 0:
+        models_dir = args.models_dir or os.path.join(predict.project_root, 'models')
+        prefork.reloader = ModelReloader(
+            models_dir,
+            load=lambda: predict.load_artifacts(args.models_dir, args.model, cascade_margin),
+            validate=predict.validate_artifacts,
+            swap=prefork.swap_artifacts,
+            interval=args.reload_interval,
+        )
+
+    try:
+        prefork.run()
+    finally:
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
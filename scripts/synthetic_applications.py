@@ -0,0 +1,39 @@
+"""
+Synthetic loan applications with the fields predict() reads.
+Value ranges follow Datasets/Loan_default.csv (InterestRate in percent,
+LoanTerm in months), so scores land in realistic regions of the models.
+"""
+
+import numpy as np
+
+EDUCATION = ["Bachelor's", 'High School', "Master's", 'PhD']
+EMPLOYMENT_TYPES = ['Full-time', 'Part-time', 'Self-employed', 'Unemployed']
+MARITAL_STATUSES = ['Divorced', 'Married', 'Single']
+LOAN_PURPOSES = ['Auto', 'Business', 'Education', 'Home', 'Other']
+LOAN_TERMS = [12, 24, 36, 48, 60]
+
+
+def generate_applications(n, seed=0):
+    """Return n application dicts shaped like the /api/ml/predict request body"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'age': rng.integers(18, 70, n),
+        'income': rng.integers(15000, 150000, n),
+        'loanAmount': rng.integers(5000, 250000, n),
+        'loanTerm': rng.choice(LOAN_TERMS, n),
+        'interestRate': np.round(rng.uniform(2, 25, n), 2),
+        'creditScore': rng.integers(300, 850, n),
+        'dtiRatio': np.round(rng.uniform(0.1, 0.9, n), 2),
+        'numCreditLines': rng.integers(1, 5, n),
+        'monthsEmployed': rng.integers(0, 120, n),
+        'hasMortgage': rng.random(n) < 0.5,
+        'hasDependents': rng.random(n) < 0.5,
+        'hasCoSigner': rng.random(n) < 0.5,
+        'education': rng.choice(EDUCATION, n),
+        'employmentType': rng.choice(EMPLOYMENT_TYPES, n),
+        'maritalStatus': rng.choice(MARITAL_STATUSES, n),
+        'loanPurpose': rng.choice(LOAN_PURPOSES, n),
+    }
+    # Plain Python values so the records are JSON-serializable like real requests
+    lists = {field: values.tolist() for field, values in columns.items()}
+    return [{field: lists[field][i] for field in lists} for i in range(n)]
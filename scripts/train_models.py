@@ -1,139 +1,279 @@
-import pandas as pd
+"""
+Train the loan default models and write every scoring artifact to models/.
+
+The candidate models are fitted concurrently, each in its own process, within
+a worker (core) budget. model_metrics.json records, next to the accuracy
+metrics, each model's fit time, inference throughput on the test split and
+the peak RSS of the process that fitted it.
+
+The engineered feature matrix comes from the feature store in dataset.py,
+so retraining on an unchanged dataset skips CSV parsing and feature building.
+
+Besides the default exact-split models, two histogram boosting engines can
+be trained with --models (sklearn HistGradientBoostingClassifier and XGBoost
+tree_method='hist'). They train on the unscaled float32 features, bin them,
+and split natively on the encoded categorical columns; predict.py feeds every
+model the input kind recorded for it in the bundle. The run ends with a
+fit-time / ROC-AUC table of all trained models. The models trained replace
+the whole model set of --models-dir, so a directory holding other trained
+models is refused (train them into a separate --models-dir).
+
+Usage (from the project root):
+    python scripts/train_models.py [--workers 8] [--refresh-features] [--search-results models/hyperparameter_search.json]
+    python scripts/train_models.py --models gradient_boosting hist_gradient_boosting xgboost_hist --models-dir models/hist
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
 import numpy as np
-import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from xgboost import XGBClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-import json
-from pathlib import Path
+from threadpoolctl import threadpool_limits
+
+from dataset import DEFAULT_CACHE_DIR, load_feature_table
+from features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from model_bundle import (ENCODER_FILES, atomic_dump, atomic_dump_json, build_bundle, model_input, scaler_filename,
+                          write_manifest)
+from predict import DECISION_THRESHOLDS
+
+# Trained unless --models names others
+DEFAULT_MODELS = ['logistic_regression', 'random_forest', 'gradient_boosting', 'xgboost']
+# Opt-in through --models
+HISTOGRAM_MODELS = ['hist_gradient_boosting', 'xgboost_hist']
+
+# Models that use more than one core when given n_jobs (or threads)
+MULTITHREADED_MODELS = ['random_forest', 'xgboost', 'hist_gradient_boosting', 'xgboost_hist']
+
+# The label-encoded columns, split natively as categories by the histogram engines
+CATEGORICAL_FEATURE_INDICES = [FEATURE_COLUMNS.index(f'{column}_Encoded') for column in CATEGORICAL_COLUMNS]
+
+
+def build_models(overrides=None, names=None):
+    """
+    The candidate models named in names (default DEFAULT_MODELS); overrides
+    maps model name -> parameters (e.g. search winners)
+    """
+    models = {
+        'logistic_regression': LogisticRegression(max_iter=1000, random_state=42),
+        'random_forest': RandomForestClassifier(n_estimators=100, max_depth=15, random_state=42),
+        'gradient_boosting': GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=42),
+        'xgboost': XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=8, random_state=42),
+        'hist_gradient_boosting': HistGradientBoostingClassifier(
+            max_iter=200, learning_rate=0.1, max_bins=255,
+            categorical_features=CATEGORICAL_FEATURE_INDICES, random_state=42),
+        'xgboost_hist': XGBClassifier(
+            tree_method='hist', max_bin=256, n_estimators=200, learning_rate=0.05, max_depth=8,
+            enable_categorical=True, max_cat_to_onehot=1,
+            feature_types=['c' if i in CATEGORICAL_FEATURE_INDICES else 'q' for i in range(len(FEATURE_COLUMNS))],
+            random_state=42),
+    }
+    for name, params in (overrides or {}).items():
+        models[name].set_params(**params)
+    return {name: model for name, model in models.items() if name in (names or DEFAULT_MODELS)}
+
+
+def search_overrides(path):
+    """Winning parameters per model from a hyperparameter_search.py results file"""
+    with open(path) as f:
+        return {name: best['params'] for name, best in json.load(f)['best'].items()}
+
+
+def thread_budget(names, workers):
+    """
+    Split `workers` cores between concurrent fits: one core per model, spare
+    cores to the models that can use them. Returns (concurrent fits, threads per model).
+    """
+    threads = {name: 1 for name in names}
+    multithreaded = [name for name in MULTITHREADED_MODELS if name in names]
+    for i in range(max(workers - len(names), 0)):
+        if multithreaded:
+            threads[multithreaded[i % len(multithreaded)]] += 1
+    return max(min(workers, len(names)), 1), threads
+
+
+def fit_model(name, model, threads, X_train, y_train, X_test, y_test):
+    """Fit and evaluate one model in a fresh process; returns (name, fitted model, metrics)"""
+    if name in MULTITHREADED_MODELS and 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=threads)
+
+    with threadpool_limits(limits=threads):
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        # Predictions
+        start = time.perf_counter()
+        y_proba = model.predict_proba(X_test)[:, 1]
+        predict_seconds = time.perf_counter() - start
+        y_pred = model.predict(X_test)
 
-# Create models directory
-Path('models').mkdir(exist_ok=True)
-
-# Load dataset
-print('Loading dataset...')
-# Adjusted path based on file exploration
-df = pd.read_csv('Datasets/Loan_default.csv')
-
-print(f'Dataset shape: {df.shape}')
-print(f'Columns: {df.columns.tolist()}')
-
-# Feature Engineering: RiskScore
-def calculate_risk_score(row):
-    score = (
-        (row['DTIRatio'] * 300) +
-        (row['LoanAmount'] / row['Income'] * 250) +
-        ((850 - row['CreditScore']) / 850 * 200) +
-        (row['InterestRate'] * 10 * 150) +
-        (1 / (row['MonthsEmployed'] + 1) * 100)
-    )
-    return min(max(score, 0), 1000)  # Clamp to 0-1000
-
-# Feature Engineering: AffordabilityIndex
-def calculate_affordability_index(row):
-    monthly_payment = row['LoanAmount'] * (row['InterestRate']/12) / (1 - (1 + row['InterestRate']/12)**(-row['LoanTerm']))
-    affordability = (row['Income'] * (1 - row['DTIRatio'])) / (monthly_payment * row['LoanTerm']) * 10
-    return min(max(affordability, 0), 10)  # Clamp to 0-10
-
-print('Engineering features...')
-df['RiskScore'] = df.apply(calculate_risk_score, axis=1)
-df['AffordabilityIndex'] = df.apply(calculate_affordability_index, axis=1)
-
-# Encode categorical variables
-le_education = LabelEncoder()
-le_employment = LabelEncoder()
-le_marital = LabelEncoder()
-le_purpose = LabelEncoder()
-
-df['Education_Encoded'] = le_education.fit_transform(df['Education'])
-df['EmploymentType_Encoded'] = le_employment.fit_transform(df['EmploymentType'])
-df['MaritalStatus_Encoded'] = le_marital.fit_transform(df['MaritalStatus'])
-df['LoanPurpose_Encoded'] = le_purpose.fit_transform(df['LoanPurpose'])
-
-# Map binary features
-binary_map = {'Yes': 1, 'No': 0}
-df['HasMortgage'] = df['HasMortgage'].map(binary_map)
-df['HasDependents'] = df['HasDependents'].map(binary_map)
-df['HasCoSigner'] = df['HasCoSigner'].map(binary_map)
-
-# Select features
-feature_cols = [
-    'Age', 'Income', 'LoanAmount', 'LoanTerm', 'InterestRate',
-    'CreditScore', 'DTIRatio', 'NumCreditLines', 'MonthsEmployed',
-    'HasMortgage', 'HasDependents', 'HasCoSigner',
-    'Education_Encoded', 'EmploymentType_Encoded', 'MaritalStatus_Encoded', 'LoanPurpose_Encoded',
-    'RiskScore', 'AffordabilityIndex'
-]
-
-X = df[feature_cols]
-y = df['Default']
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
-
-print(f'Training set: {X_train.shape}')
-print(f'Test set: {X_test.shape}')
-print(f'Default rate in training: {y_train.mean():.2%}')
-
-# Scale features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Save scaler and encoders
-joblib.dump(scaler, 'models/scaler.pkl')
-joblib.dump(le_education, 'models/le_education.pkl')
-joblib.dump(le_employment, 'models/le_employment.pkl')
-joblib.dump(le_marital, 'models/le_marital.pkl')
-joblib.dump(le_purpose, 'models/le_purpose.pkl')
-
-print('Scaler and encoders saved.')
-
-# Train models
-models = {
-    'logistic_regression': LogisticRegression(max_iter=1000, random_state=42),
-    'random_forest': RandomForestClassifier(n_estimators=100, max_depth=15, random_state=42),
-    'gradient_boosting': GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=42),
-    'xgboost': XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=8, random_state=42)
-}
-
-results = {}
-
-for name, model in models.items():
-    print(f'\nTraining {name}...')
-    model.fit(X_train_scaled, y_train)
-    
-    # Predictions
-    y_pred = model.predict(X_test_scaled)
-    y_proba = model.predict_proba(X_test_scaled)[:, 1]
-    
     # Metrics
     metrics = {
         'accuracy': accuracy_score(y_test, y_pred),
         'precision': precision_score(y_test, y_pred),
         'recall': recall_score(y_test, y_pred),
         'f1_score': f1_score(y_test, y_pred),
-        'roc_auc': roc_auc_score(y_test, y_proba)
+        'roc_auc': roc_auc_score(y_test, y_proba),
+        'fit_seconds': fit_seconds,
+        'predict_rows_per_s': len(X_test) / predict_seconds,
+        # ru_maxrss is in KiB on Linux; the process only ever fitted this model
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'threads': threads,
+    }
+    return name, model, metrics
+
+
+def train_all(models, workers, inputs, y_train, y_test):
+    """
+    Fit every model concurrently within the worker budget; returns (trained, metrics).
+    inputs maps input kind ('scaled'/'raw', see model_bundle.model_input) -> (X_train, X_test).
+    """
+    concurrent, threads = thread_budget(list(models), workers)
+    print(f'\nTraining {len(models)} models, {concurrent} at a time on {workers} cores...')
+
+    trained, results = {}, {}
+    # One fresh process per model so peak RSS is that model's alone
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=concurrent, mp_context=context, max_tasks_per_child=1) as pool:
+        futures = [
+            pool.submit(fit_model, name, model, threads[name], inputs[model_input(name)][0], y_train,
+                        inputs[model_input(name)][1], y_test)
+            for name, model in models.items()
+        ]
+        for future in as_completed(futures):
+            name, model, metrics = future.result()
+            trained[name] = model
+            results[name] = metrics
+
+            metrics['input'] = model_input(name)
+            print(f'\n{name} ({metrics["threads"]} thread(s)):')
+            print(f'Accuracy: {metrics["accuracy"]:.4f}')
+            print(f'Precision: {metrics["precision"]:.4f}')
+            print(f'Recall: {metrics["recall"]:.4f}')
+            print(f'F1-Score: {metrics["f1_score"]:.4f}')
+            print(f'ROC-AUC: {metrics["roc_auc"]:.4f}')
+            print(f'Fit: {metrics["fit_seconds"]:.2f}s  '
+                  f'Inference: {metrics["predict_rows_per_s"]:,.0f} rows/s  '
+                  f'Peak RSS: {metrics["peak_rss_mb"]:.0f} MB')
+
+    # Keep the configured model order
+    return ({name: trained[name] for name in models}, {name: results[name] for name in models})
+
+
+def other_trained_models(models_dir, names):
+    """Models recorded in models_dir/model_metrics.json that are not in names"""
+    try:
+        with open(os.path.join(models_dir, 'model_metrics.json')) as f:
+            return sorted(set(json.load(f)) - set(names))
+    except FileNotFoundError:
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the loan default models')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Cores shared by the concurrent model fits')
+    parser.add_argument('--data', default='Datasets/Loan_default.csv')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--feature-cache', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--refresh-features', action='store_true',
+                        help='Rebuild the cached feature matrix even if the dataset is unchanged')
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS, choices=DEFAULT_MODELS + HISTOGRAM_MODELS,
+                        help=f"Models to train (default: {' '.join(DEFAULT_MODELS)})")
+    parser.add_argument('--search-results', default=None,
+                        help='hyperparameter_search.py results whose winning parameters replace the defaults')
+    args = parser.parse_args()
+    models_dir = args.models_dir
+
+    # A run rewrites model_metrics.json, the bundle and the manifest with the models it trains only
+    others = other_trained_models(models_dir, args.models)
+    if others:
+        parser.error(f"{models_dir} also holds {', '.join(others)}, which this run would drop "
+                     f"from the model set; pass them in --models or use a separate --models-dir")
+
+    # Create models directory
+    Path(models_dir).mkdir(exist_ok=True)
+
+    # Load dataset and engineered features (typed CSV read + feature cache, see dataset.py)
+    print('Loading dataset...')
+    X, y, categories, meta = load_feature_table(args.data, args.feature_cache, refresh=args.refresh_features)
+    print(f"Feature matrix: {X.shape} (cache {meta['cache']}, {meta['dropped_rows']} rows dropped)")
+
+    # Encoders carry the classes the features were encoded with (shared with predict.py, see features.py)
+    encoders = {}
+    for column in CATEGORICAL_COLUMNS:
+        encoders[column] = LabelEncoder()
+        encoders[column].classes_ = np.array(categories[column], dtype=object)
+    feature_cols = FEATURE_COLUMNS
+
+    # Train/test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+
+    print(f'Training set: {X_train.shape}')
+    print(f'Test set: {X_test.shape}')
+    print(f'Default rate in training: {y_train.mean():.2%}')
+
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Save scaler and encoders (atomically: running scorers may be reading models/)
+    atomic_dump(scaler, os.path.join(models_dir, 'scaler.pkl'))
+    for column, filename in ENCODER_FILES.items():
+        atomic_dump(encoders[column], os.path.join(models_dir, filename))
+
+    print('Scaler and encoders saved.')
+
+    # Train models
+    overrides = search_overrides(args.search_results) if args.search_results else None
+    if overrides:
+        print(f'Using searched parameters from {args.search_results}')
+    models = build_models(overrides, args.models)
+    # Histogram engines take the unscaled features as binned float32
+    inputs = {
+        'scaled': (X_train_scaled, X_test_scaled),
+        'raw': (X_train.to_numpy(dtype=np.float32), X_test.to_numpy(dtype=np.float32)),
     }
-    
-    results[name] = metrics
-    
-    print(f'Accuracy: {metrics["accuracy"]:.4f}')
-    print(f'Precision: {metrics["precision"]:.4f}')
-    print(f'Recall: {metrics["recall"]:.4f}')
-    print(f'F1-Score: {metrics["f1_score"]:.4f}')
-    print(f'ROC-AUC: {metrics["roc_auc"]:.4f}')
-    
-    # Save model
-    joblib.dump(model, f'models/{name}.pkl')
-    print(f'Model saved: models/{name}.pkl')
-
-# Save results
-with open('models/model_metrics.json', 'w') as f:
-    json.dump(results, f, indent=2)
-
-print('\n✅ All models trained and saved successfully!')
-print('\n📊 Best model:', max(results, key=lambda x: results[x]['roc_auc']))
+    trained, results = train_all(models, args.workers, inputs, y_train, y_test)
+    for name, model in trained.items():
+        atomic_dump(model, os.path.join(models_dir, f'{name}.pkl'))
+        # Refitted on the new scaler.pkl: drop the scaler an incremental run kept for it
+        if os.path.exists(os.path.join(models_dir, scaler_filename(name))):
+            os.remove(os.path.join(models_dir, scaler_filename(name)))
+        print(f'Model saved: {models_dir}/{name}.pkl')
+
+    # Save results
+    atomic_dump_json(results, os.path.join(models_dir, 'model_metrics.json'))
+
+    # Single memory-mappable bundle read by predict.py
+    # (tree ensembles are flattened and parity-checked against the library on the test split)
+    bundle_path = build_bundle(models_dir, scaler, encoders, trained, feature_cols, DECISION_THRESHOLDS,
+                               check_rows={kind: test_rows for kind, (_, test_rows) in inputs.items()})
+    print(f'Scoring bundle saved: {bundle_path}')
+
+    # Written last: scorers hot-reload the new model set once the manifest changes
+    manifest = write_manifest(models_dir)
+    print(f"Model manifest saved: {models_dir}/manifest.json (version {manifest['model_version']})")
+
+    print(f"\n{'Model':<22} {'input':<6} {'fit (s)':>8}  ROC-AUC")
+    for name, metrics in results.items():
+        print(f"{name:<22} {metrics['input']:<6} {metrics['fit_seconds']:8.2f}  {metrics['roc_auc']:.4f}")
+
+    print('\n✅ All models trained and saved successfully!')
+    print('\n📊 Best model:', max(results, key=lambda x: results[x]['roc_auc']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+Flat-array tree ensembles and a pure-NumPy evaluator.
+
+A trained GradientBoostingClassifier, RandomForestClassifier or XGBClassifier
+is exported into five parallel node arrays (feature, threshold, left, right,
+value) plus a default-direction flag for missing values. All trees share the
+arrays; `roots` holds the index of each tree's root node. Leaves point to
+themselves, so every row walks exactly `max_depth` steps and a whole batch is
+scored with a handful of array operations per level.
+
+Thresholds are stored so that `x <= threshold` sends a row left for every
+library (XGBoost's strict `x < split` is converted to the next float32 below
+the split), and rows are compared in float32 as the libraries do.
+
+An optional `expected` array holds every node's cover-weighted mean leaf
+value. With it, contributions() attributes each prediction to the features
+along its decision paths (Saabas-style): every split adds the change in
+expected value between a node and the child the row takes to the split's
+feature, so bias + sum(contributions) equals the raw ensemble output.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+NODE_ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'default_left', 'roots']
+# Stored when present; bundles written before explanations existed lack them
+EXPLAIN_ARRAYS = ['expected']
+
+# Maximum |library - flat| probability difference accepted by check_parity()
+PARITY_TOLERANCE = 1e-6
+
+
+class FlatTreeEnsemble:
+    """Tree ensemble evaluated from flat node arrays"""
+
+    def __init__(self, feature, threshold, left, right, value, default_left, roots,
+                 base_score, link, max_depth, expected=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.roots = roots
+        self.base_score = float(base_score)
+        self.link = link
+        self.max_depth = int(max_depth)
+        self.expected = expected
+        self.has_missing = bool(np.any(default_left))
+        self.chunk_rows = 256
+        # Interleaved (left, right) pairs: one gather per level instead of two
+        self._children = np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self._roots = np.asarray(roots, dtype=np.intp)
+
+    def apply(self, X):
+        """Leaf index reached by every row in every tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        leaves = np.empty((n_rows, len(self.roots)), dtype=np.intp)
+        # Row chunks keep the (rows x trees) working set in cache
+        for start in range(0, n_rows, self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            flat = chunk.ravel()
+            row_base = (np.arange(chunk.shape[0], dtype=np.intp) * n_features)[:, None]
+            node = np.repeat(self._roots[None, :], chunk.shape[0], axis=0)
+            for _ in range(self.max_depth):
+                x = flat[row_base + self.feature[node]]
+                go_right = ~(x <= self.threshold[node])
+                if self.has_missing:
+                    go_right &= ~(np.isnan(x) & (self.default_left[node] != 0))
+                node = self._children[2 * node + go_right]
+            leaves[start:start + chunk.shape[0]] = node
+        return leaves
+
+    def contributions(self, X):
+        """
+        (bias, contributions): per-row, per-feature share of the raw output,
+        shape (n_rows, n_features), with bias + contributions.sum(axis=1) equal
+        to decision_function(X). Needs the `expected` node array.
+        """
+        if self.expected is None:
+            raise ValueError('This ensemble was exported without node expected values')
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        bias = self.base_score + float(self.expected[self._roots].sum())
+        contributions = np.zeros((n_rows, n_features))
+        for start in range(0, n_rows, self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            n_chunk = chunk.shape[0]
+            flat = chunk.ravel()
+            row_base = (np.arange(n_chunk, dtype=np.intp) * n_features)[:, None]
+            node = np.repeat(self._roots[None, :], n_chunk, axis=0)
+            totals = np.zeros(n_chunk * n_features)
+            for _ in range(self.max_depth):
+                slot = row_base + self.feature[node]
+                x = flat[slot]
+                go_right = ~(x <= self.threshold[node])
+                if self.has_missing:
+                    go_right &= ~(np.isnan(x) & (self.default_left[node] != 0))
+                child = self._children[2 * node + go_right]
+                # Leaves point to themselves, so finished paths add zero
+                delta = self.expected[child] - self.expected[node]
+                totals += np.bincount(slot.ravel(), weights=delta.ravel(), minlength=totals.size)
+                node = child
+            contributions[start:start + n_chunk] = totals.reshape(n_chunk, n_features)
+        return bias, contributions
+
+    def explain(self, X):
+        """(positive-class probability, contributions) from a single walk of the trees"""
+        bias, contributions = self.contributions(X)
+        return self._probability(bias + contributions.sum(axis=1)), contributions
+
+    def decision_function(self, X):
+        """Raw ensemble output (log-odds for boosted models)"""
+        return self.base_score + self.value[self.apply(X)].sum(axis=1)
+
+    def predict_proba(self, X):
+        p = self._probability(self.decision_function(X))
+        return np.column_stack([1 - p, p])
+
+    def _probability(self, raw):
+        if self.link == 'logit':
+            return 1.0 / (1.0 + np.exp(-raw))
+        return raw
+
+    def to_arrays(self):
+        """(spec, arrays) for storing the ensemble in the scoring bundle"""
+        spec = {'base_score': self.base_score, 'link': self.link, 'max_depth': self.max_depth}
+        arrays = {name: getattr(self, name) for name in NODE_ARRAYS + EXPLAIN_ARRAYS}
+        return spec, {name: array for name, array in arrays.items() if array is not None}
+
+    @classmethod
+    def from_arrays(cls, spec, arrays):
+        return cls(*(arrays[name] for name in NODE_ARRAYS),
+                   base_score=spec['base_score'], link=spec['link'], max_depth=spec['max_depth'],
+                   expected=arrays.get('expected'))
+
+
+def _max_depth(left, right, roots):
+    depth = 0
+    frontier = np.asarray(roots)
+    while True:
+        internal = frontier[left[frontier] != frontier]
+        if internal.size == 0:
+            return depth
+        frontier = np.concatenate([left[internal], right[internal]])
+        depth += 1
+
+
+def _expected_values(left, right, value, cover, roots):
+    """Cover-weighted mean leaf value below every node (leaves: their own value)"""
+    expected = np.asarray(value, dtype=np.float64).copy()
+    levels = []
+    frontier = np.asarray(roots)
+    while True:
+        internal = frontier[left[frontier] != frontier]
+        if internal.size == 0:
+            break
+        levels.append(internal)
+        frontier = np.concatenate([left[internal], right[internal]])
+    for internal in reversed(levels):
+        l, r = left[internal], right[internal]
+        weight = cover[l] + cover[r]
+        mean = (expected[l] + expected[r]) / 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weighted = (cover[l] * expected[l] + cover[r] * expected[r]) / weight
+        expected[internal] = np.where(weight > 0, weighted, mean)
+    return expected
+
+
+def _assemble(trees, base_score, link):
+    """
+    Concatenate per-tree node lists into one flat ensemble.
+    Each tree is (feature, threshold, left, right, value, default_left, cover)
+    with local child indices and -1 for leaves.
+    """
+    columns = {name: [] for name in NODE_ARRAYS}
+    covers = []
+    offset = 0
+    for feature, threshold, left, right, value, default_left, cover in trees:
+        n_nodes = len(feature)
+        local = np.arange(n_nodes)
+        leaf = left < 0
+        columns['feature'].append(np.where(leaf, 0, feature))
+        columns['threshold'].append(np.where(leaf, 0.0, threshold))
+        columns['left'].append(np.where(leaf, local, left) + offset)
+        columns['right'].append(np.where(leaf, local, right) + offset)
+        columns['value'].append(np.where(leaf, value, 0.0))
+        columns['default_left'].append(np.where(leaf, 0, default_left))
+        columns['roots'].append([offset])
+        covers.append(np.asarray(cover, dtype=np.float64))
+        offset += n_nodes
+
+    dtypes = {
+        'feature': np.int32, 'threshold': np.float64, 'left': np.int32, 'right': np.int32,
+        'value': np.float64, 'default_left': np.uint8, 'roots': np.int32,
+    }
+    arrays = {name: np.concatenate(columns[name]).astype(dtypes[name]) for name in NODE_ARRAYS}
+    max_depth = _max_depth(arrays['left'], arrays['right'], arrays['roots'])
+    expected = _expected_values(arrays['left'], arrays['right'], arrays['value'],
+                                np.concatenate(covers), arrays['roots'])
+    return FlatTreeEnsemble(**arrays, base_score=base_score, link=link, max_depth=max_depth,
+                            expected=expected)
+
+
+def _sklearn_tree(tree, leaf_value):
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+    return (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            leaf_value, missing_left, tree.weighted_n_node_samples)
+
+
+def _calibrate_base(model, ensemble, n_features):
+    """Initial raw prediction: library raw output minus the summed tree values at one row"""
+    x0 = np.zeros((1, n_features), dtype=np.float32)
+    if hasattr(model, 'get_booster'):
+        raw = model.predict(x0, output_margin=True)[0]
+    else:
+        raw = model.decision_function(x0)[0]
+    return float(raw - ensemble.value[ensemble.apply(x0)].sum())
+
+
+def export_gradient_boosting(model):
+    """sklearn GradientBoostingClassifier (binary) -> FlatTreeEnsemble"""
+    if model.estimators_.shape[1] != 1:
+        raise ValueError('Only binary GradientBoostingClassifier models can be exported')
+    trees = [
+        _sklearn_tree(est.tree_, est.tree_.value[:, 0, 0] * model.learning_rate)
+        for est in model.estimators_[:, 0]
+    ]
+    ensemble = _assemble(trees, base_score=0.0, link='logit')
+    ensemble.base_score = _calibrate_base(model, ensemble, model.n_features_in_)
+    return ensemble
+
+
+def export_random_forest(model):
+    """sklearn RandomForestClassifier (binary) -> FlatTreeEnsemble averaging leaf probabilities"""
+    if len(model.classes_) != 2:
+        raise ValueError('Only binary RandomForestClassifier models can be exported')
+    n_trees = len(model.estimators_)
+    trees = []
+    for est in model.estimators_:
+        counts = est.tree_.value[:, 0, :]
+        proba = counts[:, 1] / counts.sum(axis=1)
+        trees.append(_sklearn_tree(est.tree_, proba / n_trees))
+    return _assemble(trees, base_score=0.0, link='identity')
+
+
+def export_xgboost(model):
+    """XGBClassifier (binary:logistic, numeric splits) -> FlatTreeEnsemble"""
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    objective = config['learner']['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f'Unsupported XGBoost objective {objective!r}')
+
+    dump = json.loads(booster.save_raw('json').decode('utf-8'))
+    gbm = dump['learner']['gradient_booster']
+    if gbm.get('name', 'gbtree') != 'gbtree':
+        raise ValueError(f"Unsupported XGBoost booster {gbm.get('name')!r}")
+
+    trees = []
+    for tree in gbm['model']['trees']:
+        if any(tree.get('split_type', [])):
+            raise ValueError('Categorical XGBoost splits cannot be exported')
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        split = np.asarray(tree['split_conditions'], dtype=np.float32)
+        # XGBoost goes left when x < split; x <= nextafter(split, -inf) is the same test
+        threshold = np.nextafter(split, np.float32(-np.inf)).astype(np.float64)
+        trees.append((
+            np.asarray(tree['split_indices'], dtype=np.int64),
+            threshold,
+            left,
+            np.asarray(tree['right_children'], dtype=np.int64),
+            split.astype(np.float64),  # leaf values live in split_conditions
+            np.asarray(tree['default_left'], dtype=np.uint8),
+            np.asarray(tree['sum_hessian'], dtype=np.float64),
+        ))
+
+    ensemble = _assemble(trees, base_score=0.0, link='logit')
+    ensemble.base_score = _calibrate_base(model, ensemble, model.n_features_in_)
+    return ensemble
+
+
+def export_tree_ensemble(model):
+    """Export any supported tree model; None if the model type has no flat form"""
+    name = type(model).__name__
+    if name == 'GradientBoostingClassifier':
+        return export_gradient_boosting(model)
+    if name == 'RandomForestClassifier':
+        return export_random_forest(model)
+    if name == 'XGBClassifier':
+        return export_xgboost(model)
+    return None
+
+
+def check_parity(model, ensemble, X, tolerance=PARITY_TOLERANCE):
+    """Raise ValueError unless the flat ensemble reproduces the library's probabilities on X"""
+    expected = model.predict_proba(X)[:, 1]
+    actual = ensemble.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > tolerance:
+        raise ValueError(
+            f'{type(model).__name__} flat export differs from the library by {max_diff:.3g} '
+            f'(tolerance {tolerance:.0e})'
+        )
+    return max_diff
+
+
+def parity_rows(n_features, n_rows=2000, seed=42):
+    """Standard-normal rows in scaled feature space, used when no real sample is at hand"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n_rows, n_features)).astype(np.float32)
+
+
+if __name__ == '__main__':
+    # Parity report for every exportable model in a models/ directory
+    import joblib
+
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else 'models'
+    failed = False
+    for name in ['gradient_boosting', 'xgboost', 'random_forest']:
+        path = os.path.join(models_dir, f'{name}.pkl')
+        if not os.path.exists(path):
+            continue
+        model = joblib.load(path)
+        ensemble = export_tree_ensemble(model)
+        X = parity_rows(model.n_features_in_)
+        try:
+            max_diff = check_parity(model, ensemble, X)
+            print(f'{name}: {len(ensemble.roots)} trees, depth {ensemble.max_depth}, max |diff| = {max_diff:.3g}')
+        except ValueError as e:
+            failed = True
+            print(f'{name}: PARITY FAILED - {e}')
+    sys.exit(1 if failed else 0)
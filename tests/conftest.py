@@ -0,0 +1,65 @@
+"""
+Shared fixtures. The scripts are flat modules that import their siblings,
+so scripts/ (and warehouse/etl/) go on sys.path like when they are run.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(ROOT, 'warehouse', 'etl'))
+
+from features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, build_features, fit_categories  # noqa: E402
+from predict import DECISION_THRESHOLDS, FIELD_COLUMNS, _explainer  # noqa: E402
+from synthetic_applications import generate_applications  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def applications():
+    return generate_applications(400, seed=7)
+
+
+@pytest.fixture(scope='session')
+def training_data(applications):
+    """(X, y, categories): engineered features of the synthetic applications, labelled by risk"""
+    columns = {column: [a[field] for a in applications] for field, column in FIELD_COLUMNS.items()}
+    categories = {column: fit_categories(columns[column]) for column in CATEGORICAL_COLUMNS}
+    X, computable = build_features(columns, categories)
+    X = X[computable]
+    rng = np.random.default_rng(0)
+    risk = X[:, FEATURE_COLUMNS.index('RiskScore')]
+    y = (risk + rng.normal(0, 80, len(X)) > np.median(risk)).astype(int)
+    return X, y, categories
+
+
+def make_artifacts(model, scaler, categories, model_name='gradient_boosting'):
+    """Artifacts dict as predict._load_model_set builds it from the pickles"""
+    return {
+        'source': 'pickles',
+        'model_version': None,
+        'model_name': model_name,
+        'model': model,
+        'input': 'scaled',
+        'scaler': scaler,
+        'categories': categories,
+        'thresholds': dict(DECISION_THRESHOLDS),
+        'feature_order': list(FEATURE_COLUMNS),
+        'feature_version': None,
+        'explainer': _explainer(model),
+        'cascade': None,
+    }
+
+
+@pytest.fixture(scope='session')
+def artifacts(training_data):
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X, y, categories = training_data
+    scaler = StandardScaler().fit(X)
+    model = GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0).fit(scaler.transform(X), y)
+    return make_artifacts(model, scaler, categories)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from dataset import read_loan_csv
+
+
+def test_integer_columns_are_narrowed(tmp_path):
+    path = tmp_path / 'loans.csv'
+    pd.DataFrame({'Age': [30, 41], 'Income': [50000, 72000], 'DTIRatio': [0.2, 0.35], 'Default': [0, 1]}).to_csv(
+        path, index=False)
+    df = read_loan_csv(path)
+    assert df['Age'].dtype == np.int16
+    assert df['Income'].dtype == np.int32
+    assert df['Default'].dtype == np.int8
+
+
+def test_fractional_values_stay_float(tmp_path):
+    # Outcome exports carry Prisma Float columns (Loan.income)
+    path = tmp_path / 'outcomes.csv'
+    pd.DataFrame({'Age': [30, 41], 'Income': [50000.5, 72000.25], 'LoanAmount': [1e10, 5000],
+                  'Default': [0, 1]}).to_csv(path, index=False)
+    df = read_loan_csv(path)
+    assert df['Age'].dtype == np.int16
+    assert df['Income'].dtype == np.float64
+    assert df['Income'].tolist() == [50000.5, 72000.25]
+    # Out of int32 range
+    assert df['LoanAmount'].dtype == np.float64
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from features import (CATEGORICAL_COLUMNS, FEATURE_COLUMNS, build_features, encode_categories,
+                      fit_categories, monthly_payment)
+from predict import FIELD_COLUMNS
+
+
+def baseline_features(data, encoders):
+    """The per-application feature code predict.py had before features.py (kept here as the reference)"""
+    risk_score = (
+        (data['dtiRatio'] * 300) +
+        (data['loanAmount'] / data['income'] * 250) +
+        ((850 - data['creditScore']) / 850 * 200) +
+        (data['interestRate'] * 10 * 150) +
+        (1 / (data['monthsEmployed'] + 1) * 100)
+    )
+    risk_score = min(max(risk_score, 0), 1000)
+
+    monthly_payment = data['loanAmount'] * (data['interestRate']/12) / (1 - (1 + data['interestRate']/12)**(-data['loanTerm']))
+    affordability = (data['income'] * (1 - data['dtiRatio'])) / (monthly_payment * data['loanTerm']) * 10
+    affordability = min(max(affordability, 0), 10)
+
+    def safe_transform(le, value):
+        try:
+            return le.transform([value])[0]
+        except Exception:
+            return 0
+
+    return [
+        data['age'], data['income'], data['loanAmount'], data['loanTerm'], data['interestRate'],
+        data['creditScore'], data['dtiRatio'], data['numCreditLines'], data['monthsEmployed'],
+        1 if data['hasMortgage'] else 0,
+        1 if data['hasDependents'] else 0,
+        1 if data['hasCoSigner'] else 0,
+        safe_transform(encoders['Education'], data['education']),
+        safe_transform(encoders['EmploymentType'], data['employmentType']),
+        safe_transform(encoders['MaritalStatus'], data['maritalStatus']),
+        safe_transform(encoders['LoanPurpose'], data['loanPurpose']),
+        risk_score,
+        affordability,
+    ]
+
+
+def _columns(applications):
+    return {column: [a[field] for a in applications] for field, column in FIELD_COLUMNS.items()}
+
+
+def _encoders(categories):
+    encoders = {}
+    for column in CATEGORICAL_COLUMNS:
+        encoders[column] = LabelEncoder()
+        encoders[column].classes_ = np.array(categories[column], dtype=object)
+    return encoders
+
+
+def test_build_features_reproduces_baseline(applications, training_data):
+    categories = training_data[2]
+    rows = applications[:200]
+    X, computable = build_features(_columns(rows), categories)
+    assert computable.all()
+    expected = np.array([baseline_features(row, _encoders(categories)) for row in rows], dtype=np.float64)
+    np.testing.assert_allclose(X, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_unknown_categories_encode_as_zero(applications, training_data):
+    categories = training_data[2]
+    row = dict(applications[0], education='Kindergarten', loanPurpose=' Auto ', employmentType=None)
+    X, computable = build_features(_columns([row]), categories)
+    assert computable.all()
+    expected = baseline_features(dict(row, loanPurpose='Auto'), _encoders(categories))
+    np.testing.assert_allclose(X[0], expected, rtol=1e-12)
+    assert X[0, FEATURE_COLUMNS.index('Education_Encoded')] == 0
+
+
+def test_encode_categories_matches_label_encoder():
+    values = ['b', 'a', 'c', 'a']
+    classes = fit_categories(values)
+    np.testing.assert_array_equal(encode_categories(classes, values), LabelEncoder().fit(values).transform(values))
+
+
+def test_zero_interest_rate_repays_principal_evenly(applications, training_data):
+    categories = training_data[2]
+    row = dict(applications[0], interestRate=0, loanAmount=12000, loanTerm=24, income=60000, dtiRatio=0.25)
+    X, computable = build_features(_columns([row]), categories)
+    assert computable.all()
+    assert monthly_payment(np.array([12000.0]), np.array([0.0]), np.array([24.0]))[0] == 500.0
+    # The annuity formula tends to the same payment as the rate goes to zero
+    assert monthly_payment(12000.0, 1e-9, 24.0) == pytest.approx(500.0)
+    affordability = min(max(60000 * (1 - 0.25) / (500.0 * 24) * 10, 0), 10)
+    assert X[0, FEATURE_COLUMNS.index('AffordabilityIndex')] == pytest.approx(affordability)
+
+
+@pytest.mark.parametrize('override', [{'income': 0}, {'loanTerm': 0}, {'age': 'n/a'}])
+def test_non_computable_rows_are_flagged(applications, training_data, override):
+    _, computable = build_features(_columns([dict(applications[0], **override)]), training_data[2])
+    assert not computable[0]
@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+import gold
+
+
+class StubClickHouse:
+    """Answers CHANGED_DAYS_SQL with the given days and records every statement"""
+
+    def __init__(self, changed):
+        self.changed = changed
+        self.executed = []
+
+    def execute(self, query, params=None, settings=None, retries=None):
+        self.executed.append((query, params))
+        if query == gold.CHANGED_DAYS_SQL:
+            return [(day,) for day in self.changed]
+        return []
+
+
+def test_days_to_finalize_adds_the_trend_window():
+    changed, days = gold.days_to_finalize(StubClickHouse([date(2026, 1, 10)]))
+    assert changed == [date(2026, 1, 10)]
+    assert days == [date(2026, 1, 10) + timedelta(days=offset) for offset in range(gold.TREND_DAYS + 1)]
+
+
+def test_days_to_finalize_merges_overlapping_windows():
+    changed, days = gold.days_to_finalize(StubClickHouse([date(2026, 1, 30), date(2026, 2, 2)]))
+    assert changed == [date(2026, 1, 30), date(2026, 2, 2)]
+    assert days == [date(2026, 1, 30) + timedelta(days=offset) for offset in range(3 + gold.TREND_DAYS + 1)]
+    assert len(set(days)) == len(days)
+
+
+def test_nothing_changed_writes_nothing():
+    ch = StubClickHouse([])
+    assert gold.aggregate_to_gold(ch) == 0
+    assert [query for query, _ in ch.executed] == [gold.CHANGED_DAYS_SQL]
+
+
+def test_summary_is_written_after_the_metrics():
+    ch = StubClickHouse([date(2026, 3, 1)])
+    assert gold.aggregate_to_gold(ch) == gold.TREND_DAYS + 1
+    queries = [query for query, _ in ch.executed]
+    assert queries == [gold.CHANGED_DAYS_SQL, gold.PORTFOLIO_METRICS_SQL, gold.DAILY_SUMMARY_SQL]
+    params = ch.executed[1][1]
+    assert params['first'] == date(2026, 3, 1)
+    assert params['last'] == date(2026, 3, 1) + timedelta(days=gold.TREND_DAYS)
+    assert params['days'] == tuple(date(2026, 3, 1) + timedelta(days=offset) for offset in range(gold.TREND_DAYS + 1))
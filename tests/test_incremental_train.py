@@ -0,0 +1,106 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from xgboost import XGBClassifier
+
+import incremental_train
+import predict
+from model_bundle import ENCODER_FILES, scaler_filename
+from predict import FIELD_COLUMNS
+from synthetic_applications import generate_applications
+
+MODELS = {
+    'random_forest': lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    'gradient_boosting': lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0),
+    'logistic_regression': lambda: LogisticRegression(max_iter=1000),
+    'xgboost': lambda: XGBClassifier(n_estimators=20, max_depth=3, random_state=0),
+}
+
+
+def _write_csv(path, applications, y):
+    df = pd.DataFrame({column: [a[field] for a in applications] for field, column in FIELD_COLUMNS.items()})
+    for column in ['HasMortgage', 'HasDependents', 'HasCoSigner']:
+        df[column] = np.where(df[column].astype(bool), 'Yes', 'No')
+    df['Default'] = y
+    df.to_csv(path, index=False)
+
+
+@pytest.fixture
+def models_dir(tmp_path, training_data):
+    """A trained model set, new outcomes with shifted incomes and a holdout file"""
+    X, y, categories = training_data
+    scaler = StandardScaler().fit(X)
+    joblib.dump(scaler, tmp_path / 'scaler.pkl')
+    for column, filename in ENCODER_FILES.items():
+        encoder = LabelEncoder()
+        encoder.classes_ = np.array(categories[column], dtype=object)
+        joblib.dump(encoder, tmp_path / filename)
+    for name, factory in MODELS.items():
+        joblib.dump(factory().fit(scaler.transform(X), y), tmp_path / f'{name}.pkl')
+
+    new = [dict(a, income=a['income'] * 2) for a in generate_applications(300, seed=11)]
+    _write_csv(tmp_path / 'new.csv', new, np.arange(300) % 2)
+    _write_csv(tmp_path / 'holdout.csv', generate_applications(200, seed=12), np.arange(200) % 2)
+    return tmp_path
+
+
+def _update(models_dir):
+    return incremental_train.update_model_set(str(models_dir), str(models_dir / 'new.csv'), None,
+                                              str(models_dir / 'holdout.csv'), 5, 5, tolerance=1.0)
+
+
+def _probabilities(models_dir, name, applications):
+    artifacts = predict.load_artifacts(str(models_dir), name)
+    return np.array([r['defaultProbability'] for r in predict.predict_batch(applications, artifacts)])
+
+
+def test_tree_models_score_unseen_rows_as_before(models_dir):
+    unseen = generate_applications(300, seed=99)
+    before = {name: _probabilities(models_dir, name, unseen) for name in ['random_forest', 'gradient_boosting']}
+    report = _update(models_dir)
+
+    assert report['promoted']
+    for name, probability in before.items():
+        assert report['models'][name]['scaler'] == 'own'
+        assert (models_dir / scaler_filename(name)).exists()
+        np.testing.assert_allclose(_probabilities(models_dir, name, unseen), probability, atol=1e-9)
+
+
+def test_logistic_regression_moves_to_the_new_scaler_exactly(training_data):
+    X, y, _ = training_data
+    old = StandardScaler().fit(X[:250])
+    new = StandardScaler().fit(X[:250]).partial_fit(X[250:] * 1.3 + 5)
+    model = MODELS['logistic_regression']().fit(old.transform(X[:250]), y[:250])
+    rescaled = incremental_train.rescale_linear(model, old, new)
+
+    unseen = np.vstack([X * 0.7, X * 1.5 + 3])
+    before = model.predict_proba(old.transform(unseen))[:, 1]
+    after = rescaled.predict_proba(new.transform(unseen))[:, 1]
+    assert np.max(np.abs(after - before)) <= incremental_train.RESCALE_TOLERANCE
+
+
+def test_inexact_rescale_keeps_the_previous_scaler(models_dir, monkeypatch):
+    rescale_linear = incremental_train.rescale_linear
+
+    def broken_rescale(model, old, new):
+        rescaled = rescale_linear(model, old, new)
+        rescaled.intercept_ = rescaled.intercept_ + 0.01
+        return rescaled
+
+    monkeypatch.setattr(incremental_train, 'rescale_linear', broken_rescale)
+    report = _update(models_dir)
+
+    entry = report['models']['logistic_regression']
+    assert entry['rescale_max_diff'] > incremental_train.RESCALE_TOLERANCE
+    assert entry['scaler'] == 'own'
+    # The rest of the update goes through
+    assert 'xgboost' in report['promoted']
+    assert (models_dir / scaler_filename('logistic_regression')).exists()
+    with open(models_dir / incremental_train.REPORT_FILENAME) as f:
+        assert json.load(f)['promoted'] == report['promoted']
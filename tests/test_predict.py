@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+import predict
+
+
+def _assert_same_result(batch, single):
+    assert batch.keys() == single.keys()
+    for key, value in batch.items():
+        if isinstance(value, float):
+            assert math.isclose(value, single[key], rel_tol=1e-12, abs_tol=1e-12), key
+        else:
+            assert value == single[key], key
+
+
+def test_predict_batch_matches_predict(applications, artifacts):
+    rows = applications[:50]
+    batch = predict.predict_batch(rows, artifacts)
+    assert len(batch) == len(rows)
+    for row, result in zip(rows, batch):
+        _assert_same_result(result, predict.predict(row, artifacts))
+
+
+def test_predict_batch_reports_bad_rows_in_place(applications, artifacts):
+    missing = dict(applications[0])
+    del missing['income']
+    zero_income = dict(applications[1], income=0)
+    rows = [applications[2], missing, 'not an object', zero_income, applications[3]]
+
+    results = predict.predict_batch(rows, artifacts)
+    assert 'error' not in results[0] and 'error' not in results[4]
+    assert results[1]['error'].startswith('Missing field(s): income')
+    assert results[2]['error'] == 'Application must be a JSON object'
+    assert 'error' in results[3]
+    for row, result in zip(rows, results):
+        _assert_same_result(result, predict.predict(row, artifacts))
+
+
+@pytest.mark.parametrize('margin', [0.05, 0.5])
+def test_cascade_batch_matches_single(applications, artifacts, margin):
+    cascaded = dict(artifacts, cascade={
+        'model_name': 'gradient_boosting', 'model': artifacts['model'], 'input': 'scaled',
+        'explainer': artifacts['explainer'], 'margin': margin,
+    })
+    rows = applications[:20]
+    for row, result in zip(rows, predict.predict_batch(rows, cascaded)):
+        _assert_same_result(result, predict.predict(row, cascaded))
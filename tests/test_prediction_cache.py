@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache, normalize_number
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    (tmp_path / 'gradient_boosting.pkl').write_bytes(b'model v1')
+    (tmp_path / 'manifest.json').write_text('{"model_version": "v1"}')
+    return str(tmp_path)
+
+
+def test_hit_returns_a_copy(models_dir, clock):
+    cache = PredictionCache(models_dir)
+    artifacts = object()
+    cache.put('k', artifacts, {'decision': 'APPROVE', 'reasons': []})
+    first = cache.get('k', artifacts)
+    first['reasons'].append('mutated')
+    assert cache.get('k', artifacts) == {'decision': 'APPROVE', 'reasons': []}
+    assert cache.stats()['hits'] == 2
+
+
+def test_entries_expire_after_ttl(models_dir, clock):
+    cache = PredictionCache(models_dir, ttl=10.0)
+    artifacts = object()
+    cache.put('k', artifacts, {'decision': 'APPROVE'})
+    clock.now += 9.9
+    assert cache.get('k', artifacts) is not None
+    clock.now += 0.2
+    assert cache.get('k', artifacts) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_invalidated_when_the_manifest_changes(models_dir, clock):
+    cache = PredictionCache(models_dir, check_interval=1.0)
+    artifacts = object()
+    cache.put('k', artifacts, {'decision': 'APPROVE'})
+
+    with open(os.path.join(models_dir, 'gradient_boosting.pkl'), 'wb') as f:
+        f.write(b'model v2, retrained')
+    with open(os.path.join(models_dir, 'manifest.json'), 'w') as f:
+        f.write('{"model_version": "v2, retrained"}')
+    # Within the check interval the old fingerprint is still trusted
+    assert cache.get('k', artifacts) is not None
+    clock.now += 1.0
+    assert cache.get('k', artifacts) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_other_files_in_models_dir_keep_the_cache(models_dir, clock):
+    cache = PredictionCache(models_dir, check_interval=1.0)
+    artifacts = object()
+    cache.put('k', artifacts, {'decision': 'APPROVE'})
+
+    with open(os.path.join(models_dir, 'incremental_report.json'), 'w') as f:
+        f.write('{}')
+    clock.now += 1.0
+    assert cache.get('k', artifacts) is not None
+    assert cache.stats()['invalidations'] == 0
+
+
+def test_invalidated_when_used_with_other_artifacts(models_dir, clock):
+    cache = PredictionCache(models_dir)
+    old, new = object(), object()
+    cache.put('k', old, {'decision': 'APPROVE'})
+    assert cache.get('k', new) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_lru_eviction(models_dir, clock):
+    cache = PredictionCache(models_dir, maxsize=2)
+    artifacts = object()
+    cache.put('a', artifacts, 1)
+    cache.put('b', artifacts, 2)
+    cache.get('a', artifacts)
+    cache.put('c', artifacts, 3)
+    assert cache.get('b', artifacts) is None
+    assert cache.get('a', artifacts) == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_normalize_number_canonicalizes_keys():
+    assert normalize_number(35) == normalize_number(35.0) == normalize_number('35')
+    assert normalize_number(True) == 1.0
+    assert normalize_number(float('nan')) == 'nan'
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from xgboost import XGBClassifier
+
+from tree_ensemble import PARITY_TOLERANCE, FlatTreeEnsemble, export_tree_ensemble, parity_rows
+
+MODELS = {
+    'gradient_boosting': lambda: GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+    'random_forest': lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    'xgboost': lambda: XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.1, random_state=0),
+}
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(3)
+    X = rng.standard_normal((600, 8))
+    logits = X[:, 0] - 0.8 * X[:, 1] + 0.5 * X[:, 2] * X[:, 3] + rng.normal(0, 0.5, len(X))
+    return X, (logits > 0).astype(int)
+
+
+@pytest.fixture(scope='module', params=list(MODELS))
+def fitted(request, data):
+    X, y = data
+    model = MODELS[request.param]().fit(X, y)
+    return model, export_tree_ensemble(model)
+
+
+def test_flat_predict_proba_matches_library(fitted, data):
+    model, ensemble = fitted
+    for X in (data[0], parity_rows(data[0].shape[1], n_rows=500)):
+        diff = np.abs(ensemble.predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1])
+        assert diff.max() <= PARITY_TOLERANCE
+
+
+def test_contributions_sum_to_raw_margin(fitted, data):
+    _, ensemble = fitted
+    X = data[0][:200]
+    bias, contributions = ensemble.contributions(X)
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), ensemble.decision_function(X),
+                               rtol=1e-9, atol=1e-9)
+    probability, explained = ensemble.explain(X)
+    np.testing.assert_allclose(probability, ensemble.predict_proba(X)[:, 1], rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(explained, contributions)
+
+
+def test_xgboost_missing_values_follow_default_direction(data):
+    X, y = data
+    X = X.copy()
+    X[::7, 0] = np.nan
+    model = MODELS['xgboost']().fit(X, y)
+    ensemble = export_tree_ensemble(model)
+    diff = np.abs(ensemble.predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1])
+    assert diff.max() <= PARITY_TOLERANCE
+
+
+def test_arrays_round_trip(fitted, data):
+    _, ensemble = fitted
+    spec, arrays = ensemble.to_arrays()
+    restored = FlatTreeEnsemble.from_arrays(spec, arrays)
+    np.testing.assert_array_equal(restored.predict_proba(data[0]), ensemble.predict_proba(data[0]))
@@ -0,0 +1,234 @@
+"""
+Bronze layer extraction: PostgreSQL (Prisma tables) → ClickHouse bronze_layer.
+
+Each source is read through a server-side (named) cursor in primary-key
+order of (updatedAt, id), so only rows changed since the last run are pulled
+and the client never holds more than one batch. Every batch is transposed
+into columns and bulk-inserted with a clickhouse_driver columnar insert,
+after which the (updatedAt, id) of its last row is persisted as the source's
+high-water mark in bronze_layer.extraction_watermarks. An interrupted run
+therefore resumes after the last loaded batch; a batch whose watermark was
+not yet written is extracted again (at-least-once: Bronze is append-only and
+Silver keeps the latest version of each row). Within a run, a batch insert
+that failed in transit is retried with an insert_deduplication_token of
+(source, snapshot horizon, batch start watermark), so the server drops it
+if the first attempt was written after all.
+
+updatedAt is stamped by Prisma when the write is issued, not when it commits,
+so a row can become visible after rows with later timestamps were extracted.
+Rows updated within ETL_LAG_SECONDS of the snapshot are therefore left for
+the next run: the watermark never passes a timestamp whose transactions may
+still be in flight.
+
+Sources:
+    Loan, LoanApplication -> bronze_layer.raw_loan_applications
+    User (+ applicant details of the user's latest Loan) -> bronze_layer.raw_user_profiles
+
+Prisma cuid keys are mapped to UUIDs with md5(id)::uuid, so the same user
+gets the same user_id in every table. All reads share one REPEATABLE READ
+snapshot and run with TimeZone=UTC (Prisma stores UTC timestamps).
+
+Configuration (environment):
+    DATABASE_URL      PostgreSQL URL used by Prisma
+    ETL_BATCH_ROWS    rows per cursor fetch / ClickHouse insert (default 50000)
+    ETL_LAG_SECONDS   only extract rows updated this long before the snapshot (default 300)
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_TABLE = 'bronze_layer.extraction_watermarks'
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_LAG_SECONDS = 300
+
+# Watermark of a source that was never extracted
+INITIAL_WATERMARK = (datetime(1970, 1, 1, tzinfo=timezone.utc), '')
+
+LOAN_APPLICATION_COLUMNS = [
+    'application_id', 'user_id', 'loan_amount', 'loan_term_months', 'annual_income', 'credit_score',
+    'employment_status', 'debt_to_income_ratio', 'existing_debt', 'payment_history', 'collateral_type',
+    'application_date', 'source_table', 'loan_purpose', 'interest_rate', 'status', 'decision',
+    'risk_score', 'default_probability', 'source_id', 'updated_at',
+]
+
+USER_PROFILE_COLUMNS = [
+    'user_id', 'email', 'age', 'occupation', 'years_employed', 'education_level', 'marital_status',
+    'num_dependents', 'residential_status', 'created_at', 'source_id', 'updated_at',
+]
+
+# Every query selects the target columns in order and ends with the watermark
+# key (source_id, updated_at); %(ts)s/%(id)s are the stored watermark and
+# %(until)s the extraction horizon (see extraction_horizon()).
+SOURCES = [
+    {
+        'source': 'Loan',
+        'table': 'bronze_layer.raw_loan_applications',
+        'columns': LOAN_APPLICATION_COLUMNS,
+        'query': """
+            SELECT md5(id)::uuid, md5("userId")::uuid, "loanAmount", "loanTerm", income, "creditScore",
+                   "employmentType"::text, "dtiRatio",
+                   "dtiRatio" * income,  -- annual debt payments implied by the DTI ratio
+                   '', CASE WHEN "hasMortgage" THEN 'MORTGAGE' ELSE 'NONE' END,
+                   "createdAt" AT TIME ZONE 'UTC', 'Loan', "loanPurpose"::text, "interestRate",
+                   status::text, COALESCE(decision::text, ''), "riskScore", "defaultProbability",
+                   id, "updatedAt" AT TIME ZONE 'UTC'
+            FROM "Loan"
+            WHERE ("updatedAt", id) > (%(ts)s, %(id)s) AND "updatedAt" < %(until)s
+            ORDER BY "updatedAt", id
+        """,
+    },
+    {
+        'source': 'LoanApplication',
+        'table': 'bronze_layer.raw_loan_applications',
+        'columns': LOAN_APPLICATION_COLUMNS,
+        'query': """
+            SELECT md5(id)::uuid, md5("userId")::uuid, amount, term, income, COALESCE("creditScore", 0),
+                   "employmentStatus", 0, 0, '', '',
+                   "createdAt" AT TIME ZONE 'UTC', 'LoanApplication', purpose, NULL,
+                   status, decision, "riskScore", NULL,
+                   id, "updatedAt" AT TIME ZONE 'UTC'
+            FROM "LoanApplication"
+            WHERE ("updatedAt", id) > (%(ts)s, %(id)s) AND "updatedAt" < %(until)s
+            ORDER BY "updatedAt", id
+        """,
+    },
+    {
+        # The profile changes with the User row or with the user's latest Loan. Both
+        # (updatedAt, id) indexes find the candidate users; only their profiles are built.
+        'source': 'User',
+        'table': 'bronze_layer.raw_user_profiles',
+        'columns': USER_PROFILE_COLUMNS,
+        'query': """
+            SELECT md5(id)::uuid, email, age, occupation, years_employed, education_level, marital_status,
+                   num_dependents, residential_status, "createdAt" AT TIME ZONE 'UTC',
+                   id, changed_at AT TIME ZONE 'UTC'
+            FROM (
+                SELECT u.id, u.email, u."createdAt",
+                       COALESCE(l.age, 0) AS age,
+                       COALESCE(l."employmentType"::text, '') AS occupation,
+                       COALESCE(l."monthsEmployed" / 12, 0) AS years_employed,
+                       COALESCE(l.education::text, '') AS education_level,
+                       COALESCE(l."maritalStatus"::text, '') AS marital_status,
+                       CASE WHEN l."hasDependents" THEN 1 ELSE 0 END AS num_dependents,
+                       CASE WHEN l."hasMortgage" THEN 'MORTGAGE' WHEN l.id IS NULL THEN '' ELSE 'OTHER' END
+                           AS residential_status,
+                       GREATEST(u."updatedAt", l."updatedAt") AS changed_at
+                FROM (
+                    SELECT id FROM "User" WHERE ("updatedAt", id) > (%(ts)s, %(id)s)
+                    UNION
+                    SELECT "userId" FROM "Loan" WHERE "updatedAt" >= %(ts)s
+                ) changed
+                JOIN "User" u ON u.id = changed.id
+                LEFT JOIN LATERAL (
+                    SELECT * FROM "Loan" WHERE "userId" = u.id ORDER BY "createdAt" DESC LIMIT 1
+                ) l ON true
+            ) profiles
+            WHERE (changed_at, id) > (%(ts)s, %(id)s) AND changed_at < %(until)s
+            ORDER BY changed_at, id
+        """,
+    },
+]
+
+
+def postgres_dsn(url):
+    """
+    libpq connection string for a Prisma DATABASE_URL. Prisma's ?schema=
+    parameter is not understood by libpq; it becomes the search_path.
+    """
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    schema = params.pop('schema', None)
+    options = '-c TimeZone=UTC'
+    if schema:
+        options += f' -c search_path={schema}'
+    params['options'] = options
+    return urlunsplit(parts._replace(query=urlencode(params, quote_via=quote)))
+
+
+def connect_postgres(url=None):
+    """Read-only connection with one snapshot for the whole extraction"""
+    import psycopg2
+    import psycopg2.extras
+
+    psycopg2.extras.register_uuid()
+    conn = psycopg2.connect(postgres_dsn(url or os.environ['DATABASE_URL']))
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    return conn
+
+
+def extraction_horizon(pg, lag_seconds):
+    """Upper bound (exclusive) of the updatedAt values extracted in this snapshot"""
+    with pg.cursor() as cursor:
+        # now() is the start of the snapshot's transaction
+        cursor.execute("SELECT (now() AT TIME ZONE 'UTC') - make_interval(secs => %s)", (lag_seconds,))
+        return cursor.fetchone()[0]
+
+
+def load_watermarks(ch):
+    """source -> (updated_at, source_id) of the last extracted row"""
+    rows = ch.execute(
+        f"SELECT source, argMax(watermark_ts, updated_at), argMax(watermark_id, updated_at) "
+        f"FROM {WATERMARK_TABLE} GROUP BY source"
+    )
+    return {source: (ts, source_id) for source, ts, source_id in rows}
+
+
+def save_watermark(ch, source, watermark, rows):
+    # Safe to retry: the latest row of each source wins
+    ch.insert_columnar(WATERMARK_TABLE, ['source', 'watermark_ts', 'watermark_id', 'rows'],
+                       [[source], [watermark[0]], [watermark[1]], [rows]], retries=ch.retries)
+
+
+def batch_token(source, until, watermark):
+    """insert_deduplication_token of the batch extracted after watermark in the snapshot up to until"""
+    return f"bronze:{source}:{until.isoformat()}:{watermark[0].isoformat()}:{watermark[1]}"
+
+
+def extract_source(pg, ch, spec, watermark, batch_rows, until):
+    """Stream one source's rows updated before until into its Bronze table; returns (rows, new watermark)"""
+    total = 0
+    # A named cursor keeps the result set on the server; fetchmany() pulls one batch
+    with pg.cursor(name=f"bronze_{spec['source'].lower()}") as cursor:
+        cursor.itersize = batch_rows
+        cursor.execute(spec['query'], {'ts': watermark[0], 'id': watermark[1], 'until': until})
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            ch.insert_columnar(spec['table'], spec['columns'], list(zip(*rows)),
+                               deduplication_token=batch_token(spec['source'], until, watermark))
+            total += len(rows)
+            # Queries end with (source_id, updated_at)
+            watermark = (rows[-1][-1], rows[-1][-2])
+            save_watermark(ch, spec['source'], watermark, len(rows))
+            logger.info(f"[BRONZE] {spec['source']}: {total} rows loaded")
+    return total, watermark
+
+
+def extract_to_bronze(ch, database_url=None, batch_rows=None, lag_seconds=None):
+    """Incrementally extract every source; returns {source: rows extracted}"""
+    batch_rows = batch_rows or int(os.getenv('ETL_BATCH_ROWS', DEFAULT_BATCH_ROWS))
+    if lag_seconds is None:
+        lag_seconds = float(os.getenv('ETL_LAG_SECONDS', DEFAULT_LAG_SECONDS))
+    watermarks = load_watermarks(ch)
+    counts = {}
+
+    pg = connect_postgres(database_url)
+    try:
+        until = extraction_horizon(pg, lag_seconds)
+        for spec in SOURCES:
+            start = time.perf_counter()
+            watermark = watermarks.get(spec['source'], INITIAL_WATERMARK)
+            rows, watermark = extract_source(pg, ch, spec, watermark, batch_rows, until)
+            counts[spec['source']] = rows
+            logger.info(f"[BRONZE] {spec['source']} -> {spec['table']}: {rows} new rows "
+                        f"in {time.perf_counter() - start:.2f}s (watermark {watermark[0]}, {watermark[1] or '-'})")
+        pg.rollback()
+    finally:
+        pg.close()
+    return counts
@@ -0,0 +1,143 @@
+"""
+Gold layer aggregation from incrementally maintained aggregate states.
+
+gold_layer.daily_loan_states (AggregatingMergeTree, one row per day and
+portfolio after merges) holds partial aggregates: counts and sums as
+SimpleAggregateFunction columns, distinct users and averages as
+AggregateFunction states. It is fed by a materialized view whenever Silver
+rebuilds a loan partition (see silver.py), so the nightly run never
+re-aggregates history. This module only finalizes the changed days:
+
+    daily_portfolio_summary   one row per day, all portfolios merged
+    portfolio_risk_metrics    one row per day and portfolio
+
+A day is changed when its states were fed after its summary was last
+written. Portfolio metrics also depend on the 7 preceding days (seasonal
+trend), so the 7 days following a changed day are finalized with it.
+Silver refeeds whole months, so a run that received one new day still
+finalizes every day of that month plus the 7 after it (about 31 + 7 days). Both
+tables are ReplacingMergeTree(created_timestamp): a finalized day replaces
+its previous version (read them with FINAL). Tables created by an older
+schema keep their engine, so TABLE_LAYOUTS is verified before a run (see
+pipeline.ClickHouseConnection.check_tables).
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+STATE_TABLE = 'gold_layer.daily_loan_states'
+TREND_DAYS = 7
+
+# table -> (engine, partition key) as in system.tables
+TABLE_LAYOUTS = {
+    STATE_TABLE: ('AggregatingMergeTree', 'toYYYYMM(summary_date)'),
+    'gold_layer.daily_portfolio_summary': ('ReplacingMergeTree', ''),
+    'gold_layer.portfolio_risk_metrics': ('ReplacingMergeTree', ''),
+}
+
+CHANGED_DAYS_SQL = f"""
+    SELECT summary_date
+    FROM (SELECT summary_date, max(fed_at) AS fed FROM {STATE_TABLE} GROUP BY summary_date) AS states
+    LEFT JOIN (
+        -- Nullable: a day that was never finalized joins NULL, not the DateTime default
+        SELECT summary_date, toNullable(max(created_timestamp)) AS finalized
+        FROM gold_layer.daily_portfolio_summary
+        GROUP BY summary_date
+    ) AS summaries USING (summary_date)
+    WHERE finalized IS NULL OR fed >= finalized
+    ORDER BY summary_date
+"""
+
+DAILY_SUMMARY_SQL = f"""
+    INSERT INTO gold_layer.daily_portfolio_summary (
+        summary_date, total_active_loans, default_rate, avg_loan_to_income, portfolio_health_score,
+        risk_alerts, top_risk_segment
+    )
+    SELECT
+        summary_date, active, expected_default_rate, loan_to_income_ratio, health, least(alerts, 65535),
+        top_segment
+    FROM (
+        SELECT
+            summary_date,
+            sum(active_loans) AS active,
+            -- no repayment outcomes in Silver: the mean predicted default probability
+            ifNull(avgMerge(default_probability), 0) AS expected_default_rate,
+            ifNull(avgMerge(loan_to_income), 0) AS loan_to_income_ratio,
+            100 * (1 - (sum(high_risk) + 0.5 * sum(medium_risk)) / greatest(sum(applications), 1)) AS health,
+            sum(high_risk) AS alerts
+        FROM {STATE_TABLE}
+        WHERE summary_date IN %(days)s
+        GROUP BY summary_date
+    ) AS daily
+    LEFT JOIN (
+        SELECT summary_date, argMax(portfolio_id, portfolio_high_risk) AS top_segment
+        FROM (
+            SELECT summary_date, portfolio_id, sum(high_risk) AS portfolio_high_risk
+            FROM {STATE_TABLE}
+            WHERE summary_date IN %(days)s
+            GROUP BY summary_date, portfolio_id
+        )
+        GROUP BY summary_date
+    ) AS segments USING (summary_date)
+"""
+
+PORTFOLIO_METRICS_SQL = f"""
+    INSERT INTO gold_layer.portfolio_risk_metrics (
+        portfolio_id, date, total_applications, total_loan_volume, avg_loan_amount, total_users,
+        default_risk_distribution, portfolio_concentration, seasonal_trend
+    )
+    SELECT
+        portfolio_id, toDateTime(metric_date), apps, volume, volume / greatest(apps, 1), distinct_users,
+        toJSONString(map('HIGH', high, 'MEDIUM', medium, 'LOW', low, 'UNSCORED', unscored_apps)),
+        ifNull(volume / nullIf(day_volume, 0), 0),
+        multiIf(trailing_apps = 0, 'NO_HISTORY', volume > 1.1 * trailing_volume, 'UP',
+                volume < 0.9 * trailing_volume, 'DOWN', 'FLAT')
+    FROM (
+        SELECT
+            *,
+            sum(volume) OVER (PARTITION BY metric_date) AS day_volume,
+            -- daily average volume of the portfolio over the {TREND_DAYS} preceding days
+            (sum(volume) OVER previous_days) / {TREND_DAYS} AS trailing_volume,
+            sum(apps) OVER previous_days AS trailing_apps
+        FROM (
+            SELECT
+                summary_date AS metric_date, toRelativeDayNum(summary_date) AS day_number, portfolio_id,
+                sum(applications) AS apps, sum(loan_volume) AS volume, uniqMerge(users) AS distinct_users,
+                sum(high_risk) AS high, sum(medium_risk) AS medium, sum(low_risk) AS low,
+                sum(unscored) AS unscored_apps
+            FROM {STATE_TABLE}
+            WHERE summary_date BETWEEN toDate(%(first)s) - {TREND_DAYS} AND %(last)s
+            GROUP BY metric_date, day_number, portfolio_id
+        )
+        WINDOW previous_days AS (PARTITION BY portfolio_id ORDER BY day_number
+                                 RANGE BETWEEN {TREND_DAYS} PRECEDING AND 1 PRECEDING)
+    )
+    WHERE metric_date IN %(days)s
+"""
+
+
+def days_to_finalize(ch):
+    """Days whose states changed since they were last finalized, plus the days whose trend they feed"""
+    changed = [row[0] for row in ch.execute(CHANGED_DAYS_SQL)]
+    days = {day + timedelta(days=offset) for day in changed for offset in range(TREND_DAYS + 1)}
+    return changed, sorted(days)
+
+
+def aggregate_to_gold(ch):
+    """Finalize the changed days into the Gold tables; returns the number of days finalized"""
+    start = time.perf_counter()
+    changed, days = days_to_finalize(ch)
+    if not changed:
+        logger.info("[GOLD] No new states to finalize")
+        return 0
+
+    params = {'days': tuple(days), 'first': days[0], 'last': days[-1]}
+    ch.execute(PORTFOLIO_METRICS_SQL, params)
+    # Written last: the summary's created_timestamp marks the days as finalized
+    ch.execute(DAILY_SUMMARY_SQL, params)
+    logger.info(f"[GOLD] {len(changed)} changed day(s), {len(days)} finalized "
+                f"({days[0]} .. {days[-1]}) in {time.perf_counter() - start:.2f}s")
+    return len(days)
@@ -4,14 +4,25 @@ LendGuard AI - ETL Pipeline
 Three-layer architecture: Bronze (raw) → Silver (clean) → Gold (aggregated)
 """
 
+import argparse
 import logging
+import queue
+import random
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, Any
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from bronze import extract_to_bronze
+from silver import TABLE_LAYOUTS as SILVER_TABLE_LAYOUTS, transform_to_silver
+from gold import TABLE_LAYOUTS as GOLD_TABLE_LAYOUTS, aggregate_to_gold
+
 # Load environment variables
 load_dotenv()
 
@@ -28,29 +39,128 @@ logger = logging.getLogger(__name__)
 
 
 class ClickHouseConnection:
-    """ClickHouse database connection handler"""
+    """
+    Pool of ClickHouse clients shared by the ETL stages.
     
-    def __init__(self):
+    A clickhouse_driver Client is not thread-safe, so every call borrows a
+    client from the pool for its duration: stages may run queries from many
+    threads at once (up to CLICKHOUSE_POOL_SIZE in flight, further callers
+    wait). Clients use LZ4 wire compression and connect/socket timeouts, and
+    are created lazily. Queries failing with a transient network or server
+    error are retried with exponential backoff and jitter.
+    """
+    
+    # Server error codes worth retrying: too many simultaneous queries, no free
+    # connection, socket timeout, network error, too many parts, system error
+    TRANSIENT_ERROR_CODES = {202, 203, 209, 210, 252, 425}
+    
+    def __init__(self, size: Optional[int] = None, compression: Optional[str] = None,
+                 retries: Optional[int] = None, backoff: float = 0.5, max_backoff: float = 30.0):
+        self.size = size or int(os.getenv('CLICKHOUSE_POOL_SIZE', 8))
+        self.retries = retries if retries is not None else int(os.getenv('CLICKHOUSE_RETRIES', 3))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.client_args = {
+            'host': os.getenv('CLICKHOUSE_HOST', 'localhost'),
+            'port': int(os.getenv('CLICKHOUSE_PORT', 9000)),
+            'user': os.getenv('CLICKHOUSE_USER', 'default'),
+            'password': os.getenv('CLICKHOUSE_PASSWORD', ''),
+            # 'lz4' needs the clickhouse-driver[lz4] extra; CLICKHOUSE_COMPRESSION=none disables it
+            'compression': compression or os.getenv('CLICKHOUSE_COMPRESSION', 'lz4'),
+            'connect_timeout': float(os.getenv('CLICKHOUSE_CONNECT_TIMEOUT', 10)),
+            'send_receive_timeout': float(os.getenv('CLICKHOUSE_TIMEOUT', 300)),
+        }
+        if self.client_args['compression'] == 'none':
+            self.client_args['compression'] = False
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
         try:
-            from clickhouse_driver import Client
-            # Try connecting without password first
-            self.client = Client(
-                host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
-                port=int(os.getenv('CLICKHOUSE_PORT', 9000)),
-                user=os.getenv('CLICKHOUSE_USER', 'default'),
-            )
-            logger.info("ClickHouse connection established")
+            self.execute("SELECT 1")
+            logger.info(f"ClickHouse connection established (pool of {self.size}, "
+                        f"compression {self.client_args['compression'] or 'off'})")
         except Exception as e:
             logger.error(f"ClickHouse connection failed: {e}")
             raise
     
-    def execute(self, query: str) -> Any:
-        """Execute a query"""
+    @contextmanager
+    def connection(self):
+        """Borrow a client for a sequence of calls"""
+        from clickhouse_driver import Client
+        
+        self._slots.acquire()
         try:
-            return self.client.execute(query)
-        except Exception as e:
-            logger.error(f"Query execution failed: {e}")
-            raise
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = Client(**self.client_args)
+            try:
+                yield client
+            finally:
+                self._idle.put(client)
+        finally:
+            self._slots.release()
+    
+    def _is_transient(self, error: Exception) -> bool:
+        from clickhouse_driver import errors
+        
+        if isinstance(error, (errors.NetworkError, errors.SocketTimeoutError, EOFError, OSError)):
+            return True
+        return isinstance(error, errors.ServerException) and error.code in self.TRANSIENT_ERROR_CODES
+    
+    def _run(self, call, description: str, retries: Optional[int]) -> Any:
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as client:
+                    try:
+                        return call(client)
+                    except Exception:
+                        # Drop the socket: the next use of this client reconnects
+                        client.disconnect()
+                        raise
+            except Exception as e:
+                if attempt == retries or not self._is_transient(e):
+                    logger.error(f"{description} failed: {e}")
+                    raise
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.5)
+                logger.warning(f"{description} failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def execute(self, query: str, params: Optional[dict] = None, settings: Optional[dict] = None,
+                retries: Optional[int] = None) -> Any:
+        """
+        Execute a query; params are substituted client-side (%(name)s),
+        settings apply to this query only (e.g. {'max_threads': 4}).
+        retries=0 for statements that must not run twice (non-idempotent INSERT ... SELECT).
+        """
+        return self._run(lambda client: client.execute(query, params, settings=settings),
+                         "Query execution", retries)
+    
+    def insert_columnar(self, table: str, columns: list, data: list, settings: Optional[dict] = None,
+                        retries: Optional[int] = None, deduplication_token: Optional[str] = None) -> int:
+        """
+        Bulk insert one block given as a list of column sequences; the driver
+        sends it in blocks of settings['insert_block_size'] rows.
+        Not retried by default: an insert whose acknowledgement was lost would be
+        written twice. With a deduplication_token unique to this data the server
+        drops repeated blocks (the table needs a deduplication window), so the
+        insert is retried like a query.
+        """
+        if deduplication_token is not None:
+            settings = dict(settings or {}, insert_deduplication_token=deduplication_token)
+        elif retries is None:
+            retries = 0
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES"
+        return self._run(lambda client: client.execute(query, data, settings=settings, columnar=True),
+                         f"Insert into {table}", retries)
+    
+    def close(self):
+        """Disconnect the idle clients"""
+        while True:
+            try:
+                self._idle.get_nowait().disconnect()
+            except queue.Empty:
+                break
     
     def check_databases(self):
         """Verify all databases exist"""
@@ -65,6 +175,31 @@ class ClickHouseConnection:
                 logger.error(f"[ERROR] {db} missing")
         
         return all(db in databases for db in required_dbs)
+    
+    def check_tables(self, layouts: dict) -> bool:
+        """
+        Verify tables have the engine and partition key the ETL relies on;
+        layouts maps table -> (engine, partition key) as in system.tables.
+        """
+        rows = self.execute(
+            "SELECT concat(database, '.', name), engine, partition_key FROM system.tables "
+            "WHERE concat(database, '.', name) IN %(tables)s",
+            {'tables': tuple(layouts)}
+        )
+        found = {table: (engine, partition_key) for table, engine, partition_key in rows}
+        
+        ok = True
+        for table, (engine, partition_key) in layouts.items():
+            if found.get(table) == (engine, partition_key):
+                continue
+            ok = False
+            actual = (f"{found[table][0]} partitioned by {found[table][1] or 'nothing'}"
+                      if table in found else 'missing')
+            logger.error(f"[ERROR] {table} is {actual}, expected {engine} partitioned by "
+                         f"{partition_key or 'nothing'}: recreate it from schema/dw_schema.sql")
+        if ok:
+            logger.info(f"[OK] {len(layouts)} tables match schema/dw_schema.sql")
+        return ok
 
 
 class ETLPipeline:
@@ -83,6 +218,9 @@ class ETLPipeline:
             if not self.ch.check_databases():
                 logger.error("Database verification failed")
                 return False
+            if not self.ch.check_tables({**SILVER_TABLE_LAYOUTS, **GOLD_TABLE_LAYOUTS}):
+                logger.error("Table verification failed")
+                return False
             
             logger.info("Pipeline configuration:")
             logger.info(f"   ClickHouse Host: {os.getenv('CLICKHOUSE_HOST', 'localhost')}")
@@ -113,25 +251,58 @@ class ETLPipeline:
     def _extract_to_bronze(self):
         """Extract data to Bronze layer"""
         logger.info("[BRONZE] Extraction started")
-        # Placeholder: In production, extract from PostgreSQL
-        logger.info("[BRONZE] Ready")
+        counts = extract_to_bronze(self.ch)
+        logger.info(f"[BRONZE] Ready ({sum(counts.values())} new rows)")
     
     def _transform_to_silver(self):
         """Transform Bronze → Silver"""
         logger.info("[SILVER] Transformation started")
-        # Placeholder: Apply cleaning and validation
-        logger.info("[SILVER] Ready")
+        counts = transform_to_silver(self.ch)
+        logger.info(f"[SILVER] Ready ({sum(counts.values())} rows rebuilt)")
     
     def _aggregate_to_gold(self):
         """Aggregate to Gold layer"""
         logger.info("[GOLD] Aggregation started")
-        # Placeholder: Apply aggregations and compute metrics
-        logger.info("[GOLD] Ready")
+        days = aggregate_to_gold(self.ch)
+        logger.info(f"[GOLD] Ready ({days} days finalized)")
+
+
+def benchmark_insert(ch: ClickHouseConnection, rows: int, workers: int, block_rows: int = 100_000) -> float:
+    """
+    Insert throughput (rows/s) of `workers` threads sending columnar blocks
+    to a Null-engine table, i.e. client encoding + compression + network.
+    """
+    table = 'bronze_layer.etl_insert_benchmark'
+    ch.execute(f"CREATE TABLE IF NOT EXISTS {table} (id UInt64, amount Float64, label String) ENGINE = Null")
+    block = [
+        list(range(block_rows)),
+        [i * 0.5 for i in range(block_rows)],
+        [f"row-{i % 1000}" for i in range(block_rows)],
+    ]
+    blocks = max(rows // block_rows, 1)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: ch.insert_columnar(table, ['id', 'amount', 'label'], block), range(blocks)))
+    elapsed = time.perf_counter() - start
+    ch.execute(f"DROP TABLE {table}")
+    return blocks * block_rows / elapsed
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='LendGuard AI ETL pipeline')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', default=None,
+                        help='Measure ClickHouse insert throughput with ROWS rows instead of running the pipeline')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent inserts of the benchmark')
+    args = parser.parse_args()
     try:
+        if args.benchmark:
+            ch = ClickHouseConnection(size=args.workers)
+            rate = benchmark_insert(ch, args.benchmark, args.workers)
+            logger.info(f"Insert throughput: {rate:,.0f} rows/s ({args.workers} connections, "
+                        f"compression {ch.client_args['compression'] or 'off'})")
+            sys.exit(0)
         pipeline = ETLPipeline()
         success = pipeline.run()
         sys.exit(0 if success else 1)
@@ -0,0 +1,287 @@
+"""
+Silver layer transformation, executed inside ClickHouse.
+
+Every Silver table is rebuilt partition by partition (application or
+transaction month; user profiles are a single partition) with set-based
+INSERT ... SELECT statements, so no Bronze row crosses the wire:
+
+    1. ALTER TABLE <table>_staging DROP PARTITION p    (leftovers of a failed run)
+    2. INSERT INTO <table>_staging SELECT ... FROM bronze WHERE <partition> = p
+    3. ALTER TABLE <table> REPLACE PARTITION p FROM <table>_staging
+    4. ALTER TABLE <table>_staging DROP PARTITION p
+
+REPLACE PARTITION swaps the partition atomically, which makes each
+partition idempotent: rebuilding it any number of times gives the same
+result, and a failed partition can be rebuilt alone. Bronze is append-only
+(see bronze.py), so the SELECTs keep the latest version of each row.
+
+REPLACE PARTITION needs the partitioning of dw_schema.sql, which a table
+created by an older schema does not have (CREATE TABLE IF NOT EXISTS keeps
+it): TABLE_LAYOUTS lists what pipeline.ClickHouseConnection.check_tables()
+verifies before a run.
+
+Materialized views on the staging tables feed the Gold aggregate states
+(see gold.py), so a rebuild first drops the partition's states.
+
+A partition is rebuilt when its newest Bronze extraction_timestamp is newer
+than the one recorded in silver_layer.transform_log for its last build, so
+nightly runs only touch the months that received data. Partitions run in
+parallel on the shared connection pool (see pipeline.ClickHouseConnection),
+each partition with at most --max-threads server threads.
+
+Usage (from warehouse/, rebuilds the given partitions regardless of the log):
+    python etl/silver.py --tables clean_loan_applications --partitions 202601 202602 [--workers 4] [--max-threads 4]
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TRANSFORM_LOG = 'silver_layer.transform_log'
+DEFAULT_WORKERS = 4
+
+# Cut-offs of scripts/predict.py DECISION_THRESHOLDS (reject / review)
+CLEAN_LOAN_APPLICATIONS_SQL = """
+    INSERT INTO {target} (
+        application_id, user_id, loan_amount, loan_term_months, normalized_income, normalized_credit_score,
+        employment_score, debt_to_income_ratio, existing_debt, payment_history_score, collateral_value,
+        application_date, risk_category, risk_score, annual_income, default_probability, status, loan_purpose,
+        source_table
+    )
+    SELECT
+        application_id, user_id, loan_amount, loan_term_months,
+        log1p(greatest(annual_income, 0)),
+        least(greatest((credit_score - 300) / 550, 0), 1),
+        multiIf(employment = 'FULL_TIME', 3, employment = 'SELF_EMPLOYED', 2, employment = 'PART_TIME', 1, 0),
+        debt_to_income_ratio, existing_debt,
+        toFloat32OrZero(payment_history),
+        -- secured loans are counted at face value
+        if(collateral_type IN ('', 'NONE'), 0, loan_amount),
+        application_date,
+        multiIf(default_probability > 0.7 OR risk_score > 700, 'HIGH',
+                default_probability > 0.4 OR risk_score > 500, 'MEDIUM',
+                default_probability IS NULL AND risk_score IS NULL, 'UNSCORED',
+                'LOW'),
+        ifNull(risk_score, 0), annual_income, default_probability, status,
+        if(purpose = '', 'OTHER', purpose), source_table
+    FROM (
+        SELECT *,
+               upper(replaceRegexpAll(trim(employment_status), '[- ]', '_')) AS employment,
+               upper(replaceRegexpAll(trim(loan_purpose), '[- ]', '_')) AS purpose
+        FROM bronze_layer.raw_loan_applications
+        WHERE {where}
+        ORDER BY application_id, updated_at DESC
+        LIMIT 1 BY application_id
+    )
+"""
+
+CLEAN_USER_PROFILES_SQL = """
+    INSERT INTO {target} (
+        user_id, email, age_group, occupation_category, employment_stability_score, education_score,
+        family_size, location_type, profile_completeness
+    )
+    SELECT
+        user_id, email,
+        multiIf(age = 0, 'UNKNOWN', age < 25, '18-24', age < 35, '25-34', age < 45, '35-44',
+                age < 55, '45-54', age < 65, '55-64', '65+'),
+        multiIf(occupation IN ('FULL_TIME', 'PART_TIME'), 'EMPLOYED', occupation = '', 'UNKNOWN', occupation),
+        least(years_employed / 10, 1),
+        multiIf(education_level = 'HIGH_SCHOOL', 1, education_level = 'BACHELOR', 2,
+                education_level = 'MASTER', 3, education_level = 'PHD', 4, 0),
+        1 + (marital_status = 'MARRIED') + num_dependents,
+        multiIf(residential_status = 'MORTGAGE', 'HOMEOWNER', residential_status = '', 'UNKNOWN', 'NON_OWNER'),
+        ((age > 0) + (occupation != '') + (education_level != '') + (marital_status != '')
+            + (residential_status != '')) / 5
+    FROM (
+        SELECT *
+        FROM bronze_layer.raw_user_profiles
+        WHERE {where}
+        ORDER BY user_id, updated_at DESC
+        LIMIT 1 BY user_id
+    )
+"""
+
+TRANSACTION_AGGREGATES_SQL = """
+    INSERT INTO {target} (
+        user_id, transaction_period, total_spending, avg_transaction_amount, transaction_frequency,
+        high_risk_transactions, spending_volatility
+    )
+    SELECT
+        user_id,
+        formatDateTime(transaction_date, '%Y-%m') AS period,
+        sum(transaction_amount),
+        avg(transaction_amount),
+        count(),
+        countIf(lower(merchant_category) IN ('gambling', 'cash_advance', 'crypto', 'pawn_shop')),
+        -- coefficient of variation of the transaction amounts
+        ifNull(stddevPop(transaction_amount) / nullIf(avg(transaction_amount), 0), 0)
+    FROM (
+        SELECT *
+        FROM bronze_layer.raw_transaction_history
+        WHERE {where}
+        LIMIT 1 BY transaction_id
+    )
+    GROUP BY user_id, period
+"""
+
+# partition_by: the Silver partition key computed on the Bronze source,
+# target_partition_by: the same key on the Silver table (None: single partition),
+# state_tables: Gold aggregate states fed from the staging table by materialized
+# views, partitioned like the Silver table (see gold.py)
+TRANSFORMS = [
+    {
+        'table': 'silver_layer.clean_loan_applications',
+        'source': 'bronze_layer.raw_loan_applications',
+        'partition_by': 'toYYYYMM(application_date)',
+        'target_partition_by': 'toYYYYMM(application_date)',
+        'sql': CLEAN_LOAN_APPLICATIONS_SQL,
+        'state_tables': ['gold_layer.daily_loan_states'],
+    },
+    {
+        'table': 'silver_layer.clean_user_profiles',
+        'source': 'bronze_layer.raw_user_profiles',
+        'partition_by': None,
+        'target_partition_by': None,
+        'sql': CLEAN_USER_PROFILES_SQL,
+    },
+    {
+        'table': 'silver_layer.transaction_aggregates',
+        'source': 'bronze_layer.raw_transaction_history',
+        'partition_by': "formatDateTime(transaction_date, '%Y-%m')",
+        'target_partition_by': 'transaction_period',
+        'sql': TRANSACTION_AGGREGATES_SQL,
+    },
+]
+
+# table -> (engine, partition key) as in system.tables
+TABLE_LAYOUTS = {
+    table: ('MergeTree', spec['target_partition_by'] or '')
+    for spec in TRANSFORMS
+    for table in (spec['table'], f"{spec['table']}_staging")
+}
+
+
+def partition_literal(value):
+    """SQL literal of a partition value (202601, '2026-01'; None for an unpartitioned table)"""
+    if value is None:
+        return 'tuple()'
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return str(value)
+
+
+def plan_partitions(ch, transforms, partitions=None):
+    """
+    (transform, partition value, bronze watermark) of every partition to rebuild:
+    those with Bronze rows newer than their last build, or the given partitions.
+    """
+    built = {
+        (table, partition): watermark
+        for table, partition, watermark in ch.execute(
+            f"SELECT table_name, partition, max(bronze_watermark) FROM {TRANSFORM_LOG} "
+            f"GROUP BY table_name, partition"
+        )
+    }
+    work = []
+    for spec in transforms:
+        if spec['partition_by'] is None:
+            rows = ch.execute(f"SELECT NULL, max(extraction_timestamp) FROM {spec['source']} HAVING count() > 0")
+        else:
+            rows = ch.execute(
+                f"SELECT {spec['partition_by']} AS partition_value, max(extraction_timestamp) "
+                f"FROM {spec['source']} GROUP BY partition_value ORDER BY partition_value"
+            )
+        for value, watermark in rows:
+            key = 'all' if value is None else str(value)
+            if partitions is not None:
+                if key in partitions:
+                    work.append((spec, value, watermark))
+            elif (spec['table'], key) not in built or watermark > built[(spec['table'], key)]:
+                work.append((spec, value, watermark))
+    return work
+
+
+def rebuild_partition(ch, spec, value, watermark, settings=None):
+    """Rebuild one Silver partition through its staging table; returns the row count"""
+    start = time.perf_counter()
+    table, staging = spec['table'], f"{spec['table']}_staging"
+    literal = partition_literal(value)
+    where = '1' if value is None else f"{spec['partition_by']} = {literal}"
+
+    ch.execute(f"ALTER TABLE {staging} DROP PARTITION {literal}")
+    # The staging insert re-feeds the partition's Gold states, which must not count it twice
+    for state_table in spec.get('state_tables', []):
+        ch.execute(f"ALTER TABLE {state_table} DROP PARTITION {literal}")
+    # Not retried: a repeated insert would double the partition (a failed one is rebuilt next run)
+    ch.execute(spec['sql'].format(target=staging, where=where), settings=settings, retries=0)
+    staged = '1' if value is None else f"{spec['target_partition_by']} = {literal}"
+    rows = ch.execute(f"SELECT count() FROM {staging} WHERE {staged}")[0][0]
+    ch.execute(f"ALTER TABLE {table} REPLACE PARTITION {literal} FROM {staging}")
+    ch.execute(f"ALTER TABLE {staging} DROP PARTITION {literal}")
+
+    seconds = time.perf_counter() - start
+    key = 'all' if value is None else str(value)
+    ch.insert_columnar(TRANSFORM_LOG, ['table_name', 'partition', 'bronze_watermark', 'rows', 'seconds'],
+                       [[table], [key], [watermark], [rows], [seconds]])
+    logger.info(f"[SILVER] {table} partition {key}: {rows} rows in {seconds:.2f}s")
+    return rows
+
+
+def transform_to_silver(ch, tables=None, partitions=None, workers=None, max_threads=None):
+    """
+    Rebuild the stale (or the given) Silver partitions in parallel on the
+    connection pool ch; max_threads caps the server threads of each partition's
+    INSERT ... SELECT so concurrent partitions share the server's cores.
+    Returns {table: rows written}; raises once every partition was attempted
+    if any of them failed (those stay stale and are retried next run).
+    """
+    workers = workers or int(os.getenv('ETL_SILVER_WORKERS', DEFAULT_WORKERS))
+    transforms = [spec for spec in TRANSFORMS if tables is None or spec['table'].split('.')[-1] in tables]
+    max_threads = max_threads or os.getenv('ETL_SILVER_MAX_THREADS')
+    settings = {'max_threads': int(max_threads)} if max_threads else None
+    work = plan_partitions(ch, transforms, partitions)
+    logger.info(f"[SILVER] {len(work)} partition(s) to rebuild with {workers} worker(s)")
+
+    counts = {spec['table']: 0 for spec in transforms}
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(spec, value, pool.submit(rebuild_partition, ch, spec, value, watermark, settings))
+                   for spec, value, watermark in work]
+        for spec, value, future in futures:
+            try:
+                counts[spec['table']] += future.result()
+            except Exception as e:
+                failed.append(f"{spec['table']}:{'all' if value is None else value}")
+                logger.error(f"[SILVER] {spec['table']} partition {value} failed: {e}")
+    if failed:
+        raise RuntimeError(f"Silver partitions failed: {', '.join(failed)}")
+    return counts
+
+
+def main():
+    from pipeline import ClickHouseConnection
+
+    parser = argparse.ArgumentParser(description='Rebuild Silver partitions inside ClickHouse')
+    parser.add_argument('--tables', nargs='+', default=None,
+                        choices=[spec['table'].split('.')[-1] for spec in TRANSFORMS])
+    parser.add_argument('--partitions', nargs='+', default=None,
+                        help="Partitions to rebuild (202601, 2026-01, 'all' for user profiles)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-threads', type=int, default=None, help='Server threads per partition query')
+    args = parser.parse_args()
+
+    workers = args.workers or int(os.getenv('ETL_SILVER_WORKERS', DEFAULT_WORKERS))
+    ch = ClickHouseConnection(size=workers)
+    if not ch.check_tables(TABLE_LAYOUTS):
+        raise SystemExit(1)
+    counts = transform_to_silver(ch, args.tables, args.partitions, workers, args.max_threads)
+    for table, rows in counts.items():
+        logger.info(f"[SILVER] {table}: {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
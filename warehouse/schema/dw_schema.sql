@@ -23,6 +23,22 @@ CREATE TABLE IF NOT EXISTS bronze_layer.raw_loan_applications (
 ) ENGINE = MergeTree()
 ORDER BY (application_date, user_id);
 
+-- Source lineage and Loan fields used downstream (incremental extraction, see etl/bronze.py)
+ALTER TABLE bronze_layer.raw_loan_applications
+    ADD COLUMN IF NOT EXISTS source_table LowCardinality(String),
+    ADD COLUMN IF NOT EXISTS loan_purpose String,
+    ADD COLUMN IF NOT EXISTS interest_rate Nullable(Float32),
+    ADD COLUMN IF NOT EXISTS status String,
+    ADD COLUMN IF NOT EXISTS decision String,
+    ADD COLUMN IF NOT EXISTS risk_score Nullable(Float32),
+    ADD COLUMN IF NOT EXISTS default_probability Nullable(Float32),
+    ADD COLUMN IF NOT EXISTS source_id String,
+    ADD COLUMN IF NOT EXISTS updated_at DateTime64(3, 'UTC');
+
+-- Remember recent insert blocks, so a retried batch insert (same
+-- insert_deduplication_token) is dropped instead of written twice
+ALTER TABLE bronze_layer.raw_loan_applications MODIFY SETTING non_replicated_deduplication_window = 1000;
+
 CREATE TABLE IF NOT EXISTS bronze_layer.raw_user_profiles (
     user_id UUID,
     email String,
@@ -38,6 +54,12 @@ CREATE TABLE IF NOT EXISTS bronze_layer.raw_user_profiles (
 ) ENGINE = MergeTree()
 ORDER BY (created_at, user_id);
 
+ALTER TABLE bronze_layer.raw_user_profiles
+    ADD COLUMN IF NOT EXISTS source_id String,
+    ADD COLUMN IF NOT EXISTS updated_at DateTime64(3, 'UTC');
+
+ALTER TABLE bronze_layer.raw_user_profiles MODIFY SETTING non_replicated_deduplication_window = 1000;
+
 CREATE TABLE IF NOT EXISTS bronze_layer.raw_transaction_history (
     transaction_id UUID,
     user_id UUID,
@@ -49,6 +71,16 @@ CREATE TABLE IF NOT EXISTS bronze_layer.raw_transaction_history (
 ) ENGINE = MergeTree()
 ORDER BY (transaction_date, user_id);
 
+-- High-water mark (updatedAt, id) of the last extracted row per PostgreSQL source
+CREATE TABLE IF NOT EXISTS bronze_layer.extraction_watermarks (
+    source String,
+    watermark_ts DateTime64(3, 'UTC'),
+    watermark_id String,
+    rows UInt64,
+    updated_at DateTime64(3, 'UTC') DEFAULT now64(3)
+) ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY (source);
+
 -- ===========================
 -- SILVER LAYER (Cleaned Data)
 -- ===========================
@@ -69,8 +101,14 @@ CREATE TABLE IF NOT EXISTS silver_layer.clean_loan_applications (
     application_date DateTime,
     risk_category String,
     risk_score Float32,
+    annual_income Float64,
+    default_probability Nullable(Float32),
+    status LowCardinality(String),
+    loan_purpose LowCardinality(String),
+    source_table LowCardinality(String),
     processed_timestamp DateTime DEFAULT now()
 ) ENGINE = MergeTree()
+PARTITION BY toYYYYMM(application_date)
 ORDER BY (application_date, user_id);
 
 CREATE TABLE IF NOT EXISTS silver_layer.clean_user_profiles (
@@ -97,8 +135,29 @@ CREATE TABLE IF NOT EXISTS silver_layer.transaction_aggregates (
     spending_volatility Float32,
     processed_timestamp DateTime DEFAULT now()
 ) ENGINE = MergeTree()
+PARTITION BY transaction_period
 ORDER BY (transaction_period, user_id);
 
+-- Staging tables: each Silver partition is rebuilt here, then swapped into the
+-- target with REPLACE PARTITION (see etl/silver.py). IF NOT EXISTS keeps the
+-- engine and partitioning of tables created by an older schema: the ETL checks
+-- them against system.tables and refuses to run until they are recreated.
+CREATE TABLE IF NOT EXISTS silver_layer.clean_loan_applications_staging AS silver_layer.clean_loan_applications;
+CREATE TABLE IF NOT EXISTS silver_layer.clean_user_profiles_staging AS silver_layer.clean_user_profiles;
+CREATE TABLE IF NOT EXISTS silver_layer.transaction_aggregates_staging AS silver_layer.transaction_aggregates;
+
+-- One row per rebuilt Silver partition; bronze_watermark is the newest Bronze
+-- extraction_timestamp the partition was built from
+CREATE TABLE IF NOT EXISTS silver_layer.transform_log (
+    table_name String,
+    partition String,
+    bronze_watermark DateTime,
+    rows UInt64,
+    seconds Float32,
+    finished_at DateTime DEFAULT now()
+) ENGINE = MergeTree()
+ORDER BY (table_name, partition, finished_at);
+
 -- ===========================
 -- GOLD LAYER (Aggregated Analytics)
 -- ===========================
@@ -115,7 +174,7 @@ CREATE TABLE IF NOT EXISTS gold_layer.portfolio_risk_metrics (
     portfolio_concentration Float32,
     seasonal_trend String,
     created_timestamp DateTime DEFAULT now()
-) ENGINE = MergeTree()
+) ENGINE = ReplacingMergeTree(created_timestamp)
 ORDER BY (date, portfolio_id);
 
 CREATE TABLE IF NOT EXISTS gold_layer.user_risk_clusters (
@@ -140,9 +199,50 @@ CREATE TABLE IF NOT EXISTS gold_layer.daily_portfolio_summary (
     risk_alerts UInt16,
     top_risk_segment String,
     created_timestamp DateTime DEFAULT now()
-) ENGINE = MergeTree()
+) ENGINE = ReplacingMergeTree(created_timestamp)
 ORDER BY (summary_date);
 
+-- Partial aggregates per day and portfolio (loan purpose). Fed by the view
+-- below from every Silver loan partition rebuild; etl/silver.py drops the
+-- month's states before re-feeding it and etl/gold.py finalizes the changed
+-- days into daily_portfolio_summary and portfolio_risk_metrics.
+CREATE TABLE IF NOT EXISTS gold_layer.daily_loan_states (
+    summary_date Date,
+    portfolio_id LowCardinality(String),
+    applications SimpleAggregateFunction(sum, UInt64),
+    active_loans SimpleAggregateFunction(sum, UInt64),
+    high_risk SimpleAggregateFunction(sum, UInt64),
+    medium_risk SimpleAggregateFunction(sum, UInt64),
+    low_risk SimpleAggregateFunction(sum, UInt64),
+    unscored SimpleAggregateFunction(sum, UInt64),
+    loan_volume SimpleAggregateFunction(sum, Float64),
+    users AggregateFunction(uniq, UUID),
+    default_probability AggregateFunction(avg, Nullable(Float32)),
+    loan_to_income AggregateFunction(avg, Nullable(Float64)),
+    fed_at SimpleAggregateFunction(max, DateTime)
+) ENGINE = AggregatingMergeTree()
+PARTITION BY toYYYYMM(summary_date)
+ORDER BY (summary_date, portfolio_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS gold_layer.daily_loan_states_mv
+TO gold_layer.daily_loan_states
+AS SELECT
+    toDate(application_date) AS summary_date,
+    loan_purpose AS portfolio_id,
+    count() AS applications,
+    countIf(upper(status) = 'APPROVED') AS active_loans,
+    countIf(risk_category = 'HIGH') AS high_risk,
+    countIf(risk_category = 'MEDIUM') AS medium_risk,
+    countIf(risk_category = 'LOW') AS low_risk,
+    countIf(risk_category = 'UNSCORED') AS unscored,
+    sum(loan_amount) AS loan_volume,
+    uniqState(user_id) AS users,
+    avgState(default_probability) AS default_probability,
+    avgState(loan_amount / nullIf(annual_income, 0)) AS loan_to_income,
+    now() AS fed_at
+FROM silver_layer.clean_loan_applications_staging
+GROUP BY summary_date, portfolio_id;
+
 -- ===========================
 -- MATERIALIZED VIEWS (Optional Aggregations)
 -- ===========================